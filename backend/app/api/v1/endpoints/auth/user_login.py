@@ -1,18 +1,22 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.schemas.user import LoginRequest
 from app.schemas.auth import TokenResponse
 from app.services.auth_service import AuthService
-from app.core.auth import create_access_token
+from app.core.auth import create_access_token, verify_token
 from app.db.session import get_db
+from app.dependencies.auth import get_current_user, security
+from app.models.user import User
+from app.services.token_revocation import revoke_token
 
 router = APIRouter()
 
 @router.post("/login", response_model=TokenResponse)
-def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: Session = Depends(get_db)):
     """Connexion d'un utilisateur"""
     try:
-        user = AuthService.authenticate_user(db, request)
+        user = await AuthService.authenticate_user_async(db, request)
         access_token = create_access_token(data={"sub": user.email})
         return TokenResponse(access_token=access_token)
     except HTTPException as e:
@@ -21,9 +25,17 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Erreur lors de la connexion")
 
 @router.post("/logout")
-def logout():
-    """Déconnexion (côté client, invalider le token)"""
-    # Dans une vraie implémentation, on pourrait blacklister le token
-    # Pour l'instant, on retourne juste un message
+def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Déconnexion: le token est révoqué jusqu'à son expiration"""
+    token_data = verify_token(
+        credentials.credentials,
+        HTTPException(status_code=401, detail="Token invalide ou expiré")
+    )
+    # Les anciens tokens sans jti ne peuvent pas être révoqués (expiration seule)
+    if token_data.jti and token_data.expires_at:
+        revoke_token(db, token_data.jti, current_user.id, token_data.expires_at)
     return {"message": "Déconnexion réussie"}
-
@@ -9,10 +9,10 @@ from app.db.session import get_db
 router = APIRouter()
 
 @router.post("/register", response_model=TokenResponse)
-def register(request: RegisterRequest, db: Session = Depends(get_db)):
+async def register(request: RegisterRequest, db: Session = Depends(get_db)):
     """Inscription d'un nouvel utilisateur"""
     try:
-        user = AuthService.register_user(db, request)
+        user = await AuthService.register_user_async(db, request)
         # Créer un token automatiquement après inscription
         access_token = create_access_token(data={"sub": user.email})
         return TokenResponse(access_token=access_token)
@@ -9,9 +9,20 @@ from app.schemas.budget_schema import (
     BudgetUpdate,
     BudgetResponse
 )
+from app.db.routing import session_router
+from app.services.event_bus import queue_event, on_commit
 
 router = APIRouter()
 
+def budget_to_event(budget: Budget) -> dict:
+    """Données poussées aux dashboards ouverts (flux SSE)"""
+    return {
+        "id": budget.id,
+        "category": budget.category,
+        "monthly_limit": float(budget.monthly_limit),
+        "notification_threshold": float(budget.notification_threshold)
+    }
+
 @router.get("/budgets", response_model=List[BudgetResponse])
 def get_budgets(
     db: Session = Depends(get_db),
@@ -48,6 +59,9 @@ def create_budget(
         notification_threshold=budget_data.notification_threshold
     )
     db.add(db_budget)
+    db.flush()
+    queue_event(db, current_user.id, "budget_created", budget_to_event(db_budget))
+    on_commit(db, lambda: session_router.mark_write(current_user.id))
     db.commit()
     db.refresh(db_budget)
     return db_budget
@@ -87,6 +101,8 @@ def update_budget(
     for field, value in update_data.items():
         setattr(budget, field, value)
 
+    queue_event(db, current_user.id, "budget_updated", budget_to_event(budget))
+    on_commit(db, lambda: session_router.mark_write(current_user.id))
     db.commit()
     db.refresh(budget)
     return budget
@@ -109,6 +125,8 @@ def delete_budget(
 
     # Supprimer le budget
     db.delete(budget)
+    queue_event(db, current_user.id, "budget_deleted", {"id": budget_id})
+    on_commit(db, lambda: session_router.mark_write(current_user.id))
     db.commit()
 
     return {"message": "Budget supprimé avec succès"}
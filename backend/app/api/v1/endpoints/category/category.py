@@ -11,13 +11,13 @@ class CategoriesResponse(BaseModel):
 
 # Catégories statiques (basées sur les constantes du front-end)
 EXPENSE_CATEGORIES = [
-    "Nourriture"
-    "Transport"
-    "Factures"
-    "Divertissement"
-    "Achats"
-    "Santé"
-    "Éducation"
+    "Nourriture",
+    "Transport",
+    "Factures",
+    "Divertissement",
+    "Achats",
+    "Santé",
+    "Éducation",
     "Divers"
 ]
 
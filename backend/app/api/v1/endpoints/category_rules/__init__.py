@@ -0,0 +1 @@
+# Category rules endpoints
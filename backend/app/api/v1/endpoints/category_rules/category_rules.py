@@ -0,0 +1,105 @@
+# Category rules endpoints
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from typing import List
+from app.db.session import get_db
+from app.dependencies.auth import get_current_user
+from app.models.user import User
+from app.models.transaction import CategoryRule
+from app.schemas.category_rule_schema import (
+    CategoryRuleCreate,
+    CategoryRuleUpdate,
+    CategoryRuleResponse,
+    CategoryRuleTest,
+    CategoryRuleTestResponse
+)
+from app.services.category_rules import rule_cache, validate_rule
+from app.services.event_bus import on_commit
+
+router = APIRouter()
+
+def get_own_rule(db: Session, rule_id: int, user_id: int) -> CategoryRule:
+    """Règle de l'utilisateur (les règles globales ne sont pas modifiables ici)"""
+    rule = db.query(CategoryRule).filter(
+        CategoryRule.id == rule_id,
+        CategoryRule.user_id == user_id
+    ).first()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Règle non trouvée")
+    return rule
+
+@router.get("/category-rules", response_model=List[CategoryRuleResponse])
+def get_category_rules(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Règles de l'utilisateur puis règles globales, dans l'ordre d'application"""
+    return db.query(CategoryRule).filter(
+        or_(CategoryRule.user_id == current_user.id, CategoryRule.user_id.is_(None))
+    ).order_by(
+        CategoryRule.user_id.is_(None),
+        CategoryRule.priority.desc(),
+        CategoryRule.id
+    ).all()
+
+@router.post("/category-rules", response_model=CategoryRuleResponse)
+def create_category_rule(
+    rule_data: CategoryRuleCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Ajouter une règle: les descriptions correspondantes ne passent plus par le modèle"""
+    rule = CategoryRule(user_id=current_user.id, **rule_data.model_dump())
+    db.add(rule)
+    on_commit(db, lambda: rule_cache.invalidate(current_user.id))
+    db.commit()
+    db.refresh(rule)
+    return rule
+
+@router.put("/category-rules/{rule_id}", response_model=CategoryRuleResponse)
+def update_category_rule(
+    rule_id: int,
+    rule_data: CategoryRuleUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Modifier une règle de l'utilisateur"""
+    rule = get_own_rule(db, rule_id, current_user.id)
+    for field, value in rule_data.model_dump(exclude_unset=True).items():
+        setattr(rule, field, value)
+    try:
+        validate_rule(rule.pattern, rule.is_regex)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    on_commit(db, lambda: rule_cache.invalidate(current_user.id))
+    db.commit()
+    db.refresh(rule)
+    return rule
+
+@router.delete("/category-rules/{rule_id}")
+def delete_category_rule(
+    rule_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Supprimer une règle de l'utilisateur"""
+    rule = get_own_rule(db, rule_id, current_user.id)
+    db.delete(rule)
+    on_commit(db, lambda: rule_cache.invalidate(current_user.id))
+    db.commit()
+    return {"message": "Règle supprimée avec succès"}
+
+@router.post("/category-rules/test", response_model=CategoryRuleTestResponse)
+def test_category_rules(
+    request: CategoryRuleTest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Catégorie que les règles donneraient à une description"""
+    return {
+        "description": request.description,
+        "category": rule_cache.get(db, current_user.id).match(request.description)
+    }
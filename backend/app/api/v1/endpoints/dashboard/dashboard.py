@@ -1,13 +1,25 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
-from typing import Optional, List
-from datetime import datetime, date
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func
+from typing import Optional, List, Dict, Tuple
+from collections import defaultdict
+from datetime import date
+from app.core.responses import FastJSONResponse
 from app.db.session import get_db
 from app.dependencies.auth import get_current_user
+from app.dependencies.database import get_read_db
 from app.models.user import User, Budget
 from app.models.transaction import Transaction
+from app.db.partitioning import month_start
+from app.services.archive import archived_monthly_totals
+from app.services.event_bus import sse_response
+from app.services.forecast import forecast_cache
+from app.services.transaction_rows import transaction_select
+from app.services.transaction_search import MAX_PAGE_SIZE, keyset_page, parse_date
+from app.schemas.transaction_schema import TransactionResponse
+from ..category.category import CategoriesResponse, EXPENSE_CATEGORIES, INCOME_CATEGORIES
 from pydantic import BaseModel
+import os
 
 router = APIRouter()
 
@@ -28,6 +40,8 @@ class BudgetStatus(BaseModel):
     notification_threshold: float
     is_over_budget: bool
     is_near_limit: bool
+    projected_spending: Optional[float] = None  # Projection fin de mois
+    is_projected_over_budget: bool = False
 
 class CategoryAnalysis(BaseModel):
     category: str
@@ -35,59 +49,70 @@ class CategoryAnalysis(BaseModel):
     transaction_count: int
     percentage_of_expenses: float
 
-@router.get("/dashboard/summary", response_model=DashboardSummary)
-def get_dashboard_summary(
-    month: Optional[str] = Query(None, description="Format: YYYY-MM"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Résumé général du dashboard avec revenus, dépenses et solde"""
+class SpendingForecast(BaseModel):
+    month: str
+    categories: Dict[str, float]  # Dépenses projetées par catégorie
+    projected_expenses: float
+    projected_income: float
+    projected_balance: float
 
-    # Déterminer la période (mois en cours si non spécifié)
+class DashboardBootstrap(BaseModel):
+    summary: DashboardSummary
+    budgets_status: List[BudgetStatus]
+    categories_analysis: List[CategoryAnalysis]
+    categories: CategoriesResponse
+    transactions: List[TransactionResponse]
+
+# Nombre de transactions renvoyées par /dashboard/bootstrap
+BOOTSTRAP_TRANSACTIONS = int(os.getenv("BOOTSTRAP_TRANSACTIONS", "100"))
+
+# Nombre maximal de mois d'une série temporelle
+MAX_TIMESERIES_MONTHS = 120
+
+# Agrégats d'un mois: (type, catégorie) -> (montant total, nombre de transactions)
+MonthlyAggregates = Dict[Tuple[str, str], Tuple[float, int]]
+
+def get_month_bounds(month: Optional[str]) -> Tuple[date, date, str]:
+    """(premier jour, premier jour du mois suivant, "YYYY-MM"), mois en cours par défaut"""
     if month:
         try:
             year, month_num = map(int, month.split('-'))
             start_date = date(year, month_num, 1)
-            if month_num == 12:
-                end_date = date(year + 1, 1, 1)
-            else:
-                end_date = date(year, month_num + 1, 1)
         except ValueError:
             raise HTTPException(status_code=400, detail="Format de mois invalide. Utilisez YYYY-MM")
     else:
         # Mois en cours
         today = date.today()
         start_date = date(today.year, today.month, 1)
-        if today.month == 12:
-            end_date = date(today.year + 1, 1, 1)
-        else:
-            end_date = date(today.year, today.month + 1, 1)
-        month = f"{today.year:04d}-{today.month:02d}"
-
-    # Calcul des revenus totaux
-    total_income_result = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.type == "income",
-        Transaction.date >= start_date,
-        Transaction.date < end_date
-    ).scalar()
-    total_income = float(total_income_result) if total_income_result is not None else 0.0
 
-    # Calcul des dépenses totales
-    total_expenses_result = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.type == "expense",
-        Transaction.date >= start_date,
-        Transaction.date < end_date
-    ).scalar()
-    total_expenses = float(total_expenses_result) if total_expenses_result is not None else 0.0
+    if start_date.month == 12:
+        end_date = date(start_date.year + 1, 1, 1)
+    else:
+        end_date = date(start_date.year, start_date.month + 1, 1)
+    return start_date, end_date, f"{start_date.year:04d}-{start_date.month:02d}"
 
-    # Nombre de transactions
-    transaction_count = db.query(func.count(Transaction.id)).filter(
-        Transaction.user_id == current_user.id,
+def get_monthly_aggregates(db: Session, user_id: int, start_date: date, end_date: date) -> MonthlyAggregates:
+    """Une seule requête GROUP BY type, catégorie pour tout le mois"""
+    rows = db.query(
+        Transaction.type,
+        Transaction.category,
+        func.sum(Transaction.amount),
+        func.count(Transaction.id)
+    ).filter(
+        Transaction.user_id == user_id,
         Transaction.date >= start_date,
         Transaction.date < end_date
-    ).scalar()
+    ).group_by(Transaction.type, Transaction.category).all()
+
+    return {
+        (str(getattr(type_, "value", type_)), category): (float(total or 0), count)
+        for type_, category, total, count in rows
+    }
+
+def build_summary(aggregates: MonthlyAggregates, month: str) -> DashboardSummary:
+    total_income = sum(total for (type_, _), (total, _) in aggregates.items() if type_ == "income")
+    total_expenses = sum(total for (type_, _), (total, _) in aggregates.items() if type_ == "expense")
+    transaction_count = sum(count for _, count in aggregates.values())
 
     # Calcul du solde
     balance = total_income - total_expenses
@@ -100,36 +125,14 @@ def get_dashboard_summary(
         month=month
     )
 
-@router.get("/budgets/status", response_model=List[BudgetStatus])
-def get_budgets_status(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Statut des budgets avec dépenses actuelles et alertes"""
-
-    # Mois en cours
-    today = date.today()
-    start_date = date(today.year, today.month, 1)
-    if today.month == 12:
-        end_date = date(today.year + 1, 1, 1)
-    else:
-        end_date = date(today.year, today.month + 1, 1)
-
-    # Récupérer tous les budgets de l'utilisateur
-    budgets = db.query(Budget).filter(Budget.user_id == current_user.id).all()
-
+def build_budgets_status(budgets: List[Budget], aggregates: MonthlyAggregates,
+                         forecast: Optional[dict] = None) -> List[BudgetStatus]:
     budget_statuses = []
+    projections = forecast["categories"] if forecast else {}
 
     for budget in budgets:
-        # Calcul des dépenses actuelles pour cette catégorie ce mois-ci
-        current_spending_result = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == current_user.id,
-            Transaction.type == "expense",
-            Transaction.category == budget.category,
-            Transaction.date >= start_date,
-            Transaction.date < end_date
-        ).scalar()
-        current_spending = float(current_spending_result) if current_spending_result is not None else 0.0
+        # Dépenses actuelles pour cette catégorie ce mois-ci
+        current_spending = aggregates.get(("expense", budget.category), (0.0, 0))[0]
 
         # Calcul du pourcentage utilisé
         monthly_limit_float = float(budget.monthly_limit)
@@ -139,6 +142,7 @@ def get_budgets_status(
         # Déterminer les alertes
         is_over_budget = current_spending > monthly_limit_float
         is_near_limit = percentage_used >= notification_threshold_float
+        projected_spending = max(projections.get(budget.category, 0.0), current_spending) if forecast else None
 
         budget_statuses.append(BudgetStatus(
             id=budget.id,
@@ -148,75 +152,202 @@ def get_budgets_status(
             percentage_used=round(percentage_used, 2),
             notification_threshold=notification_threshold_float,
             is_over_budget=is_over_budget,
-            is_near_limit=is_near_limit
+            is_near_limit=is_near_limit,
+            projected_spending=round(projected_spending, 2) if projected_spending is not None else None,
+            is_projected_over_budget=projected_spending is not None and projected_spending > monthly_limit_float
         ))
 
     return budget_statuses
 
+def build_categories_analysis(aggregates: MonthlyAggregates) -> List[CategoryAnalysis]:
+    expenses = {category: value for (type_, category), value in aggregates.items() if type_ == "expense"}
+    total_expenses = sum(total for total, _ in expenses.values())
+
+    categories_analysis = []
+
+    for category, (total_amount, transaction_count) in expenses.items():
+        percentage = (total_amount / total_expenses * 100) if total_expenses > 0 else 0
+
+        categories_analysis.append(CategoryAnalysis(
+            category=category,
+            total_amount=round(total_amount, 2),
+            transaction_count=transaction_count,
+            percentage_of_expenses=round(percentage, 2)
+        ))
+
+    # Trier par montant décroissant
+    categories_analysis.sort(key=lambda x: x.total_amount, reverse=True)
+
+    return categories_analysis
+
+@router.get("/dashboard/summary", response_model=DashboardSummary)
+def get_dashboard_summary(
+    month: Optional[str] = Query(None, description="Format: YYYY-MM"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Résumé général du dashboard avec revenus, dépenses et solde"""
+    start_date, end_date, month = get_month_bounds(month)
+    aggregates = get_monthly_aggregates(db, current_user.id, start_date, end_date)
+    return build_summary(aggregates, month)
+
+@router.get("/budgets/status", response_model=List[BudgetStatus])
+def get_budgets_status(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Statut des budgets avec dépenses actuelles et alertes"""
+
+    # Mois en cours
+    start_date, end_date, _ = get_month_bounds(None)
+
+    # Récupérer tous les budgets de l'utilisateur
+    budgets = db.query(Budget).filter(Budget.user_id == current_user.id).all()
+    if not budgets:
+        return []
+
+    # Dépenses de toutes les catégories en une requête (pas une par budget)
+    aggregates = get_monthly_aggregates(db, current_user.id, start_date, end_date)
+    return build_budgets_status(budgets, aggregates, forecast_cache.get(db, current_user.id))
+
 @router.get("/categories/analysis", response_model=List[CategoryAnalysis])
 def get_categories_analysis(
     month: Optional[str] = Query(None, description="Format: YYYY-MM"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Analyse par catégorie pour les graphiques"""
+    start_date, end_date, _ = get_month_bounds(month)
+    aggregates = get_monthly_aggregates(db, current_user.id, start_date, end_date)
+    return build_categories_analysis(aggregates)
 
-    # Déterminer la période (mois en cours si non spécifié)
-    if month:
-        try:
-            year, month_num = map(int, month.split('-'))
-            start_date = date(year, month_num, 1)
-            if month_num == 12:
-                end_date = date(year + 1, 1, 1)
-            else:
-                end_date = date(year, month_num + 1, 1)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Format de mois invalide. Utilisez YYYY-MM")
-    else:
-        # Mois en cours
-        today = date.today()
-        start_date = date(today.year, today.month, 1)
-        if today.month == 12:
-            end_date = date(today.year + 1, 1, 1)
-        else:
-            end_date = date(today.year, today.month + 1, 1)
+@router.get("/dashboard/forecast", response_model=SpendingForecast)
+def get_spending_forecast(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Projection des dépenses par catégorie et du solde à la fin du mois en cours"""
+    return forecast_cache.get(db, current_user.id)
 
-    # Calcul du total des dépenses pour le pourcentage
-    total_expenses_result = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.type == "expense",
-        Transaction.date >= start_date,
-        Transaction.date < end_date
-    ).scalar()
-    total_expenses = float(total_expenses_result) if total_expenses_result is not None else 0.0
+@router.get("/dashboard/timeseries", response_model=List[DashboardSummary])
+def get_dashboard_timeseries(
+    start: Optional[str] = Query(None, description="Premier mois, format YYYY-MM (12 mois par défaut)"),
+    end: Optional[str] = Query(None, description="Dernier mois inclus, format YYYY-MM (mois en cours par défaut)"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Totaux mensuels sur une période, mois archivés (Parquet) compris"""
+    _, end_date, _ = get_month_bounds(end)
+    start_date = get_month_bounds(start)[0] if start else month_start(end_date, -12)
+    if not start_date < end_date or start_date < month_start(end_date, -MAX_TIMESERIES_MONTHS):
+        raise HTTPException(status_code=400, detail=f"Période invalide (au plus {MAX_TIMESERIES_MONTHS} mois)")
 
-    # Agrégation par catégorie
-    from sqlalchemy import text
-    query = db.query(
-        Transaction.category,
-        func.sum(Transaction.amount).label('total_amount'),
-        func.count(Transaction.id).label('transaction_count')
+    # Regroupement par jour (portable), replié par mois ensuite
+    rows = db.query(
+        Transaction.type,
+        Transaction.date,
+        func.sum(Transaction.amount),
+        func.count(Transaction.id)
     ).filter(
         Transaction.user_id == current_user.id,
-        Transaction.type == "expense",
         Transaction.date >= start_date,
         Transaction.date < end_date
-    ).group_by(Transaction.category).all()
+    ).group_by(Transaction.type, Transaction.date).all()
 
-    categories_analysis = []
+    months: Dict[str, Dict[Tuple[str, str], List]] = defaultdict(lambda: defaultdict(lambda: [0.0, 0]))
+    for type_, day, total, count in rows:
+        entry = months[day.strftime("%Y-%m")][(str(getattr(type_, "value", type_)), "")]
+        entry[0] += float(total or 0)
+        entry[1] += count
+    for (month, type_), (total, count) in archived_monthly_totals(current_user.id, start_date, end_date).items():
+        entry = months[month][(type_, "")]
+        entry[0] += total
+        entry[1] += count
 
-    for category, total_amount, transaction_count in query:
-        percentage = (total_amount / total_expenses * 100) if total_expenses > 0 else 0
+    series, month = [], start_date
+    while month < end_date:
+        key = month.strftime("%Y-%m")
+        series.append(build_summary({k: tuple(v) for k, v in months.get(key, {}).items()}, key))
+        month = month_start(month, 1)
+    return series
 
-        categories_analysis.append(CategoryAnalysis(
-            category=category,
-            total_amount=round(total_amount, 2),
-            transaction_count=transaction_count,
-            percentage_of_expenses=round(percentage, 2)
-        ))
+@router.get("/dashboard/anomalies", response_model=List[TransactionResponse])
+def get_spending_anomalies(
+    month: Optional[str] = Query(None, description="Format: YYYY-MM (tous les mois si absent)"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Dépenses inhabituelles pour leur catégorie (calculées par le job app.jobs.anomalies)"""
+    query = db.query(Transaction).options(selectinload(Transaction.tickets)).filter(
+        Transaction.user_id == current_user.id,
+        Transaction.is_anomaly.is_(True)
+    )
+    if month:
+        start_date, end_date, _ = get_month_bounds(month)
+        query = query.filter(Transaction.date >= start_date, Transaction.date < end_date)
+    return query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit).all()
 
-    # Trier par montant décroissant
-    categories_analysis.sort(key=lambda x: x.total_amount, reverse=True)
+@router.get("/dashboard/bootstrap", response_model=DashboardBootstrap)
+def get_dashboard_bootstrap(
+    month: Optional[str] = Query(None, description="Format: YYYY-MM"),
+    transactions_limit: int = Query(BOOTSTRAP_TRANSACTIONS, ge=1, le=MAX_PAGE_SIZE, description="Nombre de transactions (les plus récentes)"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Toutes les données du premier affichage en un seul appel.
 
-    return categories_analysis
+    Remplace /dashboard/summary, /budgets/status, /categories/analysis,
+    /categories et /transactions: une authentification, une session, et
+    les agrégats du mois calculés par une seule requête partagée.
+
+    Seule la première page des transactions est renvoyée; l'en-tête
+    X-Next-Cursor permet de lire la suite avec GET /transactions?cursor=.
+    """
+    start_date, end_date, month = get_month_bounds(month)
+    aggregates = get_monthly_aggregates(db, current_user.id, start_date, end_date)
+
+    # Les budgets portent toujours sur le mois en cours
+    current_start, current_end, _ = get_month_bounds(None)
+    if current_start == start_date:
+        current_aggregates = aggregates
+    else:
+        current_aggregates = get_monthly_aggregates(db, current_user.id, current_start, current_end)
+    budgets = db.query(Budget).filter(Budget.user_id == current_user.id).all()
+
+    # Lignes SQL brutes (tickets joints), même pagination que GET /transactions
+    transactions, next_cursor = keyset_page(
+        db, transaction_select(current_user.id), Transaction.date, parse_date, None, transactions_limit
+    )
+
+    bootstrap = DashboardBootstrap(
+        summary=build_summary(aggregates, month),
+        budgets_status=build_budgets_status(
+            budgets, current_aggregates,
+            forecast_cache.get(db, current_user.id) if budgets else None
+        ),
+        categories_analysis=build_categories_analysis(aggregates),
+        categories=CategoriesResponse(expense=EXPENSE_CATEGORIES, income=INCOME_CATEGORIES),
+        transactions=[]
+    ).model_dump(mode="json")
+    bootstrap["transactions"] = transactions
+    return FastJSONResponse(bootstrap, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+@router.get("/dashboard/stream")
+async def stream_dashboard(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Flux Server-Sent Events des mises à jour du dashboard (remplace le polling).
 
+    Événements: transaction_created / transaction_updated / transaction_deleted,
+    totals_delta (variation des totaux par mois), budget_status, budget_alert,
+    budget_created / budget_updated / budget_deleted.
+    """
+    user_id = current_user.id
+    # Ne pas garder une connexion DB ouverte pendant toute la durée du flux
+    db.close()
+    return sse_response(request, user_id)
@@ -1,13 +1,18 @@
 import os
+import time
+import logging
 import joblib
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 # Load the pipeline
 # pipe_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'backend', 'ml_models', 'pipeline.pkl')
 pipe_path = os.getenv("MODEL_PATH")
+started = time.perf_counter()
 pipeline = joblib.load(pipe_path)
-print("✅ pipeline loaded succesfully")
+logger.info("Pipeline chargé depuis %s en %.2fs", pipe_path, time.perf_counter() - started)
 
 # model_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'ml_project', 'models', 'expense_categorizer_model.pkl')
 # vectorizer_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'ml_project', 'models', 'vectorizer.pkl')
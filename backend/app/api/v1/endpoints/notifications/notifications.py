@@ -0,0 +1,61 @@
+# Notifications endpoints
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+from typing import List
+from app.db.session import get_db
+from app.dependencies.auth import get_current_user
+from app.models.user import User, Notification
+from app.schemas.notification_schema import NotificationResponse
+from app.services.event_bus import sse_response
+
+router = APIRouter()
+
+@router.get("/notifications", response_model=List[NotificationResponse])
+def get_notifications(
+    unread_only: bool = Query(False),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Alertes de budget de l'utilisateur, les plus récentes d'abord"""
+    query = db.query(Notification).filter(Notification.user_id == current_user.id)
+    if unread_only:
+        query = query.filter(Notification.read.is_(False))
+    return query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit).all()
+
+@router.post("/notifications/{notification_id}/read")
+def mark_notification_read(
+    notification_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Marquer une alerte comme lue"""
+    updated = db.query(Notification).filter(
+        Notification.id == notification_id,
+        Notification.user_id == current_user.id
+    ).update({"read": True}, synchronize_session=False)
+
+    if not updated:
+        raise HTTPException(status_code=404, detail="Notification non trouvée")
+
+    db.commit()
+    return {"message": "Notification marquée comme lue"}
+
+@router.get("/notifications/stream")
+async def stream_notifications(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Flux Server-Sent Events des alertes de budget.
+
+    Chaque alerte est envoyée sous la forme:
+        event: budget_alert
+        data: {"category": ..., "level": ..., ...}
+    """
+    user_id = current_user.id
+    # Ne pas garder une connexion DB ouverte pendant toute la durée du flux
+    db.close()
+    return sse_response(request, user_id, event_types=["budget_alert"])
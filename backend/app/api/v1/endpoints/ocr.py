@@ -1,11 +1,17 @@
-from fastapi import APIRouter, UploadFile, HTTPException, File
-from app.services.ocr_service import extract_items, extract_text_from_image
+from fastapi import APIRouter, UploadFile, HTTPException, File, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
+from app.services.receipt_cache import ocr_with_cache
+from app.services.idempotency import idempotency_store, request_fingerprint
+from app.services.storage_service import save_upload
+from app.services.ticket_service import build_items, items_to_dict
 from app.db.session import get_db
 from app.models.user import Ticket
 from sqlalchemy.orm import Session
 from fastapi import Depends
 from app.dependencies.auth import get_current_user
 from app.models.user import User
+from typing import Optional
 import json
 
 router = APIRouter()
@@ -13,6 +19,7 @@ router = APIRouter()
 @router.post("/process_ticket")
 async def process_and_store_ticket(
     file: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -29,65 +36,85 @@ async def process_and_store_ticket(
         ],
         "message": "Ticket traité et stocké avec succès"
     }
+
+    Avec Idempotency-Key, un retry renvoie la réponse de la première requête
+    (même si le ticket a entre-temps été associé à une transaction).
     """
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="Format non supporté")
     
-    # Lire les bytes de l'image
-    image_bytes = await file.read()
-    
-    try:
-        # Extraire le texte brut
-        raw_text = extract_text_from_image(image_bytes)
-        
-        # Nettoyer le texte
-        # cleaned_text = clean_receipt_lines(raw_text)
-        
-        # Extraire les items
-        items = extract_items(raw_text)
-        
-        # ✅ AMÉLIORATION: Formater les items pour correspondre au frontend
-        formatted_items = []
-        for item in items:
-            formatted_items.append({
-                "label": item.get("label", item.get("description", "")),
-                "amount": float(item.get("amount", 0))
-            })
-        
-        # Stocker dans la table ticket avec les données extraites
-        db_ticket = Ticket(
-            user_id=current_user.id,
-            transaction_id=None,  # Sera défini lors de la création de transaction
-            type=file.content_type,
-            file_path=f"processed_{file.filename}",
-            data=json.dumps({
+    # ✅ Écrire l'image sur disque par morceaux (mémoire bornée, 413 si trop gros)
+    file_path, digest, size = await save_upload(file)
+
+    def process(commit: bool = True) -> dict:
+        # ✅ Même image déjà envoyée (ex: retry mobile) et pas encore utilisée:
+        # on renvoie le ticket existant au lieu d'en créer un nouveau
+        existing_ticket = db.query(Ticket).filter(
+            Ticket.user_id == current_user.id,
+            Ticket.content_hash == digest,
+            Ticket.transaction_id.is_(None)
+        ).first()
+        if existing_ticket:
+            ticket_info = json.loads(existing_ticket.data)
+            return {
+                "ticket_id": existing_ticket.id,
+                "raw_text": ticket_info.get("raw_text"),
+                "items": items_to_dict(existing_ticket.items),
+                "message": "Ticket déjà traité"
+            }
+
+        try:
+            # ✅ OCR depuis le fichier stocké (résultat réutilisé si déjà calculé)
+            raw_text, formatted_items = ocr_with_cache(db, current_user.id, digest, file_path)
+
+            # Stocker dans la table ticket avec les données extraites
+            db_ticket = Ticket(
+                user_id=current_user.id,
+                transaction_id=None,  # Sera défini lors de la création de transaction
+                type=file.content_type,
+                file_path=file_path,
+                data=json.dumps({
+                    "raw_text": raw_text,
+                    "filename": file.filename,
+                    "processed": True
+                }),
+                size=size,
+                content_hash=digest,
+                items=build_items(formatted_items)  # ✅ Une ligne par article (table ticket_items)
+            )
+
+            db.add(db_ticket)
+            if commit:
+                db.commit()
+                db.refresh(db_ticket)
+            else:
+                # Commit fait avec la réponse idempotente
+                db.flush()
+
+            # ✅ Retourner le format attendu par le frontend
+            return {
+                "ticket_id": db_ticket.id,
                 "raw_text": raw_text,
-                "items": formatted_items,  # ✅ Format standardisé
-                "filename": file.filename,
-                "processed": True,
-                "processed_items": []  # ✅ Nouveau: liste des items déjà traités
-            }),
-            size=len(image_bytes)
-        )
-        
-        db.add(db_ticket)
-        db.commit()
-        db.refresh(db_ticket)
-        
-        # ✅ Retourner le format attendu par le frontend
-        return {
-            "ticket_id": db_ticket.id,
-            "raw_text": raw_text,
-            "items": formatted_items,  # ✅ Format: [{"label": "...", "amount": ...}]
-            "message": "Ticket traité et stocké avec succès"
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur lors du traitement OCR: {str(e)}")
+                "items": formatted_items,  # ✅ Format: [{"label": "...", "amount": ...}]
+                "message": "Ticket traité et stocké avec succès"
+            }
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Erreur lors du traitement OCR: {str(e)}")
+
+    # ✅ Hors de la boucle d'événements: l'OCR et les requêtes SQL sont bloquants
+    if idempotency_key is None:
+        return await run_in_threadpool(process)
+    return await run_in_threadpool(
+        idempotency_store.execute, db, current_user.id, idempotency_key,
+        # Même image: même requête (le nom du fichier n'intervient pas)
+        request_fingerprint("process_ticket", digest.encode()),
+        lambda: json.dumps(jsonable_encoder(process(commit=False))).encode()
+    )
 
 
 
 # Pytest pour quelques tests unitaire
 # Github action optionnel
 # DOCKER contenaire
-# Creer des visuels avec PowerBI ou Python
\ No newline at end of file
+# Creer des visuels avec PowerBI ou Python
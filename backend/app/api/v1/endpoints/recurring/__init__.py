@@ -0,0 +1 @@
+# Recurring transactions endpoints
@@ -0,0 +1,56 @@
+# Recurring transactions endpoints
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+from app.db.session import get_db
+from app.dependencies.auth import get_current_user
+from app.models.user import User
+from app.models.transaction import RecurringTransaction
+from app.schemas.recurring_schema import RecurringTransactionResponse, RecurringTransactionUpdate
+from app.services.recurring import detect_for_users
+
+router = APIRouter()
+
+@router.get("/recurring", response_model=List[RecurringTransactionResponse])
+def get_recurring_transactions(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Opérations récurrentes détectées, par prochaine échéance"""
+    return db.query(RecurringTransaction).filter(
+        RecurringTransaction.user_id == current_user.id
+    ).order_by(RecurringTransaction.next_date, RecurringTransaction.id).all()
+
+@router.post("/recurring/detect", response_model=List[RecurringTransactionResponse])
+def detect_recurring_transactions(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Relancer la détection sur l'historique de l'utilisateur (sans attendre le job)"""
+    detect_for_users(db, current_user.id, current_user.id)
+    db.commit()
+    return get_recurring_transactions(db, current_user)
+
+@router.patch("/recurring/{recurring_id}", response_model=RecurringTransactionResponse)
+def update_recurring_transaction(
+    recurring_id: int,
+    recurring_data: RecurringTransactionUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Activer/désactiver la création automatique ou corriger montant et catégorie"""
+    recurring = db.query(RecurringTransaction).filter(
+        RecurringTransaction.id == recurring_id,
+        RecurringTransaction.user_id == current_user.id
+    ).first()
+
+    if not recurring:
+        raise HTTPException(status_code=404, detail="Opération récurrente non trouvée")
+
+    for field, value in recurring_data.model_dump(exclude_unset=True).items():
+        setattr(recurring, field, value)
+
+    db.commit()
+    db.refresh(recurring)
+    return recurring
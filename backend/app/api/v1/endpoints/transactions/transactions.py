@@ -1,23 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from pydantic import TypeAdapter
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
 import os
 import joblib
 import json
+import logging
+from app.core.responses import FastJSONResponse, dumps
+from app.db.routing import session_router
 from app.db.session import get_db
+from app.dependencies.database import get_read_db
 from app.dependencies.auth import get_current_user
 from app.models.user import User
 from app.models.transaction import Transaction
-from app.models.user import Ticket
+from app.models.user import Ticket, TicketItem
 from app.schemas.transaction_schema import (
     TransactionCreate,
     TransactionUpdate,
     TransactionResponse,
-    TransactionType
+    TransactionType,
+    TransactionFilter,
+    TransactionRecategorize,
+    BulkOperationResponse,
+    TicketMaterializeResponse
 )
-from app.services.ocr_service import extract_text_from_image, extract_items
-from ..model_loader import pipeline
+from app.schemas.ticket_schema import TicketItemsProcessedUpdate, TicketMaterializeRequest
+from app.services.receipt_cache import run_ocr
+from app.services.storage_service import file_digest, is_stored_file
+from app.services.ticket_service import materialize_items, replace_unprocessed_items
+from app.services.bulk_edit import delete_matching, has_criteria, recategorize, reclassify_all
+from app.services.classification import classify_descriptions
+from app.services.event_bus import on_commit
+from app.services.idempotency import idempotency_store, request_fingerprint
+from app.services.transaction_events import on_transactions_written
+from app.services.transaction_rows import fetch_transactions, transaction_select, transaction_to_dict
+from app.services.transaction_search import (
+    MAX_PAGE_SIZE,
+    SEARCH_PAGE_SIZE,
+    apply_search,
+    keyset_page,
+    parse_date,
+    parse_rank
+)
+from ..model_loader import pipeline  # noqa: F401 (modèle chargé au démarrage)
 
 # Load the model and vectorizer for automatic classification
 # model_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'ml_project', 'models', 'expense_categorizer_model.pkl')
@@ -26,6 +53,8 @@ from ..model_loader import pipeline
 # model = joblib.load(model_path)
 # vectorizer = joblib.load(vectorizer_path)
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.get("/transactions", response_model=List[TransactionResponse])
@@ -34,24 +63,131 @@ def get_transactions(
     category: Optional[str] = Query(None),
     date_from: Optional[date] = Query(None),
     date_to: Optional[date] = Query(None),
-    db: Session = Depends(get_db),
+    search: Optional[str] = Query(None, max_length=100, description="Recherche dans les descriptions (préfixes, accents et casse ignorés)"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="En-tête X-Next-Cursor de la page précédente"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Liste des transactions de l'utilisateur avec filtres optionnels"""
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
+    """
+    Liste des transactions de l'utilisateur avec filtres optionnels.
+
+    Avec `search`, les transactions sont classées par pertinence et
+    paginées (SEARCH_PAGE_SIZE par défaut). Avec `limit`, elles sont
+    paginées de la plus récente à la plus ancienne. Le curseur de la page
+    suivante est renvoyé dans l'en-tête X-Next-Cursor.
+
+    Lignes SQL brutes (tickets joints dans la même requête) encodées par
+    orjson: pas d'objets ORM ni de validation Pydantic par transaction.
+    """
+    query = transaction_select(current_user.id)
 
     if type:
-        query = query.filter(Transaction.type == type)
+        query = query.where(Transaction.type == type)
     if category:
-        query = query.filter(Transaction.category == category)
+        query = query.where(Transaction.category == category)
     if date_from:
-        query = query.filter(Transaction.date >= date_from)
+        query = query.where(Transaction.date >= date_from)
     if date_to:
-        query = query.filter(Transaction.date <= date_to)
+        query = query.where(Transaction.date <= date_to)
+
+    if search and search.strip():
+        query, rank = apply_search(query, db, search)
+        key, parse_key, limit = rank, parse_rank, limit or SEARCH_PAGE_SIZE
+    elif limit or cursor:
+        key, parse_key, limit = Transaction.date, parse_date, limit or MAX_PAGE_SIZE
+    else:
+        return FastJSONResponse(fetch_transactions(db, query))
+
+    try:
+        transactions, next_cursor = keyset_page(db, query, key, parse_key, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(transactions, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+def build_transactions(db: Session, user_id: int,
+                       transactions_data: List[TransactionCreate]) -> List[Transaction]:
+    """
+    Prépare les transactions et leurs tickets, sans rien écrire.
+
+    Les tickets existants (ticket_id) sont vérifiés en une seule requête IN
+    avant toute écriture: une erreur 404 ne laisse aucune donnée partielle.
+    Les catégories manquantes sont prédites en un seul appel au modèle.
+    """
+    ticket_ids = [
+        ticket.ticket_id
+        for data in transactions_data for ticket in data.tickets or []
+        if ticket.ticket_id
+    ]
+    existing_tickets = {}
+    if ticket_ids:
+        existing_tickets = {
+            ticket.id: ticket
+            for ticket in db.query(Ticket).filter(
+                Ticket.id.in_(ticket_ids),
+                Ticket.user_id == user_id,
+                Ticket.transaction_id.is_(None)  # Ticket pas encore associé
+            ).with_for_update()
+        }
+        seen = set()
+        for ticket_id in ticket_ids:
+            if ticket_id not in existing_tickets or ticket_id in seen:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Ticket {ticket_id} non trouvé ou déjà utilisé"
+                )
+            seen.add(ticket_id)
+
+    # Classification automatique des transactions sans catégorie
+    predicted = iter(classify_descriptions(
+        db, user_id, [data.description for data in transactions_data if not data.category]
+    ))
 
-    transactions = query.all()
+    transactions = []
+    for data in transactions_data:
+        tickets = [
+            # Ticket déjà traité avec OCR, ou nouveau ticket (sans OCR)
+            existing_tickets[ticket.ticket_id] if ticket.ticket_id else Ticket(
+                user_id=user_id,
+                type=ticket.type,
+                file_path=ticket.file_path,
+                size=ticket.size
+            )
+            for ticket in data.tickets or []
+        ]
+        transactions.append(Transaction(
+            user_id=user_id,
+            description=data.description,
+            amount=data.amount,
+            type=data.type,
+            category=data.category or next(predicted),
+            date=data.date,
+            tickets=tickets
+        ))
     return transactions
 
+
+def save_transactions(db: Session, user_id: int, transactions: List[Transaction],
+                      commit: bool = True) -> None:
+    """
+    Écrit les transactions en une seule unité de travail: un flush (INSERT
+    groupés, valeurs par défaut relues par RETURNING) et un commit.
+    commit=False: le commit est fait par l'appelant (réponse idempotente
+    enregistrée dans la même transaction).
+    """
+    db.add_all(transactions)
+    # Compteurs de dépenses, alertes de budget et événements du dashboard
+    on_transactions_written(db, user_id, "created", transactions, [
+        (1, t.type, t.category, t.date, t.amount) for t in transactions
+    ])
+    if commit:
+        db.commit()
+
+
+# Corps des requêtes de création, pour l'empreinte Idempotency-Key
+transaction_create_list = TypeAdapter(List[TransactionCreate])
+
+
 # ============================================================================
 # ENDPOINT 3: Créer Plusieurs Transactions en Une Fois (NOUVEAU - Optionnel)
 # ============================================================================
@@ -59,6 +195,7 @@ def get_transactions(
 @router.post("/transactions/bulk", response_model=List[TransactionResponse])
 def create_bulk_transactions(
     transactions_data: List[TransactionCreate],
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -66,42 +203,22 @@ def create_bulk_transactions(
     ✅ NOUVEAU: Créer plusieurs transactions en une seule requête.
     
     Utile quand le frontend envoie toutes les transactions détectées par OCR.
-    Plus efficace que de créer une par une.
+    Plus efficace que de créer une par une: tout ou rien, en un seul commit.
+    Avec Idempotency-Key, un retry renvoie la réponse de la première requête.
     """
-    created_transactions = []
-    
-    for transaction_data in transactions_data:
-        # Classification automatique si la catégorie n'est pas fournie
-        category = transaction_data.category
-        if not category:
-            try:
-                predicted_category = pipeline.predict([transaction_data.description])
-                # predicted_category = model.predict(X)[0]
-                category = predicted_category
-            except Exception as e:
-                category = "Autres"
-                print(f"Erreur lors de la classification automatique: {e}")
-        
-        # Créer la transaction
-        db_transaction = Transaction(
-            user_id=current_user.id,
-            description=transaction_data.description,
-            amount=transaction_data.amount,
-            type=transaction_data.type,
-            category=category,
-            date=transaction_data.date
-        )
-        db.add(db_transaction)
-        created_transactions.append(db_transaction)
-    
-    # Commit toutes les transactions en une fois
-    db.commit()
-    
-    # Refresh toutes les transactions
-    for transaction in created_transactions:
-        db.refresh(transaction)
-    
-    return created_transactions
+    def create(commit=True):
+        transactions = build_transactions(db, current_user.id, transactions_data)
+        save_transactions(db, current_user.id, transactions, commit)
+        return transactions
+
+    # Réponse encodée par orjson (pas de validation Pydantic par transaction)
+    if idempotency_key is None:
+        return FastJSONResponse([transaction_to_dict(t) for t in create()])
+    return idempotency_store.execute(
+        db, current_user.id, idempotency_key,
+        request_fingerprint("transactions.bulk", transaction_create_list.dump_json(transactions_data)),
+        lambda: dumps([transaction_to_dict(t) for t in create(commit=False)])
+    )
 
 # ============================================================================
 # ENDPOINT 2: Création de Transaction (AMÉLIORÉ pour éviter doublons)
@@ -110,6 +227,7 @@ def create_bulk_transactions(
 @router.post("/transactions", response_model=TransactionResponse)
 def create_transaction(
     transaction_data: TransactionCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -117,125 +235,24 @@ def create_transaction(
     Créer une nouvelle transaction.
     
     ✅ AMÉLIORATION: 
-    - Si ticket_id fourni, crée seulement la transaction principale
+    - Si ticket_id fourni, associe seulement le ticket à la transaction principale
     - Ne crée PAS automatiquement les autres items (évite doublons)
     - L'utilisateur peut créer les autres manuellement depuis le frontend
+    - Transaction et tickets sont écrits ensemble (un seul commit)
+    - Avec Idempotency-Key, un retry renvoie la réponse de la première requête
     """
-    
-    # Classification automatique si la catégorie n'est pas fournie
-    category = transaction_data.category
-    if not category:
-        try:
-            # Utiliser le modèle pour classifier la description
-            predicted_category = pipeline.predict([transaction_data.description])
-            # predicted_category = model.predict(X)[0]
-            category = predicted_category
-        except Exception as e:
-            # En cas d'erreur de classification, utiliser une catégorie par défaut
-            category = "Autres"
-            print(f"Erreur lors de la classification automatique: {e}")
-    
-    # Créer la transaction principale
-    db_transaction = Transaction(
-        user_id=current_user.id,
-        description=transaction_data.description,
-        amount=transaction_data.amount,
-        type=transaction_data.type,
-        category=category,
-        date=transaction_data.date
-    )
-    db.add(db_transaction)
-    db.commit()
-    db.refresh(db_transaction)
-
-    # Traiter les tickets (attachments)
-    if transaction_data.tickets:
-        for ticket_data in transaction_data.tickets:
-            if ticket_data.ticket_id:
-                # ✅ Utiliser un ticket déjà traité avec OCR
-                existing_ticket = db.query(Ticket).filter(
-                    Ticket.id == ticket_data.ticket_id,
-                    Ticket.user_id == current_user.id,
-                    Ticket.transaction_id.is_(None)  # Ticket pas encore associé
-                ).first()
-                
-                if not existing_ticket:
-                    raise HTTPException(
-                        status_code=404, 
-                        detail=f"Ticket {ticket_data.ticket_id} non trouvé ou déjà utilisé"
-                    )
-                
-                # ✅ Mettre à jour le ticket pour l'associer à la transaction
-                existing_ticket.transaction_id = db_transaction.id
-                
-                # ✅ OPTION 1: Ne PAS créer automatiquement les autres items
-                # (Recommandé pour éviter les doublons)
-                # L'utilisateur créera les autres transactions manuellement depuis le frontend
-                
-                # ✅ OPTION 2: Créer automatiquement les autres items (si vous le souhaitez)
-                # Décommentez le code ci-dessous si vous voulez cette fonctionnalité
-                """
-                try:
-                    ticket_info = json.loads(existing_ticket.data)
-                    items = ticket_info.get("items", [])
-                    processed_items = ticket_info.get("processed_items", [])
-                    
-                    # Créer une transaction pour chaque item non traité
-                    for index, item in enumerate(items):
-                        if index not in processed_items:
-                            # Classifier automatiquement la catégorie
-                            X = vectorizer.transform([item["label"]])
-                            predicted_category = model.predict(X)[0]
-                            
-                            # Créer une transaction pour cet item
-                            auto_transaction = Transaction(
-                                user_id=current_user.id,
-                                description=item["label"],
-                                amount=item["amount"],
-                                type="expense",
-                                category=predicted_category,
-                                date=transaction_data.date
-                            )
-                            db.add(auto_transaction)
-                            db.commit()
-                            db.refresh(auto_transaction)
-                            
-                            # Marquer l'item comme traité
-                            processed_items.append(index)
-                            
-                            # Créer un lien avec le ticket original
-                            auto_ticket = Ticket(
-                                user_id=current_user.id,
-                                transaction_id=auto_transaction.id,
-                                type=existing_ticket.type,
-                                file_path=f"auto_from_ticket_{existing_ticket.id}",
-                                size=existing_ticket.size
-                            )
-                            db.add(auto_ticket)
-                    
-                    # Mettre à jour le ticket avec la liste des items traités
-                    ticket_info["processed_items"] = processed_items
-                    existing_ticket.data = json.dumps(ticket_info)
-                    
-                except (json.JSONDecodeError, KeyError) as e:
-                    print(f"Erreur lors du traitement des données du ticket: {e}")
-                """
-                
-                db.commit()
-                    
-            else:
-                # Créer un nouveau ticket (sans OCR)
-                db_ticket = Ticket(
-                    user_id=current_user.id,
-                    transaction_id=db_transaction.id,
-                    type=ticket_data.type,
-                    file_path=ticket_data.file_path,
-                    size=ticket_data.size
-                )
-                db.add(db_ticket)
-                db.commit()
+    def create(commit=True):
+        transactions = build_transactions(db, current_user.id, [transaction_data])
+        save_transactions(db, current_user.id, transactions, commit)
+        return transactions[0]
 
-    return db_transaction
+    if idempotency_key is None:
+        return create()
+    return idempotency_store.execute(
+        db, current_user.id, idempotency_key,
+        request_fingerprint("transactions.create", transaction_data.model_dump_json().encode()),
+        lambda: dumps(transaction_to_dict(create(commit=False)))
+    )
 
 
 @router.put("/transactions/{transaction_id}", response_model=TransactionResponse)
@@ -264,15 +281,24 @@ def update_transaction(
         if 'category' not in update_data or update_data.get('category') is None:
             try:
                 # Classifier automatiquement la nouvelle description
-                predicted_category = pipeline.predict([update_data['description']])
-                # predicted_category = model.predict(X)[0]
-                update_data['category'] = predicted_category
+                update_data['category'] = classify_descriptions(
+                    db, current_user.id, [update_data['description']], strict=True
+                )[0]
             except Exception as e:
-                print(f"Erreur lors de la reclassification automatique: {e}")
+                logger.warning("Erreur lors de la reclassification automatique: %s", e)
                 # Garder la catégorie existante si la classification échoue
     
+    previous = (transaction.type, transaction.category, transaction.date, transaction.amount)
     for field, value in update_data.items():
         setattr(transaction, field, value)
+    if {"amount", "type", "category", "date"} & update_data.keys():
+        # À réanalyser par le job des anomalies
+        transaction.anomaly_score = None
+        transaction.is_anomaly = False
+    on_transactions_written(db, current_user.id, "updated", [transaction], [
+        (-1, *previous),
+        (1, transaction.type, transaction.category, transaction.date, transaction.amount)
+    ])
 
     db.commit()
     db.refresh(transaction)
@@ -294,11 +320,21 @@ def delete_transaction(
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction non trouvée")
 
-    # Supprimer les tickets associés
-    db.query(Ticket).filter(Ticket.transaction_id == transaction_id).delete()
+    # Supprimer les tickets associés et leurs articles (explicitement: pas de
+    # cascade en base sans clés étrangères, SQLite sans PRAGMA ou table partitionnée)
+    ticket_ids = select(Ticket.id).where(Ticket.transaction_id == transaction_id)
+    db.query(TicketItem).filter(TicketItem.ticket_id.in_(ticket_ids)).delete(synchronize_session=False)
+    # Articles d'autres tickets transformés en cette transaction: lien simplement retiré
+    db.query(TicketItem).filter(TicketItem.transaction_id == transaction_id).update(
+        {"transaction_id": None}, synchronize_session=False
+    )
+    db.query(Ticket).filter(Ticket.transaction_id == transaction_id).delete(synchronize_session=False)
 
     # Supprimer la transaction
     db.delete(transaction)
+    on_transactions_written(db, current_user.id, "deleted", [transaction], [
+        (-1, transaction.type, transaction.category, transaction.date, transaction.amount)
+    ])
     db.commit()
 
     return {"message": "Transaction supprimée avec succès"}
@@ -322,11 +358,15 @@ def reclassify_transaction(
 
     try:
         # Classifier automatiquement la description actuelle
-        predicted_category = pipeline.predict([transaction.description])
-        # predicted_category = model.predict(X)[0]
+        predicted_category = classify_descriptions(db, current_user.id, [transaction.description], strict=True)[0]
         
         # Mettre à jour la catégorie
+        previous_category = transaction.category
         transaction.category = predicted_category
+        on_transactions_written(db, current_user.id, "updated", [transaction], [
+            (-1, transaction.type, previous_category, transaction.date, transaction.amount),
+            (1, transaction.type, predicted_category, transaction.date, transaction.amount)
+        ])
         db.commit()
         
         return {
@@ -340,6 +380,46 @@ def reclassify_transaction(
             detail=f"Erreur lors de la reclassification: {str(e)}"
         )
 
+# ============================================================================
+# Opérations groupées (une requête ensembliste, un seul commit)
+# ============================================================================
+
+@router.post("/transactions/recategorize", response_model=BulkOperationResponse)
+def recategorize_transactions(
+    request: TransactionRecategorize,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Changer la catégorie de toutes les transactions correspondant aux critères"""
+    if not has_criteria(request):
+        raise HTTPException(status_code=400, detail="Au moins un critère de sélection est requis")
+    affected = recategorize(db, current_user.id, request, request.new_category)
+    db.commit()
+    return {"affected_count": affected}
+
+@router.post("/transactions/reclassify", response_model=BulkOperationResponse)
+def reclassify_all_transactions(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Reclassifier toutes les transactions avec le modèle actuel (après une mise à jour du modèle)"""
+    affected = reclassify_all(db, current_user.id)
+    db.commit()
+    return {"affected_count": affected}
+
+@router.post("/transactions/bulk-delete", response_model=BulkOperationResponse)
+def delete_transactions(
+    filters: TransactionFilter,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Supprimer toutes les transactions correspondant aux critères (et leurs tickets)"""
+    if not has_criteria(filters):
+        raise HTTPException(status_code=400, detail="Au moins un critère de sélection est requis")
+    affected = delete_matching(db, current_user.id, filters)
+    db.commit()
+    return {"affected_count": affected}
+
 @router.post("/transactions/{transaction_id}/process_ticket/{ticket_id}")
 def process_ticket_with_ocr(
     transaction_id: int,
@@ -361,66 +441,51 @@ def process_ticket_with_ocr(
     # Récupérer le ticket
     ticket = db.query(Ticket).filter(
         Ticket.id == ticket_id,
-        Ticket.transaction_id == transaction_id
+        Ticket.transaction_id == transaction_id,
+        Ticket.user_id == current_user.id
     ).first()
     
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket non trouvé")
     
-    # Pour l'instant, on suppose que le file_path contient les données ou un chemin
-    # Dans un vrai système, il faudrait lire le fichier depuis le stockage
-    # Ici on simule avec un message d'erreur approprié
-    raise HTTPException(
-        status_code=501, 
-        detail="Traitement OCR pour tickets existants nécessite l'accès aux données du fichier. Utilisez le POST transaction avec les données du fichier."
-    )
-
-@router.post("/transactions/bulk", response_model=List[TransactionResponse])
-def create_bulk_transactions(
-    transactions_data: List[TransactionCreate],
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """
-    ✅ NOUVEAU: Créer plusieurs transactions en une seule requête.
-    
-    Utile quand le frontend envoie toutes les transactions détectées par OCR.
-    Plus efficace que de créer une par une.
-    """
-    created_transactions = []
-    
-    for transaction_data in transactions_data:
-        # Classification automatique si la catégorie n'est pas fournie
-        category = transaction_data.category
-        if not category:
-            try:
-                predicted_category = pipeline.predict([transaction_data.description])
-                # predicted_category = model.predict(X)[0]
-                category = predicted_category
-            except Exception as e:
-                category = "Autres"
-                print(f"Erreur lors de la classification automatique: {e}")
-        
-        # Créer la transaction
-        db_transaction = Transaction(
-            user_id=current_user.id,
-            description=transaction_data.description,
-            amount=transaction_data.amount,
-            type=transaction_data.type,
-            category=category,
-            date=transaction_data.date
+    # Relire l'image depuis le stockage
+    if not is_stored_file(ticket.file_path):
+        raise HTTPException(
+            status_code=404,
+            detail="Fichier du ticket introuvable sur le serveur"
         )
-        db.add(db_transaction)
-        created_transactions.append(db_transaction)
-    
-    # Commit toutes les transactions en une fois
+
+    if ticket.content_hash is None:
+        # Ticket ancien ou créé sans upload: le fichier doit avoir été envoyé
+        # par cet utilisateur (sinon ce serait lire le ticket d'un autre)
+        digest = file_digest(ticket.file_path)
+        uploaded = db.query(Ticket.id).filter(
+            Ticket.user_id == current_user.id,
+            Ticket.content_hash == digest
+        ).first()
+        if not uploaded:
+            raise HTTPException(status_code=403, detail="Fichier du ticket non envoyé par cet utilisateur")
+        ticket.content_hash = digest
+
+    try:
+        raw_text, items = run_ocr(db, ticket.content_hash, ticket.file_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors du traitement OCR: {str(e)}")
+
+    # Les articles déjà transformés en transaction sont conservés
+    ticket_info = json.loads(ticket.data) if ticket.data else {}
+    ticket_info.update({"raw_text": raw_text, "processed": True})
+    ticket.data = json.dumps(ticket_info)
+    replace_unprocessed_items(db, ticket, items)
+    on_commit(db, lambda: session_router.mark_write(current_user.id))
     db.commit()
-    
-    # Refresh toutes les transactions
-    for transaction in created_transactions:
-        db.refresh(transaction)
-    
-    return created_transactions
+
+    return {
+        "ticket_id": ticket.id,
+        "raw_text": raw_text,
+        "items": items,
+        "message": "Ticket retraité avec succès"
+    }
 
 
 # ============================================================================
@@ -446,30 +511,103 @@ def get_ticket_items(
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket non trouvé")
     
-    try:
-        ticket_info = json.loads(ticket.data)
-        items = ticket_info.get("items", [])
-        processed_items = ticket_info.get("processed_items", [])
-        
-        # Retourner les items avec leur statut (traité ou non)
-        items_with_status = []
-        for index, item in enumerate(items):
-            items_with_status.append({
-                **item,
-                "index": index,
-                "processed": index in processed_items
-            })
-        
-        return {
-            "ticket_id": ticket_id,
-            "items": items_with_status,
-            "total_items": len(items),
-            "processed_count": len(processed_items),
-            "remaining_count": len(items) - len(processed_items)
+    items = db.query(TicketItem).filter(
+        TicketItem.ticket_id == ticket_id
+    ).order_by(TicketItem.position).all()
+
+    # Retourner les items avec leur statut (traité ou non)
+    items_with_status = [
+        {
+            "id": item.id,
+            "label": item.label,
+            "amount": float(item.amount),
+            "index": item.position,
+            "processed": item.processed,
+            "transaction_id": item.transaction_id
         }
-    except (json.JSONDecodeError, KeyError) as e:
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Erreur lors de la lecture des données du ticket: {str(e)}"
-        )
+        for item in items
+    ]
+    processed_count = sum(1 for item in items if item.processed)
+
+    return {
+        "ticket_id": ticket_id,
+        "items": items_with_status,
+        "total_items": len(items),
+        "processed_count": processed_count,
+        "remaining_count": len(items) - processed_count
+    }
+
+
+@router.post("/tickets/{ticket_id}/items/processed")
+def mark_ticket_items_processed(
+    ticket_id: int,
+    update: TicketItemsProcessedUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Marquer des items d'un ticket comme traités (et les lier à une transaction).
+
+    Une seule requête UPDATE, quel que soit le nombre d'items.
+    """
+    ticket = db.query(Ticket.id).filter(
+        Ticket.id == ticket_id,
+        Ticket.user_id == current_user.id
+    ).first()
+
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket non trouvé")
+
+    if update.transaction_id is not None:
+        transaction = db.query(Transaction.id).filter(
+            Transaction.id == update.transaction_id,
+            Transaction.user_id == current_user.id
+        ).first()
+        if not transaction:
+            raise HTTPException(status_code=404, detail="Transaction non trouvée")
+
+    updated = db.query(TicketItem).filter(
+        TicketItem.ticket_id == ticket_id,
+        TicketItem.id.in_(update.item_ids)
+    ).update(
+        {"processed": update.processed, "transaction_id": update.transaction_id},
+        synchronize_session=False
+    )
+    # Lectures suivantes de l'utilisateur sur le primaire (réplica pas encore à jour)
+    on_commit(db, lambda: session_router.mark_write(current_user.id))
+    db.commit()
+
+    return {"ticket_id": ticket_id, "updated_count": updated}
+
+
+@router.post("/tickets/{ticket_id}/materialize", response_model=TicketMaterializeResponse)
+def materialize_ticket_items(
+    ticket_id: int,
+    request: Optional[TicketMaterializeRequest] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Créer une dépense par item non traité du ticket (tous, ou item_ids).
+
+    Classification en un seul appel au modèle, insertion groupée et items
+    marqués traités dans le même commit. Rejouer l'appel ne crée pas de
+    doublon: les transactions déjà créées sont renvoyées.
+    """
+    request = request or TicketMaterializeRequest()
+    # Verrou sur le ticket: les appels concurrents sont traités l'un après l'autre
+    ticket = db.query(Ticket).filter(
+        Ticket.id == ticket_id,
+        Ticket.user_id == current_user.id
+    ).with_for_update().first()
+
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket non trouvé")
+
+    try:
+        created_count, transactions = materialize_items(db, ticket, request.item_ids, request.date)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    db.commit()
 
+    return {"ticket_id": ticket_id, "created_count": created_count, "transactions": transactions}
@@ -8,6 +8,9 @@ from .endpoints.transactions.transactions import router as transactions
 from .endpoints.budgets.budgets import router as budgets
 from .endpoints.dashboard.dashboard import router as dashboard
 from .endpoints.category.category import router as category
+from .endpoints.notifications.notifications import router as notifications
+from .endpoints.recurring.recurring import router as recurring
+from .endpoints.category_rules.category_rules import router as category_rules
 
 api_router = APIRouter()
 
@@ -21,4 +24,7 @@ api_router.include_router(transactions, prefix="/api", tags=["Transactions"])
 api_router.include_router(budgets, prefix="/api", tags=["Budgets"])
 api_router.include_router(dashboard, prefix="/api", tags=["Dashboard"])
 api_router.include_router(category, prefix="/api", tags=["Categories"])
+api_router.include_router(notifications, prefix="/api", tags=["Notifications"])
+api_router.include_router(recurring, prefix="/api", tags=["Recurring"])
+api_router.include_router(category_rules, prefix="/api", tags=["Categories"])
 
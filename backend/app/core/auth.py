@@ -1,11 +1,16 @@
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import uuid
 import os
 from dotenv import load_dotenv
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from app.schemas.user import TokenData
+from app.core.metrics import register_gauge
 
 # Configuration JWT
 load_dotenv()  # Charge .env ou .env.local
@@ -14,7 +19,33 @@ SECRET_KEY = os.getenv("SECRET_KEY", "fallback-key")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Configuration du hachage des mots de passe
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+# Threads dédiés au hachage (séparés du threadpool partagé des endpoints)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Nombre maximal de hachages en cours ou en attente avant de refuser (503)
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "64"))
+
+# min_rounds = max_rounds = coût configuré: tout hash calculé avec un autre
+# coût (ancienne configuration, plus faible ou plus élevée) est recalculé à la connexion
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__max_rounds=PASSWORD_HASH_ROUNDS
+)
+
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_QUEUE_SIZE)
+# Hachages en cours ou en attente (exposé dans /metrics)
+_hash_pending = 0
+_hash_pending_lock = threading.Lock()
+register_gauge("password_hash_queue_depth", "Hachages de mots de passe en cours ou en attente",
+               lambda: _hash_pending)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Vérifie si le mot de passe en clair correspond au hash"""
@@ -24,6 +55,38 @@ def get_password_hash(password: str) -> str:
     """Hash un mot de passe"""
     return pwd_context.hash(password)
 
+async def _run_hashing(func, *args):
+    """Exécute un calcul de hash sur l'executor dédié (file d'attente bornée)"""
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serveur surchargé, réessayez dans quelques instants",
+            headers={"Retry-After": "1"},
+        )
+    global _hash_pending
+    with _hash_pending_lock:
+        _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        with _hash_pending_lock:
+            _hash_pending -= 1
+        _hash_slots.release()
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Vérifie le mot de passe hors du threadpool des requêtes.
+
+    Retourne (valide, nouveau_hash); nouveau_hash est fourni quand le hash
+    stocké utilise d'autres paramètres que la configuration actuelle.
+    """
+    return await _run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash un mot de passe hors du threadpool des requêtes"""
+    return await _run_hashing(pwd_context.hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Crée un token JWT"""
     to_encode = data.copy()
@@ -31,7 +94,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # jti: identifiant unique du token, utilisé pour la révocation (logout)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -42,9 +106,12 @@ def verify_token(token: str, credentials_exception):
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = TokenData(email=email)
+        exp = payload.get("exp")
+        token_data = TokenData(
+            email=email,
+            jti=payload.get("jti"),
+            expires_at=datetime.fromtimestamp(exp, tz=timezone.utc) if exp else None
+        )
         return token_data
     except JWTError:
         raise credentials_exception
-
-print("every thing's fine")
\ No newline at end of file
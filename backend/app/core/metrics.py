@@ -0,0 +1,301 @@
+"""
+Métriques de performance au format texte Prometheus, sans dépendance externe.
+
+- MetricsMiddleware: latence et nombre de requêtes par route, nombre et
+  durée des requêtes SQL de chaque requête HTTP, journal des requêtes lentes
+- install_query_hooks: comptage des requêtes SQL via les événements SQLAlchemy
+- Histogram.time(): mesure d'un bloc (inférence du modèle, OCR...)
+- register_gauge: valeur lue au moment du scrape (files d'attente, pool...)
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from fastapi import Request
+from fastapi.responses import PlainTextResponse, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import bisect
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Au-delà de cette durée (secondes), la requête est journalisée avec le détail SQL
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "1.0"))
+# Si défini, /metrics exige "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = defaultdict(float)
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [compteurs par bucket (+Inf en dernier), somme]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def snapshot(self, *labels: str) -> Tuple[int, float]:
+        """(nombre d'observations, somme) pour ces labels"""
+        with self._lock:
+            entry = self._values.get(labels)
+            return (sum(entry[0]), entry[1]) if entry else (0, 0.0)
+
+    @contextmanager
+    def time(self, *labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = {labels: (list(counts), total) for labels, (counts, total) in self._values.items()}
+        lines = self.header()
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Jauge lue à la demande (callback appelé à chaque scrape)"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        try:
+            value = float(self.callback())
+        except Exception as e:
+            logger.warning("Jauge %s illisible: %s", self.name, e)
+            return []
+        return self.header() + [f"{self.name} {value}"]
+
+
+_registry: List[_Metric] = []
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def register_gauge(name: str, documentation: str, callback: Callable[[], float]) -> Gauge:
+    return _register(Gauge(name, documentation, callback))
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+http_requests_total = _register(Counter(
+    "http_requests_total", "Requêtes HTTP traitées", ("method", "route", "status")))
+http_request_duration_seconds = _register(Histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP", ("method", "route")))
+db_queries_per_request = _register(Histogram(
+    "db_queries_per_request", "Requêtes SQL par requête HTTP", ("route",), QUERY_COUNT_BUCKETS))
+db_time_per_request_seconds = _register(Histogram(
+    "db_time_per_request_seconds", "Temps SQL cumulé par requête HTTP", ("route",)))
+db_query_duration_seconds = _register(Histogram(
+    "db_query_duration_seconds", "Durée des requêtes SQL"))
+db_read_sessions_total = _register(Counter(
+    "db_read_sessions_total", "Sessions de lecture par cible (réplica ou primaire et raison)", ("target",)))
+classifications_total = _register(Counter(
+    "classifications_total", "Descriptions catégorisées, par source (règle ou modèle)", ("source",)))
+idempotent_requests_total = _register(Counter(
+    "idempotent_requests_total", "Requêtes avec Idempotency-Key, par issue (exécutée, rejouée, regroupée)", ("result",)))
+model_inference_seconds = _register(Histogram(
+    "model_inference_seconds", "Durée des prédictions du modèle de catégorisation"))
+ocr_duration_seconds = _register(Histogram(
+    "ocr_duration_seconds", "Durée de l'OCR d'un ticket", (), (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)))
+
+
+class RequestStats:
+    """Requêtes SQL exécutées pendant une requête HTTP"""
+
+    def __init__(self):
+        self.queries: List[Tuple[str, float]] = []
+
+    @property
+    def db_time(self) -> float:
+        return sum(duration for _, duration in self.queries)
+
+    def breakdown(self, top: int = 5) -> List[Tuple[str, int, float]]:
+        """(requête, nombre d'exécutions, durée totale), les plus coûteuses d'abord"""
+        grouped: Dict[str, list] = defaultdict(lambda: [0, 0.0])
+        for statement, duration in self.queries:
+            grouped[statement][0] += 1
+            grouped[statement][1] += duration
+        ranked = sorted(grouped.items(), key=lambda item: item[1][1], reverse=True)
+        return [(statement, count, total) for statement, (count, total) in ranked[:top]]
+
+
+# Contexte de la requête HTTP en cours (copié dans les threads du threadpool)
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+@contextmanager
+def track_queries():
+    """Collecte les requêtes SQL du bloc (requête HTTP, test, job)"""
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+def install_query_hooks(engine: Engine) -> None:
+    """Mesure chaque requête SQL exécutée par engine"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - context.query_started
+    db_query_duration_seconds.observe(duration)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries.append((" ".join(statement.split())[:300], duration))
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI (les réponses en streaming, comme les flux SSE, ne sont
+    pas mises en mémoire tampon). Le libellé de route est le chemin déclaré
+    ("/api/v1/api/transactions/{transaction_id}"), pas l'URL, pour garder un
+    nombre de séries borné. Les flux SSE sont exclus des latences.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        response = {"status": 500, "streaming": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                headers = dict(message.get("headers") or [])
+                response["streaming"] = headers.get(b"content-type", b"").startswith(b"text/event-stream")
+            await send(message)
+
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                self._record(scope, response, stats, time.perf_counter() - started)
+
+    @staticmethod
+    def _record(scope, response: dict, stats: RequestStats, duration: float) -> None:
+        route = getattr(scope.get("route"), "path", "unmatched")
+        method = scope["method"]
+        http_requests_total.inc(method, route, str(response["status"]))
+        if response["streaming"]:
+            return
+
+        http_request_duration_seconds.observe(duration, method, route)
+        db_queries_per_request.observe(len(stats.queries), route)
+        db_time_per_request_seconds.observe(stats.db_time, route)
+
+        if duration >= SLOW_REQUEST_SECONDS:
+            details = "".join(
+                f"\n    {count}x {total * 1000:.1f}ms {statement}"
+                for statement, count, total in stats.breakdown()
+            )
+            logger.warning(
+                "Requête lente: %s %s -> %s en %.0fms (%d requêtes SQL, %.0fms SQL)%s",
+                method, scope["path"], response["status"], duration * 1000,
+                len(stats.queries), stats.db_time * 1000, details
+            )
+
+
+def metrics_endpoint(request: Request) -> Response:
+    """Métriques au format texte Prometheus"""
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        return PlainTextResponse("Non autorisé", status_code=401)
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
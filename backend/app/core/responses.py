@@ -0,0 +1,24 @@
+"""
+Réponses JSON rapides (orjson) pour les listes volumineuses.
+
+Les endpoints de liste construisent des dictionnaires à partir de lignes
+SQL et les encodent directement, sans validation Pydantic par objet. Le
+format produit est celui des modèles de réponse (dates ISO 8601, "Z" pour
+UTC), qui restent déclarés (response_model) pour la documentation OpenAPI.
+"""
+from typing import Any
+from fastapi import Response
+import orjson
+
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=_OPTIONS)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
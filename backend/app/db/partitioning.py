@@ -0,0 +1,153 @@
+"""
+Partitionnement mensuel de la table transactions (PostgreSQL uniquement).
+
+La table reste déclarée normalement dans le modèle: create_all crée une
+table simple (SQLite, nouvelles installations). La conversion en table
+partitionnée par plage de dates (PARTITION BY RANGE (date)) est une
+opération de maintenance explicite:
+
+    python -m app.jobs.partitions convert
+
+Conséquences du partitionnement:
+  - la clé primaire devient (id, date) (la colonne de partitionnement doit
+    en faire partie); id reste unique via sa séquence
+  - les clés étrangères tickets.transaction_id et ticket_items.transaction_id
+    sont supprimées (une référence vers une table partitionnée exige une
+    contrainte unique sur id seul); les suppressions passent par l'ORM
+    (cascade Transaction.tickets) ou par l'archivage, qui détache les tickets
+  - les requêtes filtrées sur la date (dashboard, prévisions, anomalies)
+    ne lisent que les partitions des mois concernés
+"""
+from datetime import date
+from typing import List, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from app.models.transaction import Transaction
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+TABLE = "transactions"
+DEFAULT_PARTITION = f"{TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{TABLE}_p(\d{{4}})_(\d{{2}})$")
+
+
+def month_start(day: date, offset: int = 0) -> date:
+    """Premier jour du mois de `day`, décalé de `offset` mois"""
+    index = day.year * 12 + day.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month.year:04d}_{month.month:02d}"
+
+
+def partition_month(name: str):
+    """Mois couvert par une partition mensuelle (None pour les autres tables)"""
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def is_partitioned(connection: Connection) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(connection.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"
+    ), {"table": TABLE}).scalar())
+
+
+def list_partitions(connection: Connection) -> List[Tuple[str, date]]:
+    """Partitions mensuelles existantes (nom, mois), de la plus ancienne à la plus récente"""
+    names = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    ), {"table": TABLE}).scalars().all()
+    partitions = [(name, partition_month(name)) for name in names]
+    return sorted((p for p in partitions if p[1] is not None), key=lambda p: p[1])
+
+
+def create_partition(connection: Connection, month: date) -> bool:
+    """
+    Crée la partition du mois si elle n'existe pas.
+
+    Les lignes de ce mois déjà présentes dans la partition par défaut y sont
+    déplacées avant l'attachement (sinon PostgreSQL refuse la partition).
+
+    Returns:
+        True si la partition a été créée
+    """
+    name = partition_name(month)
+    if connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+        return False
+    bounds = {"start": month, "end": month_start(month, 1)}
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    connection.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), bounds)
+    connection.execute(text(
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+    ))
+    logger.info("Partition %s créée", name)
+    return True
+
+
+def ensure_partitions(engine: Engine, months_ahead: int = 3, today: date = None) -> int:
+    """Crée les partitions du mois en cours et des `months_ahead` mois suivants"""
+    today = today or date.today()
+    created = 0
+    with engine.begin() as connection:
+        if not is_partitioned(connection):
+            return 0
+        for offset in range(months_ahead + 1):
+            created += create_partition(connection, month_start(today, offset))
+    return created
+
+
+def convert_to_partitioned(engine: Engine, months_ahead: int = 3, today: date = None) -> bool:
+    """
+    Remplace la table transactions par une table partitionnée par mois, en
+    une seule transaction (les écritures sont bloquées pendant la copie:
+    à lancer pendant une fenêtre de maintenance).
+
+    Returns:
+        False si la table est déjà partitionnée ou si la base n'est pas PostgreSQL
+    """
+    today = today or date.today()
+    with engine.begin() as connection:
+        if connection.dialect.name != "postgresql":
+            logger.warning("Partitionnement ignoré: base %s", connection.dialect.name)
+            return False
+        if is_partitioned(connection):
+            return False
+
+        old = f"{TABLE}_unpartitioned"
+        connection.execute(text(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE"))
+        oldest = connection.execute(text(f"SELECT min(date) FROM {TABLE}")).scalar() or today
+        connection.execute(text(f"ALTER TABLE {TABLE} RENAME TO {old}"))
+        # Le nom de l'index de clé primaire est global au schéma
+        connection.execute(text(f"ALTER TABLE {old} RENAME CONSTRAINT {TABLE}_pkey TO {old}_pkey"))
+        connection.execute(text(
+            f"CREATE TABLE {TABLE} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE (date)"
+        ))
+        connection.execute(text(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, date)"))
+        connection.execute(text(f"ALTER TABLE {TABLE} ADD FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE"))
+        connection.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+
+        month, last = month_start(oldest), month_start(today, months_ahead)
+        while month <= last:
+            create_partition(connection, month)
+            month = month_start(month, 1)
+
+        connection.execute(text(f"INSERT INTO {TABLE} SELECT * FROM {old}"))
+        connection.execute(text(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id"))
+        # Supprime aussi les clés étrangères tickets/ticket_items vers l'ancienne table
+        connection.execute(text(f"DROP TABLE {old} CASCADE"))
+        # Index du modèle, créés sur la table mère et propagés aux partitions
+        for index in Transaction.__table__.indexes:
+            index.create(connection)
+    logger.info("Table %s partitionnée par mois depuis %s", TABLE, oldest)
+    return True
@@ -0,0 +1,88 @@
+"""
+Routage des lectures vers un réplica (REPLICA_DATABASE_URL).
+
+Les endpoints en lecture seule (liste des transactions, dashboard, statut
+des budgets, séries temporelles) lisent sur le réplica via la dépendance
+get_read_db. Ils lisent sur le primaire:
+  - quand aucun réplica n'est configuré
+  - pendant READ_YOUR_WRITES_SECONDS après une écriture de l'utilisateur
+    (le réplica peut ne pas l'avoir encore rejouée)
+  - quand le réplica est injoignable (nouvel essai après REPLICA_RETRY_SECONDS)
+
+Les écritures récentes sont mémorisées par processus: avec plusieurs
+workers, la cohérence lecture-après-écriture suppose des sessions
+collantes (ou un délai de réplication inférieur à la fenêtre).
+"""
+from typing import Callable, Dict, Optional
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.metrics import db_read_sessions_total
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+# Durée pendant laquelle un utilisateur relit ses propres écritures sur le primaire
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+# Délai avant de retenter un réplica injoignable
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+
+class SessionRouter:
+    def __init__(self, replica_factory: Optional[Callable[[], Session]] = None,
+                 window: float = READ_YOUR_WRITES_SECONDS, retry: float = REPLICA_RETRY_SECONDS):
+        self.replica_factory = replica_factory
+        self.window = window
+        self.retry = retry
+        self._writes: Dict[int, float] = {}
+        self._replica_down_until = 0.0
+        self._lock = threading.Lock()
+
+    def mark_write(self, user_id: int) -> None:
+        """À appeler après le commit d'une écriture de l'utilisateur"""
+        now = time.monotonic()
+        with self._lock:
+            self._writes[user_id] = now
+            if len(self._writes) > 10000:
+                # Purge des entrées expirées (borne la mémoire)
+                self._writes = {uid: t for uid, t in self._writes.items() if now - t < self.window}
+
+    def recently_wrote(self, user_id: int) -> bool:
+        with self._lock:
+            written = self._writes.get(user_id)
+        return written is not None and time.monotonic() - written < self.window
+
+    def replica_session(self, user_id: int) -> Optional[Session]:
+        """Session sur le réplica, ou None si la lecture doit se faire sur le primaire"""
+        if self.replica_factory is None:
+            return None
+        if self.recently_wrote(user_id):
+            db_read_sessions_total.inc("primary_recent_write")
+            return None
+        if time.monotonic() < self._replica_down_until:
+            db_read_sessions_total.inc("primary_replica_down")
+            return None
+
+        session = self.replica_factory()
+        try:
+            # Réserve une connexion tout de suite: l'échec bascule sur le primaire
+            session.connection()
+        except DBAPIError as e:
+            session.close()
+            self._replica_down_until = time.monotonic() + self.retry
+            logger.warning("Réplica injoignable, lectures sur le primaire pendant %.0fs: %s", self.retry, e)
+            db_read_sessions_total.inc("primary_replica_down")
+            return None
+        db_read_sessions_total.inc("replica")
+        return session
+
+
+replica_engine = create_engine(REPLICA_DATABASE_URL, pool_pre_ping=True) if REPLICA_DATABASE_URL else None
+
+session_router = SessionRouter(
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) if replica_engine else None
+)
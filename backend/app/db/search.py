@@ -0,0 +1,122 @@
+"""
+Index de recherche sur les descriptions des transactions.
+
+Créés au démarrage (idempotent) selon la base:
+  - PostgreSQL: index GIN trigrammes (pg_trgm) sur la description en
+    minuscules et sans accents (unaccent), combiné à user_id (btree_gin):
+    sous-chaînes, préfixes et fautes de frappe, classement par similarité
+  - SQLite: table FTS5 (contenu externe, synchronisée par triggers), accents
+    ignorés (remove_diacritics), recherche par préfixe de mots; pas de
+    tolérance aux fautes de frappe
+  - sinon (extensions non autorisées, FTS5 absent): LIKE sans index
+
+Le mode retenu pour chaque moteur est mémorisé (search_backend).
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+import logging
+import weakref
+
+logger = logging.getLogger(__name__)
+
+TRIGRAM = "trigram"
+FTS5 = "fts5"
+LIKE = "like"
+
+FTS_TABLE = "transactions_fts"
+
+# Mode de recherche par moteur (réplica inclus: il hérite des index du primaire)
+_backends: "weakref.WeakKeyDictionary[Engine, str]" = weakref.WeakKeyDictionary()
+
+_POSTGRESQL_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS btree_gin",
+    # unaccent() n'est pas IMMUTABLE (dictionnaire configurable): enveloppe
+    # à dictionnaire fixe, utilisable dans un index
+    """
+    CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_transactions_description_trgm
+    ON transactions USING gin (user_id, f_unaccent(lower(description)) gin_trgm_ops)
+    """,
+]
+
+_SQLITE_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        description,
+        content='transactions', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF description ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    # Indexation des transactions existantes
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def _install_postgresql(engine: Engine) -> str:
+    try:
+        with engine.begin() as connection:
+            for statement in _POSTGRESQL_DDL:
+                connection.execute(text(statement))
+    except DBAPIError as e:
+        logger.warning("Index trigrammes indisponible (extensions pg_trgm/unaccent/btree_gin), recherche par LIKE: %s", e)
+        return LIKE
+    return TRIGRAM
+
+
+def _install_sqlite(engine: Engine) -> str:
+    try:
+        with engine.begin() as connection:
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE}
+            ).scalar()
+            if not exists:
+                for statement in _SQLITE_DDL:
+                    connection.execute(text(statement))
+    except DBAPIError as e:
+        logger.warning("FTS5 indisponible, recherche par LIKE: %s", e)
+        return LIKE
+    return FTS5
+
+
+def install_search(engine: Engine) -> str:
+    """Crée les index de recherche si besoin; retourne le mode retenu"""
+    if engine.dialect.name == "postgresql":
+        backend = _install_postgresql(engine)
+    elif engine.dialect.name == "sqlite":
+        backend = _install_sqlite(engine)
+    else:
+        backend = LIKE
+    _backends[engine] = backend
+    return backend
+
+
+def use_search_backend(engine: Engine, backend: str) -> None:
+    """Mode de recherche d'un moteur dont les index sont gérés ailleurs (réplica)"""
+    _backends[engine] = backend
+
+
+def search_backend(engine: Engine) -> str:
+    return _backends.get(engine, LIKE)
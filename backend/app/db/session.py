@@ -19,7 +19,10 @@ SessionLocal = sessionmaker(
 )
 
 def get_db():
-    db = SessionLocal()
+    # Session courte d'une requête HTTP: les objets restent lisibles après le
+    # commit sans relecture ligne par ligne (valeurs générées par la base
+    # relues à l'écriture via eager_defaults)
+    db = SessionLocal(expire_on_commit=False)
     try:
         yield db
     finally:
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.user import User
 from app.core.auth import verify_token
+from app.services.token_revocation import revocation_cache
 from app.schemas.user import TokenData
 
 security = HTTPBearer()
@@ -20,6 +21,9 @@ def get_current_user(
     )
     token = credentials.credentials
     token_data = verify_token(token, credentials_exception)
+    # Token révoqué par /auth/logout (vérification en mémoire)
+    if token_data.jti and revocation_cache.is_revoked(db, token_data.jti):
+        raise credentials_exception
     user = db.query(User).filter(User.email == token_data.email).first()
     if user is None:
         raise credentials_exception
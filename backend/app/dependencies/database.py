@@ -0,0 +1,24 @@
+from fastapi import Depends
+from sqlalchemy.orm import Session
+from app.db.routing import session_router
+from app.db.session import get_db
+from app.dependencies.auth import get_current_user
+from app.models.user import User
+
+
+def get_read_db(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Session de lecture: le réplica si possible, sinon la session primaire de
+    la requête (déjà utilisée par l'authentification)
+    """
+    replica = session_router.replica_session(current_user.id)
+    if replica is None:
+        yield db
+        return
+    try:
+        yield replica
+    finally:
+        replica.close()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Job de détection des dépenses inhabituelles, à lancer chaque nuit (cron):
+
+    python -m app.jobs.anomalies
+
+Seules les dépenses pas encore notées sont traitées (index partiel
+ix_transactions_unscored): le coût d'une exécution dépend du volume de
+nouvelles transactions, pas de l'historique total. Une dépense modifiée
+(montant, catégorie, date) redevient à noter.
+"""
+from app.db.session import SessionLocal
+from app.models.user import User  # noqa: F401 (résolution des relations)
+from app.services.anomalies import score_pending
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Nombre de dépenses notées par transaction
+TRANSACTIONS_PER_BATCH = int(os.getenv("ANOMALY_TRANSACTIONS_PER_BATCH", "20000"))
+
+
+def run(batch_size: int = TRANSACTIONS_PER_BATCH) -> int:
+    started = time.perf_counter()
+    scored = 0
+    db = SessionLocal()
+    try:
+        while True:
+            count = score_pending(db, batch_size)
+            db.commit()
+            if not count:
+                break
+            scored += count
+    finally:
+        db.close()
+    logger.info("Anomalies: %d dépenses notées en %.1fs", scored, time.perf_counter() - started)
+    return scored
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    run()
+
+
+if __name__ == "__main__":
+    main()
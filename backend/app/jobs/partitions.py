@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Maintenance des partitions mensuelles et archivage des transactions:
+
+    python -m app.jobs.partitions convert     # une fois, fenêtre de maintenance
+    python -m app.jobs.partitions             # chaque jour (cron): partitions futures + archivage
+    python -m app.jobs.partitions maintain
+    python -m app.jobs.partitions archive --horizon 24
+
+La création des partitions à venir évite que les nouvelles transactions
+tombent dans la partition par défaut. L'archivage (Parquet, voir
+app.services.archive) fonctionne aussi sans partitionnement (SQLite).
+"""
+from datetime import date
+from app.db.session import engine
+from app.db.partitioning import convert_to_partitioned, ensure_partitions
+from app.db.search import install_search
+from app.models.user import User  # noqa: F401 (résolution des relations)
+from app.services.archive import ARCHIVE_HORIZON_MONTHS, archive_older_than
+import argparse
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Nombre de partitions mensuelles créées à l'avance
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+
+def run_maintenance(today: date = None) -> int:
+    created = ensure_partitions(engine, PARTITION_MONTHS_AHEAD, today)
+    logger.info("Partitions: %d créées", created)
+    return created
+
+
+def run_archive(horizon_months: int = ARCHIVE_HORIZON_MONTHS, today: date = None) -> int:
+    started = time.perf_counter()
+    archived = archive_older_than(engine, horizon_months, today)
+    total = sum(archived.values())
+    logger.info("Archivage: %d transactions sur %d mois en %.1fs",
+                total, len(archived), time.perf_counter() - started)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitions mensuelles et archivage des transactions")
+    parser.add_argument("step", nargs="?", choices=["all", "convert", "maintain", "archive"], default="all")
+    parser.add_argument("--horizon", type=int, default=ARCHIVE_HORIZON_MONTHS,
+                        help="Mois conservés en base (hors mois en cours)")
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="Date du jour (AAAA-MM-JJ)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.step == "convert":
+        convert_to_partitioned(engine, PARTITION_MONTHS_AHEAD, args.date)
+        # Index de recherche supprimé avec l'ancienne table
+        install_search(engine)
+        return
+    if args.step in ("all", "maintain"):
+        run_maintenance(args.date)
+    if args.step in ("all", "archive"):
+        run_archive(args.horizon, args.date)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Job des opérations récurrentes, à lancer périodiquement (cron, tous les jours):
+
+    python -m app.jobs.recurring            # détection puis matérialisation
+    python -m app.jobs.recurring detect
+    python -m app.jobs.recurring materialize
+
+La détection parcourt les utilisateurs par tranches d'identifiants (une
+requête et une passe vectorisée par tranche, un commit par tranche), ce qui
+borne la mémoire quel que soit le volume total de transactions.
+"""
+from datetime import date
+from typing import Optional
+from sqlalchemy import select
+from app.db.session import SessionLocal
+from app.models.user import User  # noqa: F401 (résolution des relations)
+from app.models.transaction import Transaction
+from app.services.recurring import detect_for_users, materialize_due
+import argparse
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Nombre d'utilisateurs analysés par requête
+USERS_PER_BATCH = int(os.getenv("RECURRING_USERS_PER_BATCH", "2000"))
+# Nombre de séries matérialisées par transaction
+SERIES_PER_BATCH = 1000
+
+
+def run_detection(today: Optional[date] = None, users_per_batch: int = USERS_PER_BATCH) -> int:
+    started = time.perf_counter()
+    saved = 0
+    db = SessionLocal()
+    try:
+        user_ids = db.execute(
+            select(Transaction.user_id).distinct().order_by(Transaction.user_id)
+        ).scalars().all()
+        for start in range(0, len(user_ids), users_per_batch):
+            batch = user_ids[start:start + users_per_batch]
+            saved += detect_for_users(db, batch[0], batch[-1], today)
+            db.commit()
+    finally:
+        db.close()
+    logger.info("Détection: %d séries enregistrées pour %d utilisateurs en %.1fs",
+                saved, len(user_ids), time.perf_counter() - started)
+    return saved
+
+
+def run_materialization(today: Optional[date] = None) -> int:
+    started = time.perf_counter()
+    processed = 0
+    db = SessionLocal()
+    try:
+        while True:
+            count = materialize_due(db, today, SERIES_PER_BATCH)
+            db.commit()
+            if not count:
+                break
+            processed += count
+    finally:
+        db.close()
+    logger.info("Matérialisation: %d séries échues traitées en %.1fs",
+                processed, time.perf_counter() - started)
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Détection et création des opérations récurrentes")
+    parser.add_argument("step", nargs="?", choices=["all", "detect", "materialize"], default="all")
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="Date du jour (AAAA-MM-JJ)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.step in ("all", "detect"):
+        run_detection(args.date)
+    if args.step in ("all", "materialize"):
+        run_materialization(args.date)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,34 @@
 import logging
+
+# Avant les imports de l'application: le chargement du modèle est journalisé
+logging.basicConfig(level=logging.INFO)
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.router import api_router
 from app.db.base import Base
-from app.models.user import User, Ticket, Budget
-from app.models.transaction import Transaction
+from app.models.user import (
+    User,
+    Ticket,
+    TicketItem,
+    Budget,
+    OcrResult,
+    RevokedToken,
+    SpendingCounter,
+    Notification,
+    IdempotencyKey
+)
+from app.models.transaction import Transaction, RecurringTransaction, CategoryRule
 from app.db.session import engine
+from app.db.routing import replica_engine
+from app.db.search import install_search, use_search_backend
+from app.core.metrics import MetricsMiddleware, install_query_hooks, metrics_endpoint, register_gauge
 
 Base.metadata.create_all(bind=engine)
-
-logging.basicConfig(level=logging.INFO)
+# Index de recherche des descriptions (trigrammes PostgreSQL, FTS5 SQLite)
+search_mode = install_search(engine)
+if replica_engine is not None:
+    use_search_backend(replica_engine, search_mode)
 
 app = FastAPI(title="Expense Classifier API")
 
@@ -20,7 +39,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination par curseur et réponses rejouées (Idempotency-Key)
+    expose_headers=["X-Next-Cursor", "Idempotent-Replayed"],
 )
 
+# Mesures de performance (ajouté en dernier: englobe tous les middlewares)
+install_query_hooks(engine)
+if replica_engine is not None:
+    install_query_hooks(replica_engine)
+app.add_middleware(MetricsMiddleware)
+if hasattr(engine.pool, "checkedout"):  # QueuePool (pas les pools SQLite en mémoire)
+    register_gauge("db_pool_connections_in_use", "Connexions du pool SQLAlchemy utilisées", engine.pool.checkedout)
+
 app.include_router(api_router, prefix="/api/v1")
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
 
@@ -7,9 +7,13 @@ from sqlalchemy import (
     DateTime,
     DECIMAL,
     ForeignKey,
-    Enum
+    Enum,
+    Boolean,
+    Float,
+    Index,
+    UniqueConstraint
 )
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, false
 from sqlalchemy.orm import relationship
 
 
@@ -36,7 +40,84 @@ class Transaction(Base):
         server_default=func.now(),
         onupdate=func.now()
     )
+    # Analyse des dépenses inhabituelles (job app.jobs.anomalies)
+    anomaly_score = Column(Float, nullable=True)  # NULL: dépense pas encore analysée
+    is_anomaly = Column(Boolean, nullable=False, default=False, server_default=false())
+
+    # created_at / updated_at relus par RETURNING à l'INSERT ou l'UPDATE (pas de refresh)
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Requêtes par utilisateur sur une période (dashboard, prévisions, séries)
+        Index("ix_transactions_user_date", "user_id", "date"),
+        # Dépenses en attente d'analyse: le job ne lit que les nouvelles lignes
+        Index(
+            "ix_transactions_unscored", "id",
+            postgresql_where=(anomaly_score.is_(None)) & (type == "expense"),
+            sqlite_where=(anomaly_score.is_(None)) & (type == "expense")
+        ),
+        Index(
+            "ix_transactions_anomalies", "user_id", "date",
+            postgresql_where=is_anomaly.is_(True),
+            sqlite_where=is_anomaly.is_(True)
+        ),
+    )
 
     # Relationship to tickets
     tickets = relationship("Ticket", backref="transaction", cascade="all, delete-orphan")
 
+
+
+# Opérations récurrentes (loyer, salaire, abonnements) détectées dans l'historique
+class RecurringTransaction(Base):
+    __tablename__ = "recurring_transactions"
+    __table_args__ = (
+        UniqueConstraint("user_id", "pattern", "type", name="uq_recurring_pattern"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    pattern = Column(String(255), nullable=False)  # Description normalisée
+    description = Column(String(255), nullable=False)
+    amount = Column(DECIMAL(10, 2), nullable=False)
+    type = Column(
+        Enum("income", "expense", name="transaction_type"),
+        nullable=False
+    )
+    category = Column(String(100), nullable=False)
+    period = Column(String(20), nullable=False)  # weekly, biweekly, monthly, quarterly, yearly
+    anchor_day = Column(Integer, nullable=True)  # Jour du mois des échéances mensuelles et plus
+    occurrences = Column(Integer, nullable=False)
+    last_date = Column(Date, nullable=False)
+    next_date = Column(Date, nullable=False, index=True)
+    active = Column(Boolean, nullable=False, default=True)  # Désactivable par l'utilisateur
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now()
+    )
+
+
+# Règles de catégorisation appliquées avant le modèle (mot-clé ou expression régulière)
+class CategoryRule(Base):
+    __tablename__ = "category_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # NULL: règle globale, appliquée à tous les utilisateurs après leurs propres règles
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)
+    pattern = Column(String(255), nullable=False)
+    is_regex = Column(Boolean, nullable=False, default=False, server_default=false())
+    category = Column(String(100), nullable=False)
+    priority = Column(Integer, nullable=False, default=0, server_default="0")  # La plus haute d'abord
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now()
+    )
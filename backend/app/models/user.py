@@ -6,9 +6,15 @@ from sqlalchemy import (
     DateTime,
     BIGINT,
     ForeignKey,
-    DECIMAL
+    DECIMAL,
+    Text,
+    Boolean,
+    Index,
+    Date,
+    UniqueConstraint
     )
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, false
+from sqlalchemy.orm import relationship
 
 
 # Table de stockage des differents utilisateurs
@@ -39,11 +45,51 @@ class Ticket(Base):
 
     id = Column(Integer, primary_key= True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Propriétaire du ticket
-    transaction_id = Column(Integer, ForeignKey("transactions.id"))
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), index=True)  # Tickets chargés avec la liste des transactions
     type = Column(String(100), nullable= False)
     file_path = Column(String((500)), nullable= False)
-    data = Column(String(5000), nullable=True)  # Données extraites OCR (JSON)
+    data = Column(Text, nullable=True)  # Texte brut OCR et nom du fichier (JSON)
     size = Column(BIGINT)
+    content_hash = Column(String(64), index=True)  # SHA-256 des octets de l'image
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
+
+    # created_at relu par RETURNING à l'INSERT (pas de refresh)
+    __mapper_args__ = {"eager_defaults": True}
+
+    # Articles extraits par OCR, dans l'ordre du ticket
+    items = relationship(
+        "TicketItem",
+        order_by="TicketItem.position",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+
+# Articles extraits d'un ticket par OCR
+class TicketItem(Base):
+    __tablename__ = "ticket_items"
+    __table_args__ = (
+        Index("ix_ticket_items_ticket_processed", "ticket_id", "processed"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)  # Ordre de l'article sur le ticket
+    label = Column(String(255), nullable=False)
+    amount = Column(DECIMAL(10, 2), nullable=False)
+    processed = Column(Boolean, nullable=False, default=False, server_default=false())
+    # Transaction créée à partir de cet article
+    transaction_id = Column(Integer, ForeignKey("transactions.id", ondelete="SET NULL"), index=True)
+
+# Cache des résultats OCR, adressé par le contenu de l'image
+class OcrResult(Base):
+    __tablename__ = "ocr_results"
+
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 des octets de l'image
+    perceptual_hash = Column(String(16), index=True)  # dHash 64 bits (hexadécimal)
+    data = Column(Text, nullable=False)  # {"raw_text": ..., "items": [...]} (JSON)
     created_at = Column(
         DateTime(timezone=True),
         server_default=func.now()
@@ -68,3 +114,61 @@ class Budget(Base):
         onupdate=func.now()
     )
 
+# Tokens révoqués (logout) jusqu'à leur expiration
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(64), primary_key=True)  # Identifiant unique du token JWT
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        index=True
+    )
+
+# Dépenses cumulées par (utilisateur, catégorie, mois), mises à jour à chaque écriture
+class SpendingCounter(Base):
+    __tablename__ = "spending_counters"
+    __table_args__ = (
+        UniqueConstraint("user_id", "category", "month", name="uq_spending_counters_user_category_month"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    category = Column(String(100), nullable=False)
+    month = Column(Date, nullable=False)  # Premier jour du mois
+    total = Column(DECIMAL(12, 2), nullable=False, default=0)
+
+# Alertes de budget (seuil de notification atteint ou budget dépassé)
+class Notification(Base):
+    __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_created", "user_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    budget_id = Column(Integer, ForeignKey("budgets.id", ondelete="SET NULL"))
+    category = Column(String(100), nullable=False)
+    month = Column(Date, nullable=False)
+    level = Column(String(20), nullable=False)  # "near_limit" ou "over_budget"
+    spent = Column(DECIMAL(12, 2), nullable=False)
+    monthly_limit = Column(DECIMAL(10, 2), nullable=False)
+    read = Column(Boolean, nullable=False, default=False, server_default=false())
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
+
+# Réponses des POST rejoués avec le même en-tête Idempotency-Key (retries mobiles)
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # SHA-256 de l'endpoint et du corps de la requête
+    status_code = Column(Integer, nullable=True)  # NULL: requête en cours d'exécution
+    response = Column(Text, nullable=True)  # Corps JSON de la réponse
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional
+from datetime import datetime
+from app.services.category_rules import validate_rule
+
+class CategoryRuleCreate(BaseModel):
+    pattern: str = Field(..., min_length=1, max_length=255)  # Mot-clé (ex. "SNCF") ou expression régulière
+    is_regex: bool = False
+    category: str = Field(..., min_length=1, max_length=100)
+    priority: int = 0  # La plus haute d'abord
+
+    @model_validator(mode="after")
+    def check_pattern(self):
+        validate_rule(self.pattern, self.is_regex)
+        return self
+
+class CategoryRuleUpdate(BaseModel):
+    pattern: Optional[str] = Field(None, min_length=1, max_length=255)
+    is_regex: Optional[bool] = None
+    category: Optional[str] = Field(None, min_length=1, max_length=100)
+    priority: Optional[int] = None
+
+class CategoryRuleResponse(BaseModel):
+    id: int
+    user_id: Optional[int]  # None: règle globale (lecture seule)
+    pattern: str
+    is_regex: bool
+    category: str
+    priority: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class CategoryRuleTest(BaseModel):
+    description: str = Field(..., min_length=1, max_length=255)
+
+class CategoryRuleTestResponse(BaseModel):
+    description: str
+    category: Optional[str]  # Catégorie donnée par les règles (None: le modèle décidera)
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date, datetime
+
+class NotificationResponse(BaseModel):
+    id: int
+    budget_id: Optional[int]
+    category: str
+    month: date
+    level: str  # "near_limit" ou "over_budget"
+    spent: float
+    monthly_limit: float
+    read: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date
+
+class RecurringTransactionResponse(BaseModel):
+    id: int
+    description: str
+    amount: float
+    type: str
+    category: str
+    period: str  # weekly, biweekly, monthly, quarterly, yearly
+    occurrences: int
+    last_date: date
+    next_date: date
+    active: bool
+
+    class Config:
+        from_attributes = True
+
+class RecurringTransactionUpdate(BaseModel):
+    active: Optional[bool] = None
+    amount: Optional[float] = None
+    category: Optional[str] = None
@@ -1,6 +1,18 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
-from datetime import datetime
+from datetime import date as date_type, datetime
+from app.services.storage_service import is_storage_path
+
+
+def check_client_file_path(file_path: Optional[str]) -> Optional[str]:
+    """
+    Les fichiers du stockage ne sont référencés que par les tickets créés à
+    l'upload (ticket_id): un chemin fourni par le client vers le stockage
+    pourrait désigner le ticket d'un autre utilisateur.
+    """
+    if file_path and is_storage_path(file_path):
+        raise ValueError("Chemin réservé aux tickets envoyés (utiliser ticket_id)")
+    return file_path
 
 class Ticket(BaseModel):
     type: str = Field(..., max_length=100)  # Type MIME
@@ -12,11 +24,15 @@ class TicketCreate(BaseModel):
     file_path: Optional[str] = Field(None, max_length=500)  # Lien vers le fichier
     size: Optional[int] = Field(None, ge=0)  # Taille en octets
 
+    _check_file_path = field_validator("file_path")(check_client_file_path)
+
 class TicketUpdate(BaseModel):
     type: Optional[str] = Field(None, max_length=100)
     file_path: Optional[str] = Field(None, max_length=500)
     size: Optional[int] = Field(None, ge=0)
 
+    _check_file_path = field_validator("file_path")(check_client_file_path)
+
 class TicketResponse(Ticket):
     id: int
     user_id: int  # Propriétaire du ticket
@@ -28,3 +44,11 @@ class TicketResponse(Ticket):
     class Config:
         from_attributes = True
 
+class TicketItemsProcessedUpdate(BaseModel):
+    item_ids: List[int] = Field(..., min_length=1)  # IDs des items (table ticket_items)
+    processed: bool = True
+    transaction_id: Optional[int] = None  # Transaction créée à partir de ces items
+
+class TicketMaterializeRequest(BaseModel):
+    item_ids: Optional[List[int]] = Field(None, min_length=1)  # Tous les items non traités si absent
+    date: Optional[date_type] = None  # Date du ticket (transaction associée) ou du jour si absente
@@ -25,15 +25,33 @@ class TransactionUpdate(BaseModel):
     category: Optional[str] = Field(None, max_length=100)
     date: Optional[date] = None
 
+class TransactionFilter(BaseModel):
+    """Sélection des transactions d'une opération groupée (critères combinés)"""
+    description: Optional[str] = Field(None, min_length=1, max_length=255)  # Contenu dans la description (casse ignorée)
+    category: Optional[str] = Field(None, max_length=100)
+    type: Optional[TransactionType] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None  # Inclus
+
+class TransactionRecategorize(TransactionFilter):
+    new_category: str = Field(..., min_length=1, max_length=100)
+
+class BulkOperationResponse(BaseModel):
+    affected_count: int
+
 class TransactionResponse(TransactionBase):
     id: int
     user_id: int
     created_at: datetime
     updated_at: datetime
+    is_anomaly: bool = False  # Dépense inhabituelle pour la catégorie
+    anomaly_score: Optional[float] = None
     tickets: List["TicketResponse"] = []
 
     class Config:
         from_attributes = True
 
-
-
+class TicketMaterializeResponse(BaseModel):
+    ticket_id: int
+    created_count: int  # Transactions créées par cet appel (0 si déjà fait)
+    transactions: List[TransactionResponse]  # Transactions des items demandés
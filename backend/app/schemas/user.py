@@ -31,4 +31,6 @@ class RegisterRequest(BaseModel):
 
 class TokenData(BaseModel):
     email: Optional[str] = None
+    jti: Optional[str] = None  # Identifiant du token (révocation)
+    expires_at: Optional[datetime] = None
 
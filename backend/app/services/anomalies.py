@@ -0,0 +1,154 @@
+# app/services/anomalies.py
+from datetime import timedelta
+from typing import Dict
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+from app.models.transaction import Transaction
+from app.utils.stats import group_median
+import numpy as np
+import os
+
+# Historique de référence d'une dépense (jours)
+ANOMALY_WINDOW_DAYS = int(os.getenv("ANOMALY_WINDOW_DAYS", "365"))
+# Score robuste (0.6745 * écart à la médiane / MAD) à partir duquel une dépense est inhabituelle
+ROBUST_THRESHOLD = float(os.getenv("ANOMALY_ROBUST_THRESHOLD", "3.5"))
+# Z-score par rapport aux dépenses précédentes de la fenêtre glissante
+ROLLING_THRESHOLD = float(os.getenv("ANOMALY_ROLLING_THRESHOLD", "3"))
+# Nombre minimal de dépenses antérieures dans la catégorie pour juger
+MIN_HISTORY = 5
+
+
+def score_expenses(history: Dict[str, np.ndarray], window_days: int = ANOMALY_WINDOW_DAYS) -> Dict[str, np.ndarray]:
+    """
+    Scores d'anomalie de dépenses, calculés par (utilisateur, catégorie).
+
+    - score robuste: écart à la médiane de la catégorie rapporté à la MAD
+      (insensible aux quelques valeurs extrêmes déjà présentes)
+    - z-score glissant: écart à la moyenne des dépenses des `window_days`
+      jours précédant chaque dépense, via des sommes cumulées et une
+      recherche dichotomique (pas de boucle par transaction)
+
+    Args:
+        history: tableaux alignés "user_id", "category" (codes entiers),
+            "day" (ordinal), "amount"
+    Returns:
+        {"score", "rolling_z", "previous"} alignés sur history
+    """
+    n = len(history["amount"])
+    if n == 0:
+        empty = np.empty(0)
+        return {"score": empty, "rolling_z": empty, "previous": np.empty(0, dtype=np.int64)}
+
+    pair_keys = history["user_id"].astype(np.int64) * (int(history["category"].max()) + 1) + history["category"]
+    _, groups = np.unique(pair_keys, return_inverse=True)
+    n_groups = int(groups.max()) + 1
+    days = history["day"].astype(np.int64)
+    amounts = history["amount"].astype(np.float64)
+
+    # Statistiques robustes par catégorie
+    median = group_median(amounts, groups, n_groups)
+    deviation = np.abs(amounts - median[groups])
+    mad = group_median(deviation, groups, n_groups)
+    # MAD nulle (montants identiques): écart absolu moyen, puis 1 % de la médiane
+    mean_deviation = np.bincount(groups, weights=deviation, minlength=n_groups) / np.bincount(groups, minlength=n_groups)
+    scale = np.where(mad > 0, mad / 0.6745, mean_deviation * 1.2533)
+    scale = np.maximum(scale, np.maximum(0.01 * np.abs(median), 0.01))
+    score = (amounts - median[groups]) / scale[groups]
+
+    # Fenêtre glissante: dépenses de la même catégorie dans [jour - fenêtre, jour[
+    order = np.lexsort((days, groups))
+    span = int(days.max() - days.min()) + window_days + 1
+    sorted_keys = groups[order] * span + (days[order] - days.min())
+    sorted_amounts = amounts[order]
+    sum1 = np.concatenate(([0.0], np.cumsum(sorted_amounts)))
+    sum2 = np.concatenate(([0.0], np.cumsum(sorted_amounts ** 2)))
+    start = np.searchsorted(sorted_keys, sorted_keys - window_days, side="left")
+    end = np.searchsorted(sorted_keys, sorted_keys, side="left")
+    previous_sorted = end - start
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = (sum1[end] - sum1[start]) / previous_sorted
+        variance = (sum2[end] - sum2[start]) / previous_sorted - mean ** 2
+        std = np.sqrt(np.maximum(variance, 0))
+        std = np.maximum(std, np.maximum(0.01 * np.abs(mean), 0.01))
+        rolling_sorted = np.where(previous_sorted > 0, (sorted_amounts - mean) / std, 0.0)
+
+    rolling_z = np.empty(n)
+    previous = np.empty(n, dtype=np.int64)
+    rolling_z[order] = rolling_sorted
+    previous[order] = previous_sorted
+    return {"score": score, "rolling_z": rolling_z, "previous": previous}
+
+
+def flag_anomalies(scores: Dict[str, np.ndarray]) -> np.ndarray:
+    """Dépense nettement supérieure à l'habitude selon les deux mesures"""
+    return (
+        (scores["previous"] >= MIN_HISTORY)
+        & (scores["score"] >= ROBUST_THRESHOLD)
+        & (scores["rolling_z"] >= ROLLING_THRESHOLD)
+    )
+
+
+def score_pending(db: Session, limit: int = 20000) -> int:
+    """
+    Analyse un lot de dépenses pas encore notées (anomaly_score NULL).
+
+    Seul l'historique des utilisateurs concernés, sur la fenêtre de
+    référence, est relu: le coût dépend des nouvelles transactions et non de
+    tout l'historique. Le commit est fait par l'appelant.
+
+    Returns:
+        Nombre de dépenses notées (0 quand il n'y a plus rien à faire)
+    """
+    pending = db.execute(
+        select(Transaction.id, Transaction.user_id, Transaction.date).where(
+            Transaction.anomaly_score.is_(None),
+            Transaction.type == "expense"
+        ).order_by(Transaction.id).limit(limit)
+    ).all()
+    if not pending:
+        return 0
+
+    pending_ids = np.fromiter((row.id for row in pending), dtype=np.int64, count=len(pending))
+    user_ids = sorted({row.user_id for row in pending})
+    since = min(row.date for row in pending) - timedelta(days=ANOMALY_WINDOW_DAYS)
+
+    rows = db.execute(
+        select(Transaction.id, Transaction.user_id, Transaction.category, Transaction.date, Transaction.amount).where(
+            Transaction.user_id.in_(user_ids),
+            Transaction.type == "expense",
+            Transaction.date >= since
+        )
+    ).all()
+    count = len(rows)
+    ids, users, categories, days, amounts = zip(*rows)
+    _, category_codes = np.unique(np.array(categories, dtype=object), return_inverse=True)
+    history = {
+        "user_id": np.fromiter(users, dtype=np.int64, count=count),
+        "category": category_codes.astype(np.int64),
+        "day": np.fromiter((d.toordinal() for d in days), dtype=np.int64, count=count),
+        "amount": np.asarray(amounts, dtype=np.float64),
+    }
+
+    scores = score_expenses(history)
+    flags = flag_anomalies(scores)
+    history_ids = np.fromiter(ids, dtype=np.int64, count=count)
+    targets = np.flatnonzero(np.isin(history_ids, pending_ids))
+
+    table = Transaction.__table__
+    db.execute(
+        update(table).where(table.c.id == bindparam("transaction_id")).values(
+            anomaly_score=bindparam("score"),
+            is_anomaly=bindparam("flag"),
+            # Une analyse n'est pas une modification par l'utilisateur
+            updated_at=table.c.updated_at
+        ),
+        [
+            {
+                "transaction_id": int(history_ids[i]),
+                "score": round(float(scores["score"][i]), 2),
+                "flag": bool(flags[i]),
+            }
+            for i in targets
+        ]
+    )
+    return len(pending)
@@ -0,0 +1,188 @@
+# app/services/archive.py
+"""
+Archivage des transactions anciennes dans des fichiers Parquet compressés.
+
+Un fichier par mois (ARCHIVE_DIR/transactions_YYYY_MM.parquet, zstd),
+trié par utilisateur puis date: la lecture d'un utilisateur ne décompresse
+que les groupes de lignes qui le contiennent (statistiques min/max).
+Les transactions archivées quittent la base (partition supprimée, ou lignes
+supprimées si la table n'est pas partitionnée) mais restent lisibles par
+read_archived et archived_monthly_totals (séries temporelles).
+"""
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, text, update
+from sqlalchemy.engine import Connection, Engine
+from app.db.partitioning import is_partitioned, list_partitions, month_start, partition_name
+from app.models.transaction import Transaction
+from app.models.user import Ticket, TicketItem
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join("storage", "archive"))
+# Les mois antérieurs à (mois en cours - ARCHIVE_HORIZON_MONTHS) sont archivés
+ARCHIVE_HORIZON_MONTHS = int(os.getenv("ARCHIVE_HORIZON_MONTHS", "24"))
+ROW_GROUP_SIZE = 100_000
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("pyarrow est requis pour l'archivage des transactions") from e
+    return pa, pq
+
+
+def _schema():
+    pa, _ = _pyarrow()
+    return pa.schema([
+        ("id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("description", pa.string()),
+        ("amount", pa.decimal128(10, 2)),
+        ("type", pa.string()),
+        ("category", pa.string()),
+        ("date", pa.date32()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("updated_at", pa.timestamp("us", tz="UTC")),
+        ("anomaly_score", pa.float64()),
+        ("is_anomaly", pa.bool_()),
+    ])
+
+
+def archive_path(month: date) -> str:
+    return os.path.join(ARCHIVE_DIR, f"transactions_{month.year:04d}_{month.month:02d}.parquet")
+
+
+def archived_months() -> List[date]:
+    months = []
+    if os.path.isdir(ARCHIVE_DIR):
+        for name in os.listdir(ARCHIVE_DIR):
+            if name.startswith("transactions_") and name.endswith(".parquet"):
+                year, month = name[len("transactions_"):-len(".parquet")].split("_")
+                months.append(date(int(year), int(month), 1))
+    return sorted(months)
+
+
+def _write_month(month: date, rows: List[dict]) -> None:
+    """Écrit (ou complète) le fichier du mois, remplacé atomiquement"""
+    pa, pq = _pyarrow()
+    path = archive_path(month)
+    table = pa.Table.from_pylist(rows, schema=_schema())
+    if os.path.exists(path):
+        # Transactions ajoutées a posteriori sur un mois déjà archivé
+        table = pa.concat_tables([pq.read_table(path), table])
+    table = table.sort_by([("user_id", "ascending"), ("date", "ascending"), ("id", "ascending")])
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    tmp_path = path + ".part"
+    pq.write_table(table, tmp_path, compression="zstd", row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp_path, path)
+
+
+def archive_month(connection: Connection, month: date, partitioned: bool) -> int:
+    """
+    Archive les transactions du mois puis les retire de la base (dans la
+    transaction de `connection`). Les tickets restent en base, détachés.
+
+    Returns:
+        Nombre de transactions archivées
+    """
+    start, end = month, month_start(month, 1)
+    table = Transaction.__table__
+    in_month = (table.c.date >= start) & (table.c.date < end)
+
+    rows = connection.execute(select(table).where(in_month)).mappings().all()
+    if rows:
+        _write_month(month, [
+            {**row, "type": str(getattr(row["type"], "value", row["type"]))}
+            for row in rows
+        ])
+        archived_ids = select(table.c.id).where(in_month)
+        for ticket_table in (Ticket.__table__, TicketItem.__table__):
+            connection.execute(
+                update(ticket_table)
+                .where(ticket_table.c.transaction_id.in_(archived_ids))
+                .values(transaction_id=None)
+            )
+
+    if partitioned:
+        name = partition_name(month)
+        connection.execute(text(f"ALTER TABLE {table.name} DETACH PARTITION {name}"))
+        connection.execute(text(f"DROP TABLE {name}"))
+    elif rows:
+        connection.execute(table.delete().where(in_month))
+    return len(rows)
+
+
+def archive_older_than(engine: Engine, horizon_months: int = ARCHIVE_HORIZON_MONTHS,
+                       today: Optional[date] = None) -> Dict[date, int]:
+    """
+    Archive tous les mois antérieurs à l'horizon, un mois par transaction.
+
+    Returns:
+        {mois: nombre de transactions archivées}
+    """
+    boundary = month_start(today or date.today(), -horizon_months)
+    with engine.connect() as connection:
+        partitioned = is_partitioned(connection)
+        if partitioned:
+            months = [month for _, month in list_partitions(connection) if month < boundary]
+        else:
+            oldest = connection.execute(
+                select(Transaction.date).where(Transaction.date < boundary).order_by(Transaction.date).limit(1)
+            ).scalar()
+            months = []
+            month = month_start(oldest) if oldest else boundary
+            while month < boundary:
+                months.append(month)
+                month = month_start(month, 1)
+
+    archived = {}
+    for month in months:
+        with engine.begin() as connection:
+            count = archive_month(connection, month, partitioned)
+        if count or partitioned:
+            archived[month] = count
+            logger.info("Archivage %s: %d transactions", month.strftime("%Y-%m"), count)
+    return archived
+
+
+def read_archived(user_id: int, start: date, end: date, columns: Optional[List[str]] = None):
+    """
+    Transactions archivées d'un utilisateur sur [start, end[ (table pyarrow,
+    convertible avec .to_pylist() ou .to_pandas()).
+    """
+    pa, pq = _pyarrow()
+    filters = [("user_id", "=", user_id), ("date", ">=", start), ("date", "<", end)]
+    tables = [
+        pq.read_table(archive_path(month), columns=columns, filters=filters)
+        for month in archived_months()
+        if start < month_start(month, 1) and month < end
+    ]
+    if not tables:
+        schema = _schema()
+        return schema.empty_table().select(columns) if columns else schema.empty_table()
+    return pa.concat_tables(tables)
+
+
+def archived_monthly_totals(user_id: int, start: date, end: date) -> Dict[Tuple[str, str], Tuple[float, int]]:
+    """(mois "YYYY-MM", type) -> (montant total, nombre de transactions) des archives"""
+    months = [month for month in archived_months() if start < month_start(month, 1) and month < end]
+    if not months:
+        return {}
+    _, pq = _pyarrow()
+    filters = [("user_id", "=", user_id), ("date", ">=", start), ("date", "<", end)]
+    totals = {}
+    for month in months:
+        table = pq.read_table(archive_path(month), columns=["type", "amount"], filters=filters)
+        if not table.num_rows:
+            continue
+        grouped = table.group_by("type").aggregate([("amount", "sum"), ("amount", "count")])
+        for type_, total, count in zip(*(grouped.column(name).to_pylist()
+                                         for name in ("type", "amount_sum", "amount_count"))):
+            totals[(month.strftime("%Y-%m"), type_)] = (float(total or 0), count)
+    return totals
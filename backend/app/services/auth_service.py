@@ -1,46 +1,77 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from app.models.user import User
 from app.schemas.user import UserCreate, LoginRequest
-from app.core.auth import get_password_hash, verify_password, create_access_token
+from app.core.auth import (
+    create_access_token,
+    get_password_hash_async,
+    verify_and_update_password_async
+)
 
 class AuthService:
     @staticmethod
-    def register_user(db: Session, user_data: UserCreate) -> User:
-        """Crée un nouvel utilisateur"""
-        # Vérifier si l'email existe déjà
-        db_user = db.query(User).filter(User.email == user_data.email).first()
+    async def register_user_async(db: Session, user_data: UserCreate) -> User:
+        """
+        Crée un nouvel utilisateur.
+
+        Le hash est calculé sur l'executor dédié: une rafale d'inscriptions
+        n'occupe pas le threadpool partagé par les endpoints synchrones.
+        """
+        db_user = await run_in_threadpool(
+            lambda: db.query(User).filter(User.email == user_data.email).first()
+        )
         if db_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email déjà enregistré"
             )
 
-        # Créer l'utilisateur
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
         db_user = User(
             email=user_data.email,
             hashed_password=hashed_password
         )
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+
+        def save():
+            db.add(db_user)
+            db.commit()
+            db.refresh(db_user)
+
+        await run_in_threadpool(save)
         return db_user
 
     @staticmethod
-    def authenticate_user(db: Session, login_data: LoginRequest) -> User:
-        """Authentifie un utilisateur"""
-        user = db.query(User).filter(User.email == login_data.email).first()
+    async def authenticate_user_async(db: Session, login_data: LoginRequest) -> User:
+        """
+        Authentifie un utilisateur (hash vérifié sur l'executor dédié).
+
+        Si le hash stocké utilise un coût différent de la configuration
+        actuelle (plus faible ou plus élevé), il est recalculé et enregistré
+        de façon transparente.
+        """
+        user = await run_in_threadpool(
+            lambda: db.query(User).filter(User.email == login_data.email).first()
+        )
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Email ou mot de passe incorrect"
             )
-        if not verify_password(login_data.password, user.hashed_password):
+        valid, new_hash = await verify_and_update_password_async(
+            login_data.password, user.hashed_password
+        )
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Email ou mot de passe incorrect"
             )
+        if new_hash:
+            def rehash():
+                user.hashed_password = new_hash
+                db.commit()
+
+            await run_in_threadpool(rehash)
         return user
 
     @staticmethod
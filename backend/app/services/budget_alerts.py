@@ -0,0 +1,183 @@
+# app/services/budget_alerts.py
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, Tuple
+from sqlalchemy import func, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.user import Budget, SpendingCounter, Notification
+from app.models.transaction import Transaction
+from app.services.event_bus import queue_event
+
+# (signe, type, catégorie, date, montant) d'une transaction ajoutée (+1) ou retirée (-1)
+SpendingChange = Tuple[int, str, str, date, object]
+
+counters = SpendingCounter.__table__
+
+# INSERT ... ON CONFLICT DO UPDATE selon la base
+_UPSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def month_end(month: date) -> date:
+    """Premier jour du mois suivant"""
+    if month.month == 12:
+        return date(month.year + 1, 1, 1)
+    return date(month.year, month.month + 1, 1)
+
+
+def spending_deltas(changes: Iterable[SpendingChange]) -> Dict[Tuple[str, date], Decimal]:
+    """Regroupe les variations de dépenses par (catégorie, mois)"""
+    deltas = defaultdict(Decimal)
+    for sign, transaction_type, category, day, amount in changes:
+        if transaction_type == "expense":
+            deltas[(category, month_start(day))] += sign * Decimal(str(amount))
+    return {key: delta for key, delta in deltas.items() if delta != 0}
+
+
+def record_spending(db: Session, user_id: int, changes: Iterable[SpendingChange]) -> None:
+    """
+    Met à jour les compteurs de dépenses touchés par une écriture et
+    émet les alertes de budget correspondantes.
+
+    Coût: une mise à jour atomique du compteur et une lecture du budget
+    par (catégorie, mois) modifié, indépendamment du nombre de budgets ou
+    de transactions. Le commit est fait par l'appelant; les événements
+    sont publiés après.
+    """
+    deltas = spending_deltas(changes)
+    if not deltas:
+        return
+    # Les transactions écrites doivent être visibles pour initialiser un compteur
+    db.flush()
+
+    for (category, month), delta in deltas.items():
+        total = _increment_counter(db, user_id, category, month, delta)
+        if total is None:
+            # Premier passage sur ce mois: initialiser depuis l'historique
+            total = _create_counter(db, user_id, category, month, delta)
+        total = Decimal(str(total))
+        _evaluate_budget(db, user_id, category, month, total - delta, total)
+
+
+def _increment_counter(db: Session, user_id: int, category: str, month: date, delta: Decimal):
+    """
+    total = total + delta côté base (deux écritures concurrentes ne perdent
+    pas de mise à jour); retourne le nouveau total, None sans compteur.
+    """
+    return db.execute(
+        update(counters).where(
+            counters.c.user_id == user_id,
+            counters.c.category == category,
+            counters.c.month == month
+        ).values(total=counters.c.total + delta).returning(counters.c.total)
+    ).scalar()
+
+
+def _create_counter(db: Session, user_id: int, category: str, month: date, delta: Decimal):
+    """
+    Crée le compteur du mois depuis l'historique (transactions écrites
+    comprises) et retourne son total. Si une écriture concurrente l'a créé
+    entre-temps, seul `delta` lui est ajouté: ses transactions à elle sont
+    déjà comptées dans son initialisation.
+    """
+    values = {
+        "user_id": user_id,
+        "category": category,
+        "month": month,
+        "total": _monthly_spending(db, user_id, category, month),
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect in _UPSERT:
+        statement = _UPSERT[dialect](counters).values(**values).on_conflict_do_update(
+            index_elements=[counters.c.user_id, counters.c.category, counters.c.month],
+            set_={"total": counters.c.total + delta}
+        ).returning(counters.c.total)
+        return db.execute(statement).scalar_one()
+
+    # Autres bases: insertion dans un savepoint, mise à jour si le compteur existe déjà
+    try:
+        with db.begin_nested():
+            db.execute(insert(counters).values(**values))
+        return values["total"]
+    except IntegrityError:
+        return _increment_counter(db, user_id, category, month, delta)
+
+
+def _monthly_spending(db: Session, user_id: int, category: str, month: date) -> Decimal:
+    total = db.query(func.sum(Transaction.amount)).filter(
+        Transaction.user_id == user_id,
+        Transaction.type == "expense",
+        Transaction.category == category,
+        Transaction.date >= month,
+        Transaction.date < month_end(month)
+    ).scalar()
+    return Decimal(total) if total is not None else Decimal("0")
+
+
+def _evaluate_budget(db: Session, user_id: int, category: str, month: date,
+                     previous: Decimal, total: Decimal) -> None:
+    """
+    Publie le nouveau statut du budget de la catégorie et crée une alerte
+    si la dépense franchit le seuil de notification ou la limite.
+    """
+    budget = db.query(Budget).filter(
+        Budget.user_id == user_id,
+        Budget.category == category
+    ).first()
+    if not budget:
+        return
+
+    limit = Decimal(budget.monthly_limit)
+    threshold_pct = Decimal(budget.notification_threshold)
+    threshold = limit * threshold_pct / 100
+    percentage_used = round(float(total / limit * 100), 2) if limit > 0 else 0
+
+    queue_event(db, user_id, "budget_status", {
+        "id": budget.id,
+        "category": category,
+        "month": month.strftime("%Y-%m"),
+        "monthly_limit": round(float(limit), 2),
+        "current_spending": round(float(total), 2),
+        "percentage_used": percentage_used,
+        "notification_threshold": float(threshold_pct),
+        "is_over_budget": total > limit,
+        "is_near_limit": percentage_used >= float(threshold_pct)
+    })
+
+    if total <= previous:
+        return
+    if previous <= limit < total:
+        level = "over_budget"
+    elif previous < threshold <= total:
+        level = "near_limit"
+    else:
+        return
+
+    notification = Notification(
+        user_id=user_id,
+        budget_id=budget.id,
+        category=category,
+        month=month,
+        level=level,
+        spent=total,
+        monthly_limit=limit
+    )
+    db.add(notification)
+    db.flush()
+
+    queue_event(db, user_id, "budget_alert", {
+        "id": notification.id,
+        "budget_id": budget.id,
+        "category": category,
+        "month": month.strftime("%Y-%m"),
+        "level": level,
+        "spent": round(float(total), 2),
+        "monthly_limit": round(float(limit), 2),
+        "percentage_used": percentage_used
+    })
@@ -0,0 +1,159 @@
+# app/services/bulk_edit.py
+"""
+Opérations groupées sur les transactions d'un utilisateur: une requête
+ensembliste (UPDATE / DELETE ... WHERE) au lieu d'une requête, d'un appel
+au modèle et d'un commit par transaction.
+
+Les compteurs de dépenses, les alertes et les caches du dashboard sont mis
+à jour une seule fois par opération (on_transactions_written). Le commit
+est fait par l'appelant.
+"""
+from typing import List, Optional
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+from app.models.transaction import Transaction
+from app.models.user import Ticket, TicketItem
+from app.schemas.transaction_schema import TransactionFilter
+from app.services.budget_alerts import SpendingChange
+from app.services.classification import classify_descriptions
+from app.services.event_bus import queue_event
+from app.services.transaction_events import on_transactions_written
+import os
+
+# Transactions relues et reclassées par lot
+RECLASSIFY_BATCH_SIZE = int(os.getenv("RECLASSIFY_BATCH_SIZE", "5000"))
+
+table = Transaction.__table__
+
+
+def has_criteria(filters: TransactionFilter) -> bool:
+    return any(
+        value is not None
+        for value in (filters.description, filters.category, filters.type, filters.date_from, filters.date_to)
+    )
+
+
+def filter_conditions(user_id: int, filters: TransactionFilter) -> list:
+    conditions = [table.c.user_id == user_id]
+    if filters.description:
+        escaped = filters.description.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        conditions.append(table.c.description.ilike(f"%{escaped}%", escape="\\"))
+    if filters.category is not None:
+        conditions.append(table.c.category == filters.category)
+    if filters.type is not None:
+        conditions.append(table.c.type == filters.type.value)
+    if filters.date_from is not None:
+        conditions.append(table.c.date >= filters.date_from)
+    if filters.date_to is not None:
+        conditions.append(table.c.date <= filters.date_to)
+    return conditions
+
+
+def _type(value) -> str:
+    return str(getattr(value, "value", value))
+
+
+def _publish(db: Session, user_id: int, action: str, count: int, changes: List[SpendingChange]) -> None:
+    on_transactions_written(db, user_id, action, [], changes)
+    # Pas d'événement par transaction: les clients rechargent leur liste
+    queue_event(db, user_id, f"transactions_bulk_{action}", {"count": count})
+
+
+def recategorize(db: Session, user_id: int, filters: TransactionFilter, new_category: str) -> int:
+    """Affecte new_category à toutes les transactions sélectionnées (un seul UPDATE)"""
+    conditions = filter_conditions(user_id, filters) + [table.c.category != new_category]
+    rows = db.execute(
+        # Verrouillées: l'UPDATE / DELETE porte exactement sur ces lignes
+        select(table.c.type, table.c.category, table.c.date, table.c.amount).where(*conditions).with_for_update()
+    ).all()
+    if not rows:
+        return 0
+
+    db.execute(update(table).where(*conditions).values(
+        category=new_category,
+        # À réanalyser par le job des anomalies
+        anomaly_score=None,
+        is_anomaly=False
+    ))
+    changes = []
+    for type_, category, day, amount in rows:
+        changes.append((-1, _type(type_), category, day, amount))
+        changes.append((1, _type(type_), new_category, day, amount))
+    _publish(db, user_id, "updated", len(rows), changes)
+    return len(rows)
+
+
+def reclassify_all(db: Session, user_id: int, batch_size: Optional[int] = None) -> int:
+    """
+    Repasse toutes les transactions de l'utilisateur dans le modèle (après
+    une mise à jour du modèle), par lots de batch_size: un appel au modèle
+    par lot (descriptions distinctes uniquement) et un UPDATE groupé pour
+    les seules transactions dont la catégorie change.
+
+    Returns:
+        Nombre de transactions dont la catégorie a changé
+    """
+    batch_size = batch_size or RECLASSIFY_BATCH_SIZE
+    statement = update(table).where(table.c.id == bindparam("transaction_id")).values(
+        category=bindparam("new_category"),
+        anomaly_score=None,
+        is_anomaly=False
+    )
+    changes, updated, last_id = [], 0, 0
+    while True:
+        rows = db.execute(
+            select(table.c.id, table.c.description, table.c.type, table.c.category, table.c.date, table.c.amount)
+            .where(table.c.user_id == user_id, table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        descriptions = sorted({row.description for row in rows})
+        predicted = dict(zip(descriptions, classify_descriptions(db, user_id, descriptions)))
+        batch = []
+        for row in rows:
+            category = predicted[row.description]
+            if category != row.category:
+                batch.append({"transaction_id": row.id, "new_category": category})
+                changes.append((-1, _type(row.type), row.category, row.date, row.amount))
+                changes.append((1, _type(row.type), category, row.date, row.amount))
+        if batch:
+            db.execute(statement, batch)
+            updated += len(batch)
+
+    if updated:
+        _publish(db, user_id, "updated", updated, changes)
+    return updated
+
+
+def delete_matching(db: Session, user_id: int, filters: TransactionFilter) -> int:
+    """Supprime les transactions sélectionnées et leurs tickets (un DELETE par table)"""
+    conditions = filter_conditions(user_id, filters)
+    rows = db.execute(
+        # Verrouillées: l'UPDATE / DELETE porte exactement sur ces lignes
+        select(table.c.type, table.c.category, table.c.date, table.c.amount).where(*conditions).with_for_update()
+    ).all()
+    if not rows:
+        return 0
+
+    selected_ids = select(table.c.id).where(*conditions)
+    # Articles de tickets: lien simplement retiré (comme ON DELETE SET NULL)
+    db.execute(
+        update(TicketItem.__table__)
+        .where(TicketItem.__table__.c.transaction_id.in_(selected_ids))
+        .values(transaction_id=None)
+    )
+    # Articles des tickets supprimés: supprimés explicitement (pas de cascade en
+    # base sans clés étrangères: SQLite sans PRAGMA, table partitionnée)
+    selected_tickets = select(Ticket.__table__.c.id).where(Ticket.__table__.c.transaction_id.in_(selected_ids))
+    db.execute(TicketItem.__table__.delete().where(TicketItem.__table__.c.ticket_id.in_(selected_tickets)))
+    db.execute(Ticket.__table__.delete().where(Ticket.__table__.c.transaction_id.in_(selected_ids)))
+    db.execute(table.delete().where(*conditions))
+
+    _publish(db, user_id, "deleted", len(rows), [
+        (-1, _type(type_), category, day, amount) for type_, category, day, amount in rows
+    ])
+    return len(rows)
@@ -0,0 +1,202 @@
+# app/services/category_rules.py
+"""
+Règles de catégorisation (table category_rules) compilées en une seule
+expression régulière par utilisateur.
+
+Les règles de l'utilisateur passent avant les règles globales, puis par
+priorité décroissante. Chaque règle est une alternative nommée ancrée en
+début de chaîne (".*?(?P<r3>...)"): les alternatives étant essayées dans
+l'ordre, la première règle qui trouve une correspondance l'emporte, quel
+que soit l'endroit de la description où elle apparaît. Un seul appel au
+moteur par description (qui relit la description pour chaque alternative
+jusqu'à la première correspondance), sans appel au modèle.
+
+Les expressions sont saisies par les utilisateurs: elles sont exécutées
+par le module regex avec une durée maximale (RULE_MATCH_TIMEOUT_SECONDS),
+et une règle qui dépasse cette durée (retour arrière catastrophique, par
+exemple "(a+)+$") est écartée du matcher.
+"""
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+from app.models.transaction import CategoryRule
+import logging
+import regex
+import threading
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+# Durée de vie du cache: borne le retard entre workers (l'invalidation est locale)
+RULES_CACHE_SECONDS = float(os.getenv("RULES_CACHE_SECONDS", "300"))
+# Durée maximale de l'application des règles à une description (secondes)
+RULE_MATCH_TIMEOUT_SECONDS = float(os.getenv("RULE_MATCH_TIMEOUT_SECONDS", "0.05"))
+
+_FLAGS = regex.IGNORECASE | regex.DOTALL
+# Références à un groupe par numéro ou par nom (\1, \g<1>, \k<nom>, (?P=nom),
+# (?(1)...)): les numéros changent une fois la règle insérée dans l'expression combinée
+_GROUP_REFERENCE = regex.compile(r"\\(?:[1-9]|g|k)|\(\?P=|\(\?\(")
+
+
+def rule_expression(pattern: str, is_regex: bool) -> str:
+    """Expression d'une règle: mot-clé délimité (casse ignorée) ou regex telle quelle"""
+    if is_regex:
+        return pattern
+    return r"(?<!\w)" + regex.escape(pattern.strip()) + r"(?!\w)"
+
+
+def validate_rule(pattern: str, is_regex: bool) -> None:
+    """Lève ValueError si la règle ne peut pas être compilée"""
+    if not pattern.strip():
+        raise ValueError("Motif vide")
+    if not is_regex:
+        return
+    # Les "\\" échappés ne sont pas des références
+    if _GROUP_REFERENCE.search(pattern.replace("\\\\", "")):
+        raise ValueError("Les références à un groupe (\\1, (?P=nom)...) ne sont pas autorisées")
+    try:
+        # Seule (parenthèses équilibrées), puis telle qu'elle sera insérée dans l'expression combinée
+        regex.compile(pattern, _FLAGS)
+        compiled = regex.compile(_alternative("rule", pattern), _FLAGS)
+    except regex.error as e:
+        raise ValueError(f"Expression régulière invalide: {e}")
+    if len(compiled.groupindex) > 1:
+        raise ValueError("Les groupes nommés ne sont pas autorisés")
+
+
+def _alternative(name: str, expression: str) -> str:
+    return f".*?(?P<{name}>{expression})"
+
+
+class _RuleSet(NamedTuple):
+    """
+    Expression combinée et règles qu'elle contient, remplacées d'un bloc
+    (jamais modifiées): un match fait avec une version la lit en entier.
+    """
+    regex: Optional["regex.Pattern"]
+    expressions: Dict[str, str]  # nom du groupe -> expression
+    categories: Dict[str, str]  # nom du groupe -> catégorie
+
+
+def _rule_set(expressions: Dict[str, str], categories: Dict[str, str]) -> _RuleSet:
+    if not expressions:
+        return _RuleSet(None, expressions, categories)
+    try:
+        compiled = regex.compile(
+            "|".join(_alternative(name, expression) for name, expression in expressions.items()),
+            _FLAGS
+        )
+    except regex.error as e:
+        logger.error("Règles de catégorisation inutilisables: %s", e)
+        compiled = None
+    return _RuleSet(compiled, expressions, categories)
+
+
+class RuleMatcher:
+    """Règles ordonnées compilées en une seule expression"""
+
+    def __init__(self, rules: Sequence[Tuple[str, bool, str]]):
+        """rules: (motif, is_regex, catégorie), la plus prioritaire d'abord"""
+        expressions, categories = {}, {}
+        for index, (pattern, is_regex, category) in enumerate(rules):
+            # Règles enregistrées avant une évolution de la validation: ignorées
+            try:
+                validate_rule(pattern, is_regex)
+            except ValueError as e:
+                logger.warning("Règle de catégorisation ignorée (%r): %s", pattern, e)
+                continue
+            name = f"r{index}"
+            categories[name] = category
+            expressions[name] = rule_expression(pattern, is_regex)
+        self._lock = threading.Lock()
+        self._rules = _rule_set(expressions, categories)
+
+    def __len__(self) -> int:
+        return len(self._rules.categories)
+
+    def match(self, description: str) -> Optional[str]:
+        # Une seule lecture: une autre requête peut remplacer les règles pendant le match
+        rules = self._rules
+        if rules.regex is None:
+            return None
+        try:
+            found = rules.regex.match(description, timeout=RULE_MATCH_TIMEOUT_SECONDS)
+        except TimeoutError:
+            if not self._discard_slow_rules(rules, description):
+                return None
+            return self.match(description)
+        return rules.categories[found.lastgroup] if found else None
+
+    def _discard_slow_rules(self, rules: _RuleSet, description: str) -> bool:
+        """
+        Écarte les règles qui dépassent seules la durée maximale sur cette
+        description; retourne False si aucune n'est en cause.
+        """
+        with self._lock:
+            if self._rules is not rules:
+                # Déjà remplacées par une autre requête: réessayer avec les nouvelles
+                return True
+            slow = set()
+            for name, expression in rules.expressions.items():
+                try:
+                    regex.match(_alternative(name, expression), description, _FLAGS,
+                                timeout=RULE_MATCH_TIMEOUT_SECONDS)
+                except TimeoutError:
+                    logger.warning("Règle de catégorisation trop lente écartée: %r", expression)
+                    slow.add(name)
+            if slow:
+                self._rules = _rule_set(
+                    {name: e for name, e in rules.expressions.items() if name not in slow},
+                    {name: c for name, c in rules.categories.items() if name not in slow}
+                )
+        return bool(slow)
+
+
+def load_rules(db: Session, user_id: int) -> List[Tuple[str, bool, str]]:
+    rows = db.execute(
+        select(CategoryRule.pattern, CategoryRule.is_regex, CategoryRule.category).where(
+            or_(CategoryRule.user_id == user_id, CategoryRule.user_id.is_(None))
+        ).order_by(
+            # Règles de l'utilisateur d'abord, puis globales
+            CategoryRule.user_id.is_(None),
+            CategoryRule.priority.desc(),
+            CategoryRule.id
+        )
+    ).all()
+    return [(pattern, bool(is_regex), category) for pattern, is_regex, category in rows]
+
+
+class RuleMatcherCache:
+    """Règles compilées par utilisateur, recompilées après modification"""
+
+    def __init__(self, ttl: float = RULES_CACHE_SECONDS):
+        self.ttl = ttl
+        self._entries: Dict[int, Tuple[float, RuleMatcher]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: int) -> RuleMatcher:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry and now - entry[0] < self.ttl:
+            return entry[1]
+
+        matcher = RuleMatcher(load_rules(db, user_id))
+        with self._lock:
+            self._entries[user_id] = (now, matcher)
+        return matcher
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Règles d'un utilisateur modifiées (None: règle globale, tout recompiler)"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self.invalidate()
+
+
+rule_cache = RuleMatcherCache()
@@ -0,0 +1,46 @@
+# app/services/classification.py
+from typing import List
+from sqlalchemy.orm import Session
+from app.core.metrics import classifications_total, model_inference_seconds
+from app.services.category_rules import rule_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Catégorie utilisée quand le modèle est indisponible
+DEFAULT_CATEGORY = "Autres"
+
+
+def classify_descriptions(db: Session, user_id: int, descriptions: List[str], strict: bool = False) -> List[str]:
+    """
+    Catégories prédites pour une liste de descriptions.
+
+    Les règles de catégorisation de l'utilisateur (et globales) sont
+    appliquées d'abord; les descriptions restantes passent par le modèle en
+    un seul appel (vectorisation et prédiction par lot). En cas d'erreur du
+    modèle, DEFAULT_CATEGORY pour celles-ci (ou l'exception si strict).
+    """
+    if not descriptions:
+        return []
+    matcher = rule_cache.get(db, user_id)
+    categories = [matcher.match(description) for description in descriptions]
+    remaining = [index for index, category in enumerate(categories) if category is None]
+    classifications_total.inc("rule", amount=len(descriptions) - len(remaining))
+    if not remaining:
+        return categories
+
+    # Import paresseux: le chargement du modèle est fait par model_loader
+    from app.api.v1.endpoints.model_loader import pipeline
+    try:
+        with model_inference_seconds.time():
+            predicted = [str(category) for category in pipeline.predict([descriptions[i] for i in remaining])]
+        classifications_total.inc("model", amount=len(remaining))
+    except Exception as e:
+        if strict:
+            raise
+        logger.warning("Erreur lors de la classification automatique: %s", e)
+        predicted = [DEFAULT_CATEGORY] * len(remaining)
+
+    for index, category in zip(remaining, predicted):
+        categories[index] = category
+    return categories
@@ -0,0 +1,290 @@
+# app/services/event_bus.py
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from app.core.metrics import register_gauge
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Taille maximale de la file d'un abonné (les plus anciens événements sont perdus)
+SUBSCRIBER_QUEUE_SIZE = 100
+# "local" (un seul worker) ou "postgres" (LISTEN/NOTIFY, plusieurs workers)
+EVENT_BROKER = os.getenv("EVENT_BROKER", "local")
+# Canal PostgreSQL utilisé par le broker "postgres"
+EVENT_CHANNEL = os.getenv("EVENT_CHANNEL", "gbp_events")
+# Taille maximale d'une notification PostgreSQL (limite du serveur: 8000 octets)
+NOTIFY_PAYLOAD_BYTES = 7900
+# Durée de conservation des morceaux d'un événement incomplet (secondes)
+CHUNK_TIMEOUT_SECONDS = 60
+# Intervalle des messages keep-alive des flux SSE (secondes)
+SSE_KEEPALIVE_SECONDS = 15
+
+
+class EventBus:
+    """
+    Pub/sub en mémoire par utilisateur.
+
+    Les endpoints d'écriture sont synchrones (threadpool) alors que les
+    flux SSE lisent des asyncio.Queue: la publication passe donc par
+    call_soon_threadsafe sur la boucle de chaque abonné.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[user_id].add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            for entry in [entry for entry in subscribers if entry[1] is queue]:
+                subscribers.discard(entry)
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, user_id: int, event_type: str, data: dict) -> None:
+        """Publie via le broker: tous les workers reçoivent l'événement"""
+        broker.publish_many([(user_id, event_type, data)])
+
+    def deliver(self, user_id: int, event_type: str, data: dict) -> None:
+        """Transmet un événement aux abonnés de ce worker"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        message = {"type": event_type, "data": data}
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_put_dropping_oldest, queue, message)
+            except RuntimeError:
+                # Boucle fermée: l'abonné est parti
+                self.unsubscribe(user_id, queue)
+
+
+def _put_dropping_oldest(queue: asyncio.Queue, message: dict) -> None:
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+
+event_bus = EventBus()
+register_gauge("sse_subscribers", "Flux SSE ouverts sur ce worker", event_bus.subscriber_count)
+
+
+class LocalBroker:
+    """Broker en mémoire: suffisant avec un seul worker uvicorn"""
+
+    def publish_many(self, events: List[Tuple[int, str, dict]]) -> None:
+        for user_id, event_type, data in events:
+            event_bus.deliver(user_id, event_type, data)
+
+
+class PostgresBroker:
+    """
+    Broker multi-workers basé sur LISTEN/NOTIFY de PostgreSQL (déjà présent
+    dans la stack, pas de service supplémentaire). Chaque worker écoute le
+    canal dans un thread et redistribue les messages à ses abonnés locaux.
+
+    Une notification est limitée à 8000 octets: un événement plus gros
+    (création groupée de transactions...) est découpé en morceaux
+    "<id>:<n°>:<nombre>:<texte>" envoyés dans la même transaction et
+    réassemblés par les workers.
+    """
+
+    def __init__(self, database_url: str, channel: str):
+        self._database_url = database_url
+        self._channel = channel
+        self._listener: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # id -> (début de réception, morceaux reçus)
+        self._chunks: Dict[str, Tuple[float, Dict[int, str]]] = {}
+
+    def publish_many(self, events: List[Tuple[int, str, dict]]) -> None:
+        """
+        Un événement par transaction: un événement en échec n'empêche pas
+        la publication des suivants.
+        """
+        self._ensure_listener()
+        from app.db.session import engine
+        for user_id, event_type, data in events:
+            payload = json.dumps({"user_id": user_id, "type": event_type, "data": data}, default=str)
+            try:
+                with engine.begin() as connection:
+                    for part in split_payload(payload):
+                        connection.exec_driver_sql("SELECT pg_notify(%s, %s)", (self._channel, part))
+            except Exception as e:
+                logger.error("Publication de l'événement %s impossible: %s", event_type, e)
+
+    def start(self) -> None:
+        self._ensure_listener()
+
+    def _ensure_listener(self) -> None:
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="event-listener", daemon=True)
+                self._listener.start()
+
+    def _listen(self) -> None:
+        import psycopg2
+        # postgresql+psycopg2://... -> postgresql://... pour psycopg2
+        dsn = make_url(self._database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                connection = psycopg2.connect(dsn)
+                connection.set_isolation_level(0)  # autocommit, requis pour LISTEN
+                connection.cursor().execute(f'LISTEN "{self._channel}"')
+                while True:
+                    if select.select([connection], [], [], 30) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self._dispatch(connection.notifies.pop(0).payload)
+            except psycopg2.Error as e:
+                logger.warning("Écoute des événements interrompue, reconnexion: %s", e)
+                time.sleep(1)
+
+    def _dispatch(self, payload: str) -> None:
+        if not payload.startswith("{"):
+            payload = self._reassemble(payload)
+            if payload is None:
+                return
+        try:
+            message = json.loads(payload)
+            event_bus.deliver(message["user_id"], message["type"], message["data"])
+        except (ValueError, KeyError) as e:
+            logger.warning("Événement invalide ignoré: %s", e)
+
+    def _reassemble(self, chunk: str) -> Optional[str]:
+        """Ajoute un morceau; retourne l'événement complet une fois tous ses morceaux reçus"""
+        try:
+            chunk_id, index, count, text = chunk.split(":", 3)
+            index, count = int(index), int(count)
+        except ValueError:
+            logger.warning("Morceau d'événement invalide ignoré")
+            return None
+
+        now = time.monotonic()
+        for expired in [key for key, (started, _) in self._chunks.items() if now - started > CHUNK_TIMEOUT_SECONDS]:
+            logger.warning("Événement incomplet abandonné: %s", expired)
+            del self._chunks[expired]
+
+        parts = self._chunks.setdefault(chunk_id, (now, {}))[1]
+        parts[index] = text
+        if len(parts) < count:
+            return None
+        del self._chunks[chunk_id]
+        return "".join(parts[i] for i in range(count))
+
+
+def split_payload(payload: str, limit: int = NOTIFY_PAYLOAD_BYTES) -> List[str]:
+    """
+    Découpe un événement JSON (ASCII: json.dumps échappe le reste) en
+    notifications d'au plus `limit` octets.
+    """
+    if len(payload) <= limit:
+        return [payload]
+    chunk_id = uuid.uuid4().hex
+    # Place de l'en-tête "<id>:<n°>:<nombre>:"
+    size = limit - len(chunk_id) - 24
+    texts = [payload[start:start + size] for start in range(0, len(payload), size)]
+    return [f"{chunk_id}:{index}:{len(texts)}:{text}" for index, text in enumerate(texts)]
+
+
+def _create_broker():
+    if EVENT_BROKER == "postgres":
+        return PostgresBroker(os.getenv("DATABASE_URL"), EVENT_CHANNEL)
+    return LocalBroker()
+
+
+broker = _create_broker()
+
+
+def queue_event(db: Session, user_id: int, event_type: str, data: dict) -> None:
+    """
+    Prépare un événement qui ne sera publié qu'après le commit de la session
+    (rien n'est envoyé si la transaction est annulée).
+    """
+    pending: List[Tuple[int, str, dict]] = db.info.setdefault("pending_events", [])
+    pending.append((user_id, event_type, data))
+
+
+def on_commit(db: Session, callback: Callable[[], None]) -> None:
+    """Exécute callback après le prochain commit de la session (ignoré si rollback)"""
+    db.info.setdefault("after_commit_callbacks", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session: Session) -> None:
+    for callback in session.info.pop("after_commit_callbacks", []):
+        try:
+            callback()
+        except Exception as e:
+            logger.error("Callback après commit en échec: %s", e)
+
+    pending = session.info.pop("pending_events", [])
+    if not pending:
+        return
+    try:
+        broker.publish_many(pending)
+    except Exception as e:
+        # Les données sont déjà commitées: un événement perdu ne doit pas faire échouer la requête
+        logger.error("Publication des événements impossible: %s", e)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_events(session: Session, previous_transaction) -> None:
+    session.info.pop("pending_events", None)
+    session.info.pop("after_commit_callbacks", None)
+
+
+def sse_response(request: Request, user_id: int, event_types: Optional[Iterable[str]] = None) -> StreamingResponse:
+    """
+    Flux Server-Sent Events des événements d'un utilisateur.
+
+    Chaque événement est envoyé sous la forme:
+        event: <type>
+        data: {...}
+    event_types limite le flux à certains types d'événements.
+    """
+    wanted = set(event_types) if event_types else None
+    if isinstance(broker, PostgresBroker):
+        broker.start()
+
+    async def events():
+        queue = event_bus.subscribe(user_id)
+        try:
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if wanted is None or message["type"] in wanted:
+                    yield f"event: {message['type']}\ndata: {json.dumps(message['data'], default=str)}\n\n"
+        finally:
+            event_bus.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
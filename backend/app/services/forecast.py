@@ -0,0 +1,160 @@
+# app/services/forecast.py
+from datetime import date, timedelta
+from typing import Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.transaction import Transaction
+from app.services.budget_alerts import month_start, month_end
+import numpy as np
+import threading
+import time
+import os
+
+# Historique utilisé pour estimer les dépenses journalières (jours)
+FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "90"))
+# Durée de vie du cache: borne le retard entre workers (l'invalidation est locale)
+FORECAST_CACHE_SECONDS = float(os.getenv("FORECAST_CACHE_SECONDS", "300"))
+# En dessous de ce nombre de jours d'historique, on extrapole le rythme du mois en cours
+MIN_HISTORY_DAYS = 14
+
+
+def load_history(db: Session, user_id: int, since: date) -> Dict[str, np.ndarray]:
+    """
+    Charge l'historique en tableaux NumPy compacts (pas d'objets ORM).
+
+    Returns:
+        {"day": ordinal (int32), "category": code (int32), "amount": float64,
+         "is_expense": bool, "categories": noms des catégories}
+    """
+    rows = db.execute(
+        select(Transaction.date, Transaction.category, Transaction.amount, Transaction.type).where(
+            Transaction.user_id == user_id,
+            Transaction.date >= since
+        )
+    ).all()
+
+    if not rows:
+        return {
+            "day": np.empty(0, dtype=np.int32),
+            "category": np.empty(0, dtype=np.int32),
+            "amount": np.empty(0, dtype=np.float64),
+            "is_expense": np.empty(0, dtype=bool),
+            "categories": np.empty(0, dtype=object),
+        }
+
+    days, categories, amounts, types = zip(*rows)
+    category_names, category_codes = np.unique(np.array(categories, dtype=object), return_inverse=True)
+    return {
+        "day": np.fromiter((d.toordinal() for d in days), dtype=np.int32, count=len(rows)),
+        "category": category_codes.astype(np.int32),
+        "amount": np.asarray(amounts, dtype=np.float64),
+        "is_expense": np.fromiter((str(getattr(t, "value", t)) == "expense" for t in types), dtype=bool, count=len(rows)),
+        "categories": category_names,
+    }
+
+
+def _weekday_counts(first: int, last: int) -> np.ndarray:
+    """Nombre de lundis, mardis... entre deux ordinaux inclus"""
+    if last < first:
+        return np.zeros(7)
+    days = np.arange(first, last + 1)
+    # date.fromordinal(1) est un lundi: (ordinal - 1) % 7 == weekday()
+    return np.bincount((days - 1) % 7, minlength=7).astype(np.float64)
+
+
+def _project(history: Dict[str, np.ndarray], mask: np.ndarray, today: date) -> np.ndarray:
+    """
+    Projection fin de mois par catégorie: dépensé depuis le début du mois
+    + jours restants * dépense moyenne de chaque jour de la semaine.
+    """
+    n_categories = len(history["categories"])
+    if n_categories == 0:
+        return np.zeros(0)
+
+    days = history["day"][mask]
+    codes = history["category"][mask]
+    amounts = history["amount"][mask]
+
+    first_of_month = month_start(today).toordinal()
+    today_ordinal = today.toordinal()
+    last_of_month = month_end(today).toordinal() - 1
+
+    in_month = days >= first_of_month
+    spent = np.bincount(codes[in_month], weights=amounts[in_month], minlength=n_categories)
+
+    # Premier jour d'activité (tous types confondus): avant, aucun jour n'a été observé
+    oldest = int(history["day"].min()) if history["day"].size else today_ordinal
+    window_start = today_ordinal - FORECAST_HISTORY_DAYS
+    in_window = (days > window_start) & (days <= today_ordinal)
+    observed = _weekday_counts(max(window_start + 1, oldest), today_ordinal)
+    remaining = _weekday_counts(today_ordinal + 1, last_of_month)
+
+    if today_ordinal - oldest + 1 >= MIN_HISTORY_DAYS:
+        # Montant moyen par (catégorie, jour de la semaine) sur la fenêtre
+        weekday = (days[in_window] - 1) % 7
+        totals = np.bincount(codes[in_window] * 7 + weekday, weights=amounts[in_window],
+                             minlength=n_categories * 7).reshape(n_categories, 7)
+        rates = totals / np.maximum(observed, 1)
+        expected = rates @ remaining
+    else:
+        # Peu d'historique: rythme quotidien du mois en cours, depuis le premier jour d'activité
+        elapsed = today_ordinal - max(first_of_month, oldest) + 1
+        expected = spent / elapsed * remaining.sum()
+
+    return spent + expected
+
+
+def compute_forecast(db: Session, user_id: int, today: Optional[date] = None) -> dict:
+    """Projection des dépenses par catégorie et du solde à la fin du mois en cours"""
+    today = today or date.today()
+    since = min(month_start(today), today - timedelta(days=FORECAST_HISTORY_DAYS))
+    history = load_history(db, user_id, since)
+
+    expenses = _project(history, history["is_expense"], today)
+    income = _project(history, ~history["is_expense"], today)
+
+    categories = {
+        str(name): round(float(value), 2)
+        for name, value in zip(history["categories"], expenses)
+        if value > 0
+    }
+    projected_expenses = float(expenses.sum()) if expenses.size else 0.0
+    projected_income = float(income.sum()) if income.size else 0.0
+    return {
+        "month": month_start(today).strftime("%Y-%m"),
+        "categories": categories,
+        "projected_expenses": round(projected_expenses, 2),
+        "projected_income": round(projected_income, 2),
+        "projected_balance": round(projected_income - projected_expenses, 2),
+    }
+
+
+class ForecastCache:
+    """Prévisions par utilisateur, invalidées à chaque écriture de transaction"""
+
+    def __init__(self):
+        self._entries: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: int) -> dict:
+        today = date.today()
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry and entry[0] == today and time.monotonic() - entry[1] < FORECAST_CACHE_SECONDS:
+            return entry[2]
+
+        forecast = compute_forecast(db, user_id, today)
+        with self._lock:
+            self._entries[user_id] = (today, time.monotonic(), forecast)
+        return forecast
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+forecast_cache = ForecastCache()
@@ -0,0 +1,220 @@
+# app/services/idempotency.py
+"""
+Clés d'idempotence (en-tête Idempotency-Key) des POST de création de
+transactions et de traitement de tickets.
+
+Un client mobile qui renvoie une requête après un timeout reçoit la
+réponse de la première exécution au lieu de créer des doublons (et de
+relancer l'OCR et la classification):
+  - la clé est réservée dans la table idempotency_keys (commit immédiat,
+    visible des autres workers) avant l'exécution, puis la réponse y est
+    enregistrée avec l'empreinte de la requête
+  - les réponses récentes sont aussi gardées dans un cache LRU en mémoire:
+    un retry sur le même worker ne fait aucune requête SQL
+  - les requêtes identiques simultanées attendent la première au lieu de
+    s'exécuter: dans le processus via un Event, entre workers en relisant
+    la réservation
+  - la même clé avec un autre corps de requête est refusée (422)
+
+La réponse est enregistrée dans la même transaction que l'écriture (la
+fonction exécutée ne commite pas): une écriture commitée a toujours sa
+réponse. Une requête en erreur libère sa clé: l'écriture étant tout ou
+rien, il n'y a rien à rejouer et le client peut réessayer. Une
+réservation laissée par un worker arrêté pendant l'exécution est reprise
+après IDEMPOTENCY_LOCK_SECONDS.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.metrics import idempotent_requests_total
+from app.models.user import IdempotencyKey
+import hashlib
+import threading
+import time
+import os
+
+# Durée pendant laquelle une réponse peut être rejouée
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+# Réponses gardées en mémoire (par processus)
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "1024"))
+# Attente maximale d'une requête identique en cours avant de répondre 409:
+# courte, l'attente occupe un thread du pool et le client réessaiera
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "2"))
+# Âge à partir duquel une réservation sans réponse est considérée abandonnée
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "300"))
+# Intervalle de relecture d'une réservation d'un autre worker
+POLL_SECONDS = 0.1
+
+MAX_KEY_LENGTH = 255
+
+table = IdempotencyKey.__table__
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status_code: int
+    body: bytes
+    stored_at: float  # time.monotonic()
+
+
+def request_fingerprint(endpoint: str, payload: bytes) -> str:
+    """Empreinte d'une requête: même clé sur un autre endpoint = autre requête"""
+    return hashlib.sha256(endpoint.encode() + b"\n" + payload).hexdigest()
+
+
+def _conflict() -> HTTPException:
+    return HTTPException(status_code=409, detail="Requête identique en cours de traitement, réessayez plus tard")
+
+
+class IdempotencyStore:
+    def __init__(self, capacity: int = IDEMPOTENCY_CACHE_SIZE, ttl_hours: float = IDEMPOTENCY_TTL_HOURS):
+        self.capacity = capacity
+        self.ttl = timedelta(hours=ttl_hours)
+        self._responses: "OrderedDict[Tuple[int, str], StoredResponse]" = OrderedDict()
+        self._inflight: Dict[Tuple[int, str], threading.Event] = {}
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def _cached(self, cache_key: Tuple[int, str]) -> Optional[StoredResponse]:
+        with self._lock:
+            stored = self._responses.get(cache_key)
+            if stored is None:
+                return None
+            if time.monotonic() - stored.stored_at > self.ttl.total_seconds():
+                del self._responses[cache_key]
+                return None
+            self._responses.move_to_end(cache_key)
+            return stored
+
+    def _remember(self, cache_key: Tuple[int, str], stored: StoredResponse) -> None:
+        with self._lock:
+            self._responses[cache_key] = stored
+            self._responses.move_to_end(cache_key)
+            while len(self._responses) > self.capacity:
+                self._responses.popitem(last=False)
+
+    @staticmethod
+    def _response(stored: StoredResponse, fingerprint: str, result: str) -> Response:
+        if stored.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key déjà utilisée pour une requête différente"
+            )
+        idempotent_requests_total.inc(result)
+        headers = {"Idempotent-Replayed": "true"} if result != "executed" else None
+        return Response(content=stored.body, status_code=stored.status_code,
+                        media_type="application/json", headers=headers)
+
+    def execute(self, db: Session, user_id: int, key: str, fingerprint: str,
+                run: Callable[[], bytes]) -> Response:
+        """
+        Exécute `run` (qui retourne le corps JSON de la réponse) une seule
+        fois par (utilisateur, clé); les appels suivants rejouent la réponse.
+        `run` écrit sans commiter: l'écriture et la réponse sont commitées
+        ensemble.
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key invalide (1 à {MAX_KEY_LENGTH} caractères)")
+
+        cache_key = (user_id, key)
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+        waited = False
+        while True:
+            stored = self._cached(cache_key)
+            if stored is not None:
+                return self._response(stored, fingerprint, "coalesced" if waited else "replayed")
+            with self._lock:
+                event = self._inflight.get(cache_key)
+                leader = event is None
+                if leader:
+                    event = self._inflight[cache_key] = threading.Event()
+            if leader:
+                break
+            # Même clé en cours dans ce processus: on attend sa réponse
+            if not event.wait(max(0.0, deadline - time.monotonic())):
+                raise _conflict()
+            waited = True
+
+        try:
+            return self._execute_once(db, cache_key, fingerprint, run, deadline)
+        finally:
+            with self._lock:
+                self._inflight.pop(cache_key, None)
+            event.set()
+
+    def _execute_once(self, db: Session, cache_key: Tuple[int, str], fingerprint: str,
+                      run: Callable[[], bytes], deadline: float) -> Response:
+        user_id, key = cache_key
+        where = (table.c.user_id == user_id, table.c.key == key)
+        while True:
+            claimed, record = self._claim(db, user_id, key, fingerprint)
+            if claimed:
+                break
+            if record is not None and record.status_code is not None:
+                stored = StoredResponse(record.fingerprint, record.status_code,
+                                        record.response.encode(), time.monotonic())
+                self._remember(cache_key, stored)
+                return self._response(stored, fingerprint, "replayed")
+            # Réservée par un autre worker: on relit jusqu'à sa réponse
+            if record is not None and time.monotonic() >= deadline:
+                raise _conflict()
+            time.sleep(POLL_SECONDS if record is not None else 0)
+
+        try:
+            body = run()
+            db.execute(update(table).where(*where).values(status_code=200, response=body.decode()))
+            db.commit()
+        except BaseException:
+            db.rollback()
+            db.execute(delete(table).where(*where))
+            db.commit()
+            raise
+
+        stored = StoredResponse(fingerprint, 200, body, time.monotonic())
+        self._remember(cache_key, stored)
+        return self._response(stored, fingerprint, "executed")
+
+    def _claim(self, db: Session, user_id: int, key: str, fingerprint: str):
+        """
+        Réserve la clé. Retourne (True, None) si la réservation est faite,
+        sinon (False, ligne existante ou None si elle vient de disparaître).
+        """
+        now = datetime.now(timezone.utc)
+        if time.monotonic() - self._last_purge > 3600:
+            # Clés expirées de tous les utilisateurs (au plus une fois par heure)
+            db.execute(delete(table).where(table.c.created_at < now - self.ttl))
+            self._last_purge = time.monotonic()
+        db.execute(delete(table).where(
+            table.c.user_id == user_id,
+            table.c.key == key,
+            or_(
+                table.c.created_at < now - self.ttl,
+                and_(table.c.status_code.is_(None),
+                     table.c.created_at < now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS))
+            )
+        ))
+        try:
+            db.execute(insert(table).values(user_id=user_id, key=key, fingerprint=fingerprint, created_at=now))
+            db.commit()
+            return True, None
+        except IntegrityError:
+            db.rollback()
+        record = db.execute(
+            select(table.c.fingerprint, table.c.status_code, table.c.response).where(
+                table.c.user_id == user_id, table.c.key == key
+            )
+        ).first()
+        # Fin de la transaction de lecture: la relecture suivante voit les nouveaux commits
+        db.rollback()
+        return False, record
+
+    def clear(self) -> None:
+        with self._lock:
+            self._responses.clear()
+
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,126 @@
+# app/services/image_preprocessing.py
+from PIL import Image, ImageOps
+import numpy as np
+import os
+
+# Résolution cible pour l'OCR : easyocr n'a pas besoin de plus de ~200 DPI
+# pour lire un ticket de caisse, une photo 12MP en fait plus de 1000.
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", "200"))
+# Largeur standard d'un ticket de caisse (rouleau 80 mm)
+RECEIPT_WIDTH_MM = float(os.getenv("OCR_RECEIPT_WIDTH_MM", "80"))
+# Angle maximal (en degrés) corrigé par le redressement
+MAX_SKEW_ANGLE = float(os.getenv("OCR_MAX_SKEW_ANGLE", "5"))
+
+# Taille de travail pour le recadrage et le redressement (analyse seulement)
+_ANALYSIS_SIZE = 400
+
+
+def target_width() -> int:
+    """Largeur en pixels d'un ticket numérisé à OCR_TARGET_DPI"""
+    return int(round(RECEIPT_WIDTH_MM / 25.4 * OCR_TARGET_DPI))
+
+
+def _otsu_threshold(gray: np.ndarray) -> int:
+    """Seuil d'Otsu calculé sur l'histogramme (0-255)"""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 128
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    cum_mean = np.cumsum(hist * levels)
+    mean_bg = cum_mean / np.maximum(weight_bg, 1)
+    mean_fg = (cum_mean[-1] - cum_mean) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+
+def _downscale(image: Image.Image, max_width: int) -> Image.Image:
+    """Réduit l'image à max_width pixels de large (jamais d'agrandissement)"""
+    if image.width <= max_width:
+        return image
+    ratio = max_width / image.width
+    return image.resize((max_width, max(1, int(image.height * ratio))), Image.LANCZOS)
+
+
+def find_receipt_bounds(image: Image.Image):
+    """
+    Cherche le rectangle du ticket (papier clair sur fond plus sombre).
+
+    Retourne (left, top, right, bottom) dans les coordonnées de l'image,
+    ou None si aucun ticket ne se détache nettement du fond.
+    """
+    small = image.copy()
+    small.thumbnail((_ANALYSIS_SIZE, _ANALYSIS_SIZE))
+    gray = np.asarray(small, dtype=np.uint8)
+    bright = gray > _otsu_threshold(gray)
+
+    rows = np.flatnonzero(bright.mean(axis=1) > 0.3)
+    cols = np.flatnonzero(bright.mean(axis=0) > 0.3)
+    if rows.size == 0 or cols.size == 0:
+        return None
+
+    top, bottom = rows[0], rows[-1] + 1
+    left, right = cols[0], cols[-1] + 1
+    area_ratio = ((bottom - top) * (right - left)) / bright.size
+    # Ticket trop petit (faux positif) ou image déjà cadrée : on ne touche à rien
+    if area_ratio < 0.2 or area_ratio > 0.95:
+        return None
+
+    scale_x = image.width / small.width
+    scale_y = image.height / small.height
+    return (
+        int(left * scale_x),
+        int(top * scale_y),
+        min(image.width, int(np.ceil(right * scale_x))),
+        min(image.height, int(np.ceil(bottom * scale_y))),
+    )
+
+
+def estimate_skew(image: Image.Image, max_angle: float = MAX_SKEW_ANGLE, step: float = 0.5) -> float:
+    """
+    Estime l'inclinaison du texte par profil de projection : l'angle qui
+    maximise la variance des sommes par ligne aligne les lignes de texte.
+    """
+    small = image.copy()
+    small.thumbnail((_ANALYSIS_SIZE, _ANALYSIS_SIZE))
+    gray = np.asarray(small, dtype=np.uint8)
+    # Texte sombre -> 255, papier -> 0
+    ink = Image.fromarray(((gray < _otsu_threshold(gray)) * 255).astype(np.uint8))
+
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-max_angle, max_angle + step / 2, step):
+        rotated = np.asarray(ink.rotate(float(angle), resample=Image.NEAREST, expand=False))
+        score = float(np.var(rotated.sum(axis=1, dtype=np.int64)))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def preprocess_receipt(image: Image.Image, deskew: bool = True, crop: bool = True) -> Image.Image:
+    """
+    Prépare une photo de ticket pour l'OCR.
+
+    Étapes : orientation EXIF, niveaux de gris, réduction à OCR_TARGET_DPI,
+    recadrage sur le ticket, redressement et étirement du contraste.
+    """
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("L")
+
+    # Réduction grossière d'abord : recadrage et redressement coûtent moins cher
+    width = target_width()
+    image = _downscale(image, width * 3)
+
+    if crop:
+        bounds = find_receipt_bounds(image)
+        if bounds:
+            image = image.crop(bounds)
+
+    if deskew:
+        angle = estimate_skew(image)
+        if angle:
+            image = image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+    image = _downscale(image, width)
+    return ImageOps.autocontrast(image, cutoff=1)
@@ -3,41 +3,75 @@ from PIL import Image
 import numpy as np
 from io import BytesIO
 import re
+from app.services.image_preprocessing import preprocess_receipt
 
 # Initialiser le reader OCR UNE SEULE FOIS (ne pas le faire à chaque appel)
+_reader = None
 
-def extract_text_from_image(image_bytes):
+
+def get_reader():
+    """Retourne le reader easyocr partagé (chargé au premier appel)"""
+    global _reader
+    if _reader is None:
+        import easyocr
+        _reader = easyocr.Reader(['fr', 'en'])
+    return _reader
+
+
+def open_image(source):
+    """Ouvre une image PIL depuis des bytes ou un chemin de fichier"""
+    if isinstance(source, (bytes, bytearray)):
+        # ❌ NE PAS faire: image_bytes.decode('utf-8')
+        return Image.open(BytesIO(source))
+    return Image.open(source)
+
+
+def read_receipt(image_source, preprocess=True):
     """
-    Extract text from image bytes using OCR.
-    
+    Lance l'OCR et retourne les boîtes détectées.
+
     Args:
-        image_bytes: bytes - Les données binaires de l'image (pas un chemin!)
-    
+        image_source: bytes | str - Les données binaires de l'image ou le chemin du fichier stocké
+        preprocess: bool - Réduire et normaliser l'image avant l'OCR
+
     Returns:
-        str - Le texte extrait de l'image
+        list - [(bbox, texte, confiance), ...] au format easyocr
     """
-    import easyocr
-    reader = easyocr.Reader(['fr', 'en'])
+    reader = get_reader()
     try:
-        # ✅ Convertir les bytes en image PIL
-        # ❌ NE PAS faire: image_bytes.decode('utf-8')
-        image = Image.open(BytesIO(image_bytes))
-        
+        # ✅ Convertir les bytes (ou le fichier) en image PIL
+        image = open_image(image_source)
+
+        # Orientation EXIF, niveaux de gris, réduction, recadrage, redressement
+        if preprocess:
+            image = preprocess_receipt(image)
+
         # Convertir en array numpy pour easyocr
-        image_np = np.array(image)
-        
-        # Faire l'OCR
-        results = reader.readtext(image_np)
-        
-        # Extraire le texte
-        extracted_text = ' '.join([text for (_, text, _) in results])
-        
-        return extracted_text
-    
+        return reader.readtext(np.array(image))
+
     except Exception as e:
         raise Exception(f"Erreur extraction OCR: {str(e)}")
 
 
+def results_to_text(results):
+    """Texte brut des résultats OCR"""
+    return ' '.join([text for (_, text, _) in results])
+
+
+def extract_text_from_image(image_bytes, preprocess=True):
+    """
+    Extract text from image bytes using OCR.
+    
+    Args:
+        image_bytes: bytes | str - Les données binaires de l'image ou le chemin du fichier stocké
+        preprocess: bool - Réduire et normaliser l'image avant l'OCR
+    
+    Returns:
+        str - Le texte extrait de l'image
+    """
+    return results_to_text(read_receipt(image_bytes, preprocess=preprocess))
+
+
 def extract_items(text):
     items = []
 
@@ -63,3 +97,14 @@ def extract_items(text):
             continue
 
     return items
+
+
+def format_items(items):
+    """Formate les items au format attendu par le frontend: [{"label", "amount"}]"""
+    return [
+        {
+            "label": item.get("label", item.get("description", "")),
+            "amount": float(item.get("amount", 0))
+        }
+        for item in items
+    ]
@@ -0,0 +1,105 @@
+# app/services/receipt_cache.py
+from PIL import Image, ImageOps
+from typing import Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.user import Ticket, OcrResult
+from app.core.metrics import ocr_duration_seconds
+from app.services.ocr_service import open_image, read_receipt, results_to_text, extract_items, format_items
+from app.services.receipt_parser import parse_receipt
+import json
+import os
+
+# Détection des tickets re-photographiés (désactivée par défaut)
+PERCEPTUAL_DEDUP = os.getenv("OCR_PERCEPTUAL_DEDUP", "false").lower() == "true"
+# Distance de Hamming maximale (sur 64 bits) pour considérer deux photos identiques
+PERCEPTUAL_MAX_DISTANCE = int(os.getenv("OCR_PERCEPTUAL_MAX_DISTANCE", "6"))
+
+
+def perceptual_hash(image_source) -> str:
+    """
+    dHash 64 bits : compare la luminosité de pixels voisins sur une
+    vignette 9x8, insensible à la compression et aux petits recadrages.
+    """
+    image = ImageOps.exif_transpose(open_image(image_source))
+    pixels = list(image.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:016x}"
+
+
+def hamming_distance(hash_a: str, hash_b: str) -> int:
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count("1")
+
+
+def get_cached_result(db: Session, digest: str) -> Optional[dict]:
+    """Résultat OCR déjà calculé pour ces octets exacts"""
+    cached = db.query(OcrResult).filter(OcrResult.content_hash == digest).first()
+    if not cached:
+        return None
+    return json.loads(cached.data)
+
+
+def find_similar_result(db: Session, user_id: int, phash: str) -> Optional[dict]:
+    """
+    Résultat OCR d'une photo quasi identique déjà envoyée par cet utilisateur.
+
+    Limité aux tickets de l'utilisateur pour ne jamais renvoyer le contenu
+    du ticket de quelqu'un d'autre.
+    """
+    candidates = db.query(OcrResult.perceptual_hash, OcrResult.data).join(
+        Ticket, Ticket.content_hash == OcrResult.content_hash
+    ).filter(
+        Ticket.user_id == user_id,
+        OcrResult.perceptual_hash.isnot(None)
+    ).distinct().all()
+
+    best = None
+    best_distance = PERCEPTUAL_MAX_DISTANCE + 1
+    for candidate_hash, data in candidates:
+        distance = hamming_distance(phash, candidate_hash)
+        if distance < best_distance:
+            best, best_distance = data, distance
+    return json.loads(best) if best else None
+
+
+def store_result(db: Session, digest: str, phash: Optional[str], raw_text, items) -> None:
+    """Enregistre le résultat OCR (le commit est fait par l'appelant)"""
+    db.merge(OcrResult(
+        content_hash=digest,
+        perceptual_hash=phash,
+        data=json.dumps({"raw_text": raw_text, "items": items})
+    ))
+
+
+def run_ocr(db: Session, digest: str, image_source) -> Tuple[str, list]:
+    """Lance l'OCR et met le résultat en cache (le commit est fait par l'appelant)"""
+    with ocr_duration_seconds.time():
+        results = read_receipt(image_source)
+    raw_text = results_to_text(results)
+    # Analyse par lignes; l'ancienne regex sur le texte brut sert de repli
+    items = format_items(parse_receipt(results) or extract_items(raw_text))
+    phash = perceptual_hash(image_source) if PERCEPTUAL_DEDUP else None
+    store_result(db, digest, phash, raw_text, items)
+    return raw_text, items
+
+
+def ocr_with_cache(db: Session, user_id: int, digest: str, image_source) -> Tuple[str, list]:
+    """
+    Retourne (raw_text, items) pour une image, en évitant l'OCR si ces
+    octets (ou une photo quasi identique de l'utilisateur) ont déjà été traités.
+    """
+    cached = get_cached_result(db, digest)
+    if cached is None and PERCEPTUAL_DEDUP:
+        phash = perceptual_hash(image_source)
+        cached = find_similar_result(db, user_id, phash)
+        if cached is not None:
+            # Photo quasi identique: indexer aussi ces octets exacts
+            store_result(db, digest, phash, cached["raw_text"], cached["items"])
+
+    if cached is not None:
+        return cached["raw_text"], cached["items"]
+    return run_ocr(db, digest, image_source)
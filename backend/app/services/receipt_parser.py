@@ -0,0 +1,102 @@
+# app/services/receipt_parser.py
+import re
+from statistics import median
+from app.utils.helpers import clean_receipt_lines
+
+# Prix en fin de ligne, éventuellement suivi de la devise et d'un code TVA (A, B, 1...)
+PRICE_PATTERN = re.compile(r'(-?\d{1,6}[.,]\d{2})\s*(?:€|EUR)?\s*(?:[A-Z0-9]\b)?\s*$', re.IGNORECASE)
+# Quantité en début de libellé: "2 ", "2x ", "2 X "
+QUANTITY_PATTERN = re.compile(r'^\d{1,3}\s*[xX*]?\s+')
+
+
+def _box_geometry(bbox):
+    """(y_centre, hauteur, x_gauche) d'une boîte easyocr [[x, y] * 4]"""
+    xs = [float(point[0]) for point in bbox]
+    ys = [float(point[1]) for point in bbox]
+    top, bottom = min(ys), max(ys)
+    return (top + bottom) / 2, bottom - top, min(xs)
+
+
+def group_lines(results, tolerance=0.5):
+    """
+    Regroupe les boîtes OCR en lignes de ticket.
+
+    Les boîtes sont triées par ordonnée puis parcourues une seule fois :
+    une boîte rejoint la ligne courante si son centre est à moins de
+    tolerance * hauteur médiane du centre de la ligne.
+
+    Args:
+        results: list - Résultats easyocr [(bbox, texte, confiance), ...]
+
+    Returns:
+        list[list[str]] - Textes de chaque ligne, de gauche à droite
+    """
+    boxes = []
+    for bbox, text, _ in results:
+        text = text.strip()
+        if text:
+            y_center, height, x_left = _box_geometry(bbox)
+            boxes.append((y_center, height, x_left, text))
+    if not boxes:
+        return []
+
+    max_gap = tolerance * (median(box[1] for box in boxes) or 1)
+    boxes.sort(key=lambda box: box[0])
+
+    lines = []
+    current = [boxes[0]]
+    line_y = boxes[0][0]
+    for box in boxes[1:]:
+        if box[0] - line_y <= max_gap:
+            current.append(box)
+            # Centre moyen de la ligne, mis à jour en O(1)
+            line_y += (box[0] - line_y) / len(current)
+        else:
+            lines.append(current)
+            current = [box]
+            line_y = box[0]
+    lines.append(current)
+
+    return [[box[3] for box in sorted(line, key=lambda box: box[2])] for line in lines]
+
+
+def parse_line(text):
+    """Sépare une ligne en (libellé, montant) ou retourne None"""
+    match = PRICE_PATTERN.search(text)
+    if not match:
+        return None
+    label = QUANTITY_PATTERN.sub('', text[:match.start()].strip()).strip(' .:-')
+    if not label or not re.search(r'[A-Za-zÀ-ÿ]', label):
+        return None
+    try:
+        amount = float(match.group(1).replace(',', '.'))
+    except ValueError:
+        return None
+    if amount <= 0:
+        return None
+    return label, amount
+
+
+def parse_receipt(results):
+    """
+    Extrait les articles d'un ticket à partir des boîtes easyocr.
+
+    Le prix est pris en fin de ligne (aligné à droite), les lignes de total,
+    TVA, paiement... sont écartées via la liste noire de utils.helpers.
+
+    Returns:
+        list[dict] - [{"label": ..., "amount": ..., "description": ...}]
+    """
+    lines = [' '.join(line) for line in group_lines(results)]
+
+    items = []
+    for line in clean_receipt_lines(lines):
+        parsed = parse_line(line)
+        if parsed:
+            label, amount = parsed
+            items.append({
+                "label": label,
+                "amount": amount,
+                "description": label
+            })
+    return items
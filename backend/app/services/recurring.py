@@ -0,0 +1,356 @@
+# app/services/recurring.py
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+from app.models.transaction import Transaction, RecurringTransaction
+from app.services.transaction_events import on_transactions_written
+from app.utils.stats import group_median
+import numpy as np
+import os
+import re
+import unicodedata
+
+# Historique analysé: 2 ans + marge pour détecter les échéances annuelles
+RECURRING_HISTORY_DAYS = int(os.getenv("RECURRING_HISTORY_DAYS", "800"))
+# Nombre minimal d'occurrences pour considérer une opération comme récurrente
+MIN_OCCURRENCES = 3
+# Part minimale d'intervalles réguliers et de montants proches de la médiane
+MIN_REGULARITY = 0.75
+# Écart de montant toléré par rapport à la médiane (10 %)
+AMOUNT_TOLERANCE = 0.10
+
+# Périodes reconnues: (nom, intervalle moyen en jours, tolérance en jours, mois)
+PERIODS = [
+    ("weekly", 7, 2, 0),
+    ("biweekly", 14, 3, 0),
+    ("monthly", 30.44, 3, 1),
+    ("quarterly", 91.3, 7, 3),
+    ("yearly", 365.25, 10, 12),
+]
+_PERIOD_DAYS = np.array([period[1] for period in PERIODS])
+_PERIOD_TOLERANCE = np.array([period[2] for period in PERIODS])
+_PERIOD_MONTHS = {name: months for name, _, _, months in PERIODS}
+_PERIOD_TOLERANCE_DAYS = {name: tolerance for name, _, tolerance, _ in PERIODS}
+# Champs d'une série existante rafraîchis par la détection
+_DETECTED_STATISTICS = ("period", "occurrences", "last_date", "next_date")
+# Ordinal du 1970-01-01, origine des datetime64 NumPy
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def normalize_description(description: str) -> str:
+    """
+    Clé de regroupement d'une description: minuscules, sans accents, sans
+    chiffres (dates, numéros de prélèvement) ni ponctuation.
+    "NETFLIX.COM 12/03" et "Netflix.com 14/04" -> "netflix com"
+    """
+    text = unicodedata.normalize("NFKD", description.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^a-z]+", " ", text).split())
+
+
+def add_months(day: date, months: int, anchor_day: Optional[int] = None) -> date:
+    """Même jour (anchor_day) `months` mois plus tard, borné à la fin du mois"""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(anchor_day or day.day, monthrange(year, month)[1]))
+
+
+def next_occurrence(day: date, period: str, anchor_day: Optional[int] = None) -> date:
+    months = _PERIOD_MONTHS[period]
+    if months:
+        return add_months(day, months, anchor_day)
+    return day + timedelta(days=7 if period == "weekly" else 14)
+
+
+def detect_recurring(history: Dict[str, np.ndarray], today: date) -> List[dict]:
+    """
+    Détecte les opérations récurrentes de plusieurs utilisateurs à la fois.
+
+    Les opérations sont regroupées par (utilisateur, type, description
+    normalisée), triées une seule fois par (groupe, date); les intervalles
+    entre occurrences successives et les statistiques par groupe (médianes,
+    régularité) sont calculés par des passes vectorisées, sans comparaison
+    deux à deux.
+
+    Args:
+        history: tableaux alignés "user_id", "day" (ordinal), "description",
+            "amount", "is_expense", "category"
+    """
+    n = len(history["amount"])
+    if n == 0:
+        return []
+
+    # Normalisation faite une fois par description distincte
+    descriptions, description_codes = np.unique(history["description"], return_inverse=True)
+    normalized = np.array([normalize_description(str(d)) for d in descriptions], dtype=object)
+    patterns, pattern_of_description = np.unique(normalized, return_inverse=True)
+    pattern_codes = pattern_of_description[description_codes].astype(np.int64)
+
+    valid = patterns[pattern_codes] != ""
+    user_ids = history["user_id"].astype(np.int64)
+    keys = (user_ids * 2 + history["is_expense"]) * len(patterns) + pattern_codes
+    keys[~valid] = -1
+    group_keys, groups = np.unique(keys, return_inverse=True)
+    n_groups = len(group_keys)
+
+    order = np.lexsort((history["day"], groups))
+    groups = groups[order]
+    days = history["day"][order].astype(np.int64)
+    amounts = history["amount"][order].astype(np.float64)
+
+    counts = np.bincount(groups, minlength=n_groups)
+    last = np.cumsum(counts) - 1
+
+    # Intervalles entre occurrences successives d'un même groupe (hors doublons du jour)
+    same_group = groups[1:] == groups[:-1]
+    intervals = (days[1:] - days[:-1])[same_group]
+    interval_groups = groups[1:][same_group]
+    distinct_days = intervals > 0
+    intervals, interval_groups = intervals[distinct_days], interval_groups[distinct_days]
+    interval_counts = np.bincount(interval_groups, minlength=n_groups)
+
+    # Période la plus proche de l'intervalle médian
+    median_interval = group_median(intervals.astype(np.float64), interval_groups, n_groups)
+    distance = np.abs(median_interval[:, None] - _PERIOD_DAYS[None, :])
+    period_index = np.argmin(np.nan_to_num(distance, nan=np.inf), axis=1)
+    period_matches = distance[np.arange(n_groups), period_index] <= _PERIOD_TOLERANCE[period_index]
+
+    period_days = _PERIOD_DAYS[period_index]
+    tolerance = _PERIOD_TOLERANCE[period_index]
+    regular = np.abs(intervals - period_days[interval_groups]) <= tolerance[interval_groups]
+    regularity = np.bincount(interval_groups, weights=regular, minlength=n_groups) / np.maximum(interval_counts, 1)
+
+    median_amount = group_median(amounts, groups, n_groups)
+    close_amount = np.abs(amounts - median_amount[groups]) <= AMOUNT_TOLERANCE * np.abs(median_amount[groups])
+    amount_stability = np.bincount(groups, weights=close_amount, minlength=n_groups) / np.maximum(counts, 1)
+
+    # Une série interrompue depuis plus d'une période et demie n'est plus active
+    fresh = today.toordinal() - days[last] <= period_days * 1.5 + tolerance
+
+    selected = np.flatnonzero(
+        (group_keys >= 0)
+        & (interval_counts + 1 >= MIN_OCCURRENCES)
+        & period_matches
+        & (regularity >= MIN_REGULARITY)
+        & (amount_stability >= MIN_REGULARITY)
+        & fresh
+    )
+    if selected.size == 0:
+        return []
+
+    # Jour du mois habituel (médiane arrondie au-dessus: les échéances de fin
+    # de mois bornées à 30 ou 28 tirent la médiane vers le bas)
+    calendar_days = (days - _EPOCH_ORDINAL).astype("datetime64[D]")
+    day_of_month = (calendar_days - calendar_days.astype("datetime64[M]")).astype(np.float64) + 1
+    anchor_days = group_median(day_of_month, groups, n_groups)
+
+    rows = order[last[selected]]
+    detected = []
+    for group, row in zip(selected, rows):
+        period = PERIODS[period_index[group]][0]
+        last_date = date.fromordinal(int(days[last[group]]))
+        anchor_day = int(np.ceil(anchor_days[group])) if _PERIOD_MONTHS[period] else None
+        detected.append({
+            "user_id": int(user_ids[row]),
+            "pattern": str(patterns[pattern_codes[row]]),
+            "description": str(history["description"][row]),
+            "amount": round(float(amounts[last[group]]), 2),
+            "type": "expense" if history["is_expense"][row] else "income",
+            "category": str(history["category"][row]),
+            "period": period,
+            "anchor_day": anchor_day,
+            "occurrences": int(counts[group]),
+            "last_date": last_date,
+            "next_date": next_occurrence(last_date, period, anchor_day),
+        })
+    return detected
+
+
+def load_history(db: Session, first_user_id: int, last_user_id: int, since: date) -> Dict[str, np.ndarray]:
+    """Historique des utilisateurs [first_user_id, last_user_id] en tableaux NumPy"""
+    rows = db.execute(
+        select(
+            Transaction.user_id, Transaction.date, Transaction.description,
+            Transaction.amount, Transaction.type, Transaction.category
+        ).where(
+            Transaction.user_id.between(first_user_id, last_user_id),
+            Transaction.date >= since
+        )
+    ).all()
+
+    count = len(rows)
+    user_ids, days, descriptions, amounts, types, categories = zip(*rows) if rows else ([],) * 6
+    return {
+        "user_id": np.fromiter(user_ids, dtype=np.int64, count=count),
+        "day": np.fromiter((d.toordinal() for d in days), dtype=np.int64, count=count),
+        "description": np.array(descriptions, dtype=object),
+        "amount": np.asarray(amounts, dtype=np.float64),
+        "is_expense": np.fromiter((str(getattr(t, "value", t)) == "expense" for t in types), dtype=bool, count=count),
+        "category": np.array(categories, dtype=object),
+    }
+
+
+def save_recurring(db: Session, user_ids: Sequence[int], detected: List[dict], today: date) -> int:
+    """
+    Enregistre les séries détectées (insertions et mises à jour groupées).
+
+    Une série existante garde son statut actif/inactif, son jour d'échéance,
+    son montant, sa catégorie et son libellé; seules ses statistiques sont
+    mises à jour, et sa prochaine échéance ne recule jamais (déjà matérialisée).
+    Une nouvelle série commence à la première échéance après aujourd'hui.
+    Le commit est fait par l'appelant.
+    """
+    if not detected:
+        return 0
+
+    existing = {
+        (row.user_id, row.pattern, str(getattr(row.type, "value", row.type))): row
+        for row in db.execute(
+            select(
+                RecurringTransaction.id, RecurringTransaction.user_id, RecurringTransaction.pattern,
+                RecurringTransaction.type, RecurringTransaction.next_date
+            ).where(RecurringTransaction.user_id.in_(list(user_ids)))
+        )
+    }
+
+    inserts, updates = [], []
+    for series in detected:
+        current = existing.get((series["user_id"], series["pattern"], series["type"]))
+        if current is None:
+            next_date = series["next_date"]
+            while next_date <= today:
+                next_date = next_occurrence(next_date, series["period"], series["anchor_day"])
+            inserts.append({**series, "next_date": next_date, "active": True})
+        else:
+            # Statistiques seulement: montant, catégorie et libellé peuvent
+            # avoir été corrigés par l'utilisateur (PATCH /recurring/{id})
+            values = {key: series[key] for key in _DETECTED_STATISTICS}
+            values["next_date"] = max(current.next_date, series["next_date"])
+            updates.append({"id": current.id, **values})
+
+    if inserts:
+        db.execute(insert(RecurringTransaction), inserts)
+    if updates:
+        db.execute(update(RecurringTransaction), updates)
+    return len(inserts) + len(updates)
+
+
+def detect_for_users(db: Session, first_user_id: int, last_user_id: int,
+                     today: Optional[date] = None) -> int:
+    """Détection et enregistrement pour une plage d'utilisateurs (sans commit)"""
+    today = today or date.today()
+    history = load_history(db, first_user_id, last_user_id, today - timedelta(days=RECURRING_HISTORY_DAYS))
+    detected = detect_recurring(history, today)
+    user_ids = {series["user_id"] for series in detected}
+    return save_recurring(db, user_ids, detected, today)
+
+
+def load_existing(db: Session, due: Sequence[RecurringTransaction], today: date) -> Dict[tuple, List[list]]:
+    """
+    Transactions déjà présentes autour des échéances à matérialiser, par
+    (utilisateur, type, description normalisée): [[jour, montant], ...]
+    """
+    margin = timedelta(days=max(_PERIOD_TOLERANCE_DAYS.values()))
+    rows = db.execute(
+        select(
+            Transaction.user_id, Transaction.date, Transaction.description,
+            Transaction.amount, Transaction.type
+        ).where(
+            Transaction.user_id.in_({series.user_id for series in due}),
+            Transaction.date >= min(series.next_date for series in due) - margin,
+            Transaction.date <= today + margin
+        )
+    ).all()
+    existing = defaultdict(list)
+    for user_id, day, description, amount, transaction_type in rows:
+        key = (user_id, str(getattr(transaction_type, "value", transaction_type)), normalize_description(description))
+        existing[key].append([day, float(amount)])
+    return existing
+
+
+def _take_match(candidates: List[list], occurrence: date, amount: float, period: str) -> Optional[date]:
+    """
+    Retire et retourne la date de la transaction correspondant à l'échéance
+    (montant à AMOUNT_TOLERANCE près, date à la tolérance de la période
+    près, la plus proche), None s'il n'y en a pas.
+    """
+    window = _PERIOD_TOLERANCE_DAYS[period]
+    matches = [
+        candidate for candidate in candidates
+        if abs((candidate[0] - occurrence).days) <= window
+        and abs(candidate[1] - amount) <= AMOUNT_TOLERANCE * abs(amount)
+    ]
+    if not matches:
+        return None
+    match = min(matches, key=lambda candidate: abs((candidate[0] - occurrence).days))
+    # Une transaction ne couvre qu'une échéance
+    candidates.remove(match)
+    return match[0]
+
+
+def materialize_due(db: Session, today: Optional[date] = None, limit: int = 1000) -> int:
+    """
+    Crée les transactions des séries actives arrivées à échéance.
+
+    Traite au plus `limit` séries: les transactions existantes autour des
+    échéances sont lues en une requête, les nouvelles insérées en une autre,
+    les séries avancées en une troisième, et les compteurs de dépenses mis
+    à jour une fois par utilisateur. Une échéance déjà présente (saisie
+    manuelle, import bancaire: même description normalisée, montant proche,
+    date dans la tolérance de la période) n'est pas créée une seconde fois.
+    Les séries sélectionnées sont verrouillées (SKIP LOCKED sur PostgreSQL)
+    pour que deux exécutions concurrentes ne créent pas de doublons. Le
+    commit est fait par l'appelant.
+
+    Returns:
+        Nombre de séries traitées (0 quand il n'y a plus rien à faire)
+    """
+    today = today or date.today()
+    due = db.execute(
+        select(RecurringTransaction).where(
+            RecurringTransaction.active.is_(True),
+            RecurringTransaction.next_date <= today
+        ).order_by(RecurringTransaction.id).limit(limit).with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not due:
+        return 0
+
+    existing = load_existing(db, due, today)
+    transactions, series_updates = [], []
+    changes = defaultdict(list)
+    for series in due:
+        transaction_type = str(getattr(series.type, "value", series.type))
+        candidates = existing.get((series.user_id, transaction_type, series.pattern), [])
+        occurrence, seen = series.next_date, 0
+        # Rattrapage si le job n'a pas tourné pendant plusieurs échéances
+        while occurrence <= today:
+            last_date = _take_match(candidates, occurrence, float(series.amount), series.period)
+            if last_date is None:
+                transactions.append({
+                    "user_id": series.user_id,
+                    "description": series.description,
+                    "amount": series.amount,
+                    "type": transaction_type,
+                    "category": series.category,
+                    "date": occurrence,
+                })
+                changes[series.user_id].append((1, transaction_type, series.category, occurrence, series.amount))
+                last_date = occurrence
+            seen += 1
+            occurrence = next_occurrence(occurrence, series.period, series.anchor_day)
+        series_updates.append({
+            "id": series.id,
+            "last_date": max(series.last_date, last_date),
+            "next_date": occurrence,
+            "occurrences": series.occurrences + seen,
+        })
+
+    if transactions:
+        db.execute(insert(Transaction), transactions)
+    db.execute(update(RecurringTransaction), series_updates)
+    for user_id, user_changes in changes.items():
+        on_transactions_written(db, user_id, "created", [], user_changes)
+    return len(due)
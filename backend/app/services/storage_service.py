@@ -0,0 +1,84 @@
+# app/services/storage_service.py
+from fastapi import UploadFile, HTTPException
+from typing import Tuple
+import hashlib
+import mimetypes
+import os
+import tempfile
+
+# Dossier de stockage des tickets, adressé par contenu (SHA-256)
+RECEIPTS_DIR = os.getenv("RECEIPTS_DIR", os.path.join("storage", "receipts"))
+# Taille maximale d'un ticket envoyé (10 Mo par défaut)
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(10 * 1024 * 1024)))
+# Taille des morceaux lus depuis la requête
+CHUNK_SIZE = 1024 * 1024
+
+
+def path_for(digest: str, content_type: str) -> str:
+    """Chemin du fichier pour une empreinte donnée: <dir>/ab/cd/abcd....jpg"""
+    extension = mimetypes.guess_extension(content_type or "") or ""
+    return os.path.join(RECEIPTS_DIR, digest[:2], digest[2:4], digest + extension)
+
+
+async def save_upload(file: UploadFile) -> Tuple[str, str, int]:
+    """
+    Écrit l'upload sur disque par morceaux en calculant son empreinte.
+
+    La mémoire utilisée reste bornée par CHUNK_SIZE quelle que soit la
+    taille du fichier. Lève une 413 si MAX_UPLOAD_SIZE est dépassée.
+
+    Retourne (chemin, sha256, taille).
+    """
+    os.makedirs(RECEIPTS_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=RECEIPTS_DIR, suffix=".part")
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_UPLOAD_SIZE:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Fichier trop volumineux (max {MAX_UPLOAD_SIZE // (1024 * 1024)} Mo)"
+                    )
+                hasher.update(chunk)
+                out.write(chunk)
+
+        digest = hasher.hexdigest()
+        final_path = path_for(digest, file.content_type)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        # Même contenu -> même chemin : un re-upload remplace un fichier identique
+        os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return final_path, digest, size
+
+
+def is_storage_path(path: str) -> bool:
+    """Vrai si path désigne un emplacement DANS le dossier de stockage (existant ou non)"""
+    root = os.path.realpath(RECEIPTS_DIR)
+    return os.path.realpath(path).startswith(root + os.sep)
+
+
+def is_stored_file(path: str) -> bool:
+    """Vrai si path est un fichier existant DANS le dossier de stockage"""
+    if not path:
+        return False
+    # file_path peut venir du client (TicketCreate): ne jamais lire hors du stockage
+    return is_storage_path(path) and os.path.isfile(os.path.realpath(path))
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 d'un fichier stocké, lu par morceaux"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
@@ -0,0 +1,114 @@
+# app/services/ticket_service.py
+from collections import Counter
+from datetime import date
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.transaction import Transaction
+from app.models.user import Ticket, TicketItem
+from app.services.classification import classify_descriptions
+from app.services.transaction_events import on_transactions_written
+
+
+def build_items(items: List[dict], start: int = 0) -> List[TicketItem]:
+    """Crée les lignes ticket_items à partir des items OCR [{"label", "amount"}]"""
+    return [
+        TicketItem(position=start + index, label=item["label"][:255], amount=item["amount"])
+        for index, item in enumerate(items)
+    ]
+
+
+def items_to_dict(items: List[TicketItem]) -> List[dict]:
+    """Format attendu par le frontend: [{"label": ..., "amount": ...}]"""
+    return [{"label": item.label, "amount": float(item.amount)} for item in items]
+
+
+def replace_unprocessed_items(db: Session, ticket: Ticket, items: List[dict]) -> None:
+    """
+    Remplace les articles non traités d'un ticket après un nouvel OCR.
+
+    Les articles déjà transformés en transaction sont conservés et ne sont
+    pas recréés s'ils sont relus à l'identique.
+    """
+    db.query(TicketItem).filter(
+        TicketItem.ticket_id == ticket.id,
+        TicketItem.processed.is_(False)
+    ).delete(synchronize_session=False)
+
+    processed = db.query(TicketItem.position, TicketItem.label, TicketItem.amount).filter(
+        TicketItem.ticket_id == ticket.id
+    ).all()
+    already_done = Counter((label, round(float(amount), 2)) for _, label, amount in processed)
+    start = max((position for position, _, _ in processed), default=-1) + 1
+
+    remaining = []
+    for item in items:
+        key = (item["label"][:255], round(float(item["amount"]), 2))
+        if already_done[key] > 0:
+            already_done[key] -= 1
+        else:
+            remaining.append(item)
+
+    for item in build_items(remaining, start):
+        item.ticket_id = ticket.id
+        db.add(item)
+    db.expire(ticket, ["items"])
+
+
+def materialize_items(db: Session, ticket: Ticket, item_ids: Optional[List[int]] = None,
+                      day: Optional[date] = None) -> Tuple[int, List[Transaction]]:
+    """
+    Transforme des articles d'un ticket en transactions (dépenses).
+
+    Les articles non traités (tous, ou ceux de item_ids) sont classés en un
+    seul appel au modèle, insérés ensemble, puis marqués traités en une
+    requête. Le ticket doit avoir été verrouillé par l'appelant (FOR UPDATE):
+    deux appels concurrents ne peuvent pas créer deux fois le même article.
+    Un nouvel appel ne recrée rien (articles déjà traités ignorés).
+    Le commit est fait par l'appelant.
+
+    Returns:
+        (nombre de transactions créées, transactions des articles demandés)
+    """
+    query = db.query(TicketItem).filter(TicketItem.ticket_id == ticket.id)
+    if item_ids is not None:
+        query = query.filter(TicketItem.id.in_(item_ids))
+    items = query.order_by(TicketItem.position).all()
+    if item_ids is not None and len(items) != len(set(item_ids)):
+        raise ValueError("Items inconnus pour ce ticket")
+
+    pending = [item for item in items if not item.processed]
+    day = day or (ticket.transaction.date if ticket.transaction else date.today())
+    categories = classify_descriptions(db, ticket.user_id, [item.label for item in pending])
+    created = [
+        Transaction(
+            user_id=ticket.user_id,
+            description=item.label,
+            amount=item.amount,
+            type="expense",
+            category=category,
+            date=day,
+            tickets=[]
+        )
+        for item, category in zip(pending, categories)
+    ]
+
+    # Articles déjà traités par un appel précédent: transactions existantes
+    previous_ids = [item.transaction_id for item in items if item.processed and item.transaction_id]
+    previous = db.query(Transaction).filter(
+        Transaction.id.in_(previous_ids),
+        Transaction.user_id == ticket.user_id
+    ).all() if previous_ids else []
+
+    if created:
+        db.add_all(created)
+        # Flush inclus: les ids des nouvelles transactions sont connus ensuite
+        on_transactions_written(db, ticket.user_id, "created", created, [
+            (1, "expense", t.category, t.date, t.amount) for t in created
+        ])
+        # Écrits au commit en un seul UPDATE groupé (executemany)
+        for item, transaction in zip(pending, created):
+            item.processed = True
+            item.transaction_id = transaction.id
+
+    by_id = {t.id: t for t in [*previous, *created]}
+    return len(created), [by_id[item.transaction_id] for item in items if item.transaction_id in by_id]
@@ -0,0 +1,94 @@
+# app/services/token_revocation.py
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+from sqlalchemy.orm import Session
+from app.models.user import RevokedToken
+import threading
+import time
+import os
+
+# Délai maximal de propagation d'une révocation aux autres workers
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "2"))
+# Chevauchement des lectures incrémentales (commits concurrents plus lents)
+_REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+def _timestamp(value: datetime) -> float:
+    """Timestamp POSIX, les dates sans fuseau étant considérées en UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class RevocationCache:
+    """
+    Copie en mémoire de la table revoked_tokens.
+
+    Un token n'est révoqué que jusqu'à son expiration (30 min par défaut):
+    l'ensemble reste petit et un simple dict jti -> expiration suffit, la
+    vérification "non révoqué" ne coûte qu'une recherche par hachage.
+    Les nouvelles révocations sont relues au plus toutes les
+    REVOCATION_REFRESH_SECONDS, uniquement celles postérieures à la
+    dernière lecture.
+    """
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        self._last_seen = None  # revoked_at le plus récent déjà chargé
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, db: Session, jti: str) -> bool:
+        self.refresh_if_due(db)
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        self._revoked[jti] = _timestamp(expires_at)
+
+    def refresh_if_due(self, db: Session) -> None:
+        if time.monotonic() < self._next_refresh:
+            return
+        # Un seul thread relit la table, les autres utilisent l'état actuel
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._refresh(db)
+            self._next_refresh = time.monotonic() + REVOCATION_REFRESH_SECONDS
+        finally:
+            self._lock.release()
+
+    def _refresh(self, db: Session) -> None:
+        query = db.query(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at)
+        if self._last_seen is None:
+            query = query.filter(RevokedToken.expires_at > datetime.now(timezone.utc))
+        else:
+            query = query.filter(RevokedToken.revoked_at >= self._last_seen - _REFRESH_OVERLAP)
+
+        now = time.time()
+        revoked = {jti: expires for jti, expires in self._revoked.items() if expires > now}
+        last_seen = self._last_seen
+        for jti, expires_at, revoked_at in query.all():
+            revoked[jti] = _timestamp(expires_at)
+            if last_seen is None or _timestamp(revoked_at) > _timestamp(last_seen):
+                last_seen = revoked_at
+
+        self._revoked = revoked
+        if last_seen is not None:
+            self._last_seen = last_seen
+        elif self._last_seen is None:
+            # Table vide: les prochaines lectures ne portent que sur les nouveautés
+            self._last_seen = datetime.now(timezone.utc)
+
+
+revocation_cache = RevocationCache()
+
+
+def revoke_token(db: Session, jti: str, user_id: int, expires_at: datetime) -> None:
+    """Révoque un token jusqu'à son expiration et purge les révocations expirées"""
+    db.query(RevokedToken).filter(
+        RevokedToken.expires_at < datetime.now(timezone.utc)
+    ).delete(synchronize_session=False)
+    db.merge(RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at))
+    db.commit()
+    revocation_cache.add(jti, expires_at)
@@ -0,0 +1,67 @@
+# app/services/transaction_events.py
+from collections import defaultdict
+from typing import Iterable, List
+from sqlalchemy.orm import Session
+from app.db.routing import session_router
+from app.models.transaction import Transaction
+from app.services.budget_alerts import SpendingChange, record_spending, month_start
+from app.services.event_bus import queue_event, on_commit
+from app.services.forecast import forecast_cache
+
+
+def transaction_to_event(transaction: Transaction) -> dict:
+    return {
+        "id": transaction.id,
+        "description": transaction.description,
+        "amount": round(float(transaction.amount), 2),
+        "type": str(getattr(transaction.type, "value", transaction.type)),
+        "category": transaction.category,
+        "date": transaction.date.isoformat()
+    }
+
+
+def totals_deltas(changes: Iterable[SpendingChange]) -> List[dict]:
+    """Variations des totaux du dashboard (revenus, dépenses, nombre) par mois"""
+    months = defaultdict(lambda: {"income": 0.0, "expenses": 0.0, "transaction_count": 0})
+    for sign, transaction_type, _, day, amount in changes:
+        totals = months[month_start(day).strftime("%Y-%m")]
+        key = "expenses" if transaction_type == "expense" else "income"
+        totals[key] = round(totals[key] + sign * float(amount), 2)
+        totals["transaction_count"] += sign
+    return [
+        {"month": month, **totals}
+        for month, totals in sorted(months.items())
+        if totals["income"] or totals["expenses"] or totals["transaction_count"]
+    ]
+
+
+def on_transactions_written(db: Session, user_id: int, action: str,
+                            transactions: List[Transaction],
+                            changes: List[SpendingChange]) -> None:
+    """
+    Point d'entrée commun des écritures de transactions (avant le commit).
+
+    Met à jour les compteurs de dépenses / alertes de budget et prépare les
+    événements poussés aux dashboards ouverts:
+      - transaction_<action> (created, updated, deleted)
+      - totals_delta: variation des totaux par mois
+      - budget_status / budget_alert (via record_spending)
+    Après le commit, les prévisions en cache de l'utilisateur sont
+    invalidées et ses lectures repassent sur le primaire (lecture de ses
+    propres écritures, voir app.db.routing).
+    Les écritures groupées (sans objets ORM) passent une liste vide de
+    transactions: seuls les totaux et les budgets sont alors publiés.
+    """
+    record_spending(db, user_id, changes)
+    on_commit(db, lambda: forecast_cache.invalidate(user_id))
+    on_commit(db, lambda: session_router.mark_write(user_id))
+    # Les ids des nouvelles transactions sont nécessaires aux événements
+    db.flush()
+
+    if transactions:
+        queue_event(db, user_id, f"transaction_{action}", {
+            "transactions": [transaction_to_event(t) for t in transactions]
+        })
+    deltas = totals_deltas(changes)
+    if deltas:
+        queue_event(db, user_id, "totals_delta", {"months": deltas})
@@ -0,0 +1,106 @@
+# app/services/transaction_rows.py
+"""
+Lecture des transactions et de leurs tickets en lignes SQL brutes (Core),
+converties en dictionnaires au format de TransactionResponse.
+
+Une seule requête par liste: les transactions sélectionnées (sous-requête,
+éventuellement paginée) jointes à leurs tickets, regroupées en Python. Pas
+d'objets ORM ni de validation Pydantic par ligne.
+"""
+from typing import Any, Dict, List, Sequence
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from app.models.transaction import Transaction
+from app.models.user import Ticket
+
+table = Transaction.__table__
+tickets = Ticket.__table__
+
+# Dans l'ordre des champs de TransactionResponse et TicketResponse
+TRANSACTION_COLUMNS = (
+    table.c.description, table.c.amount, table.c.type, table.c.category, table.c.date,
+    table.c.id, table.c.user_id, table.c.created_at, table.c.updated_at,
+    table.c.is_anomaly, table.c.anomaly_score,
+)
+TICKET_COLUMNS = (
+    tickets.c.type, tickets.c.file_path, tickets.c.id, tickets.c.user_id,
+    tickets.c.transaction_id, tickets.c.data, tickets.c.size, tickets.c.created_at,
+)
+_TICKET_LABELS = tuple(f"ticket_{column.name}" for column in TICKET_COLUMNS)
+TRANSACTION_FIELDS = tuple(column.name for column in TRANSACTION_COLUMNS)
+TICKET_FIELDS = tuple(column.name for column in TICKET_COLUMNS)
+_ID = TRANSACTION_FIELDS.index("id")
+_TICKET_ID = TICKET_FIELDS.index("id")
+
+
+def transaction_select(user_id: int) -> Select:
+    """Transactions de l'utilisateur, à compléter (filtres, tri, pagination)"""
+    return select(*TRANSACTION_COLUMNS).where(table.c.user_id == user_id)
+
+
+def fetch_rows(db: Session, statement: Select, order_desc: Sequence[str] = ()) -> list:
+    """
+    Lignes de `statement` jointes à leurs tickets (une ligne par ticket,
+    une seule sans ticket). order_desc: colonnes de `statement` qui
+    ordonnent le résultat (décroissant).
+    """
+    page = statement.subquery("page")
+    joined = select(page, *(column.label(label) for column, label in zip(TICKET_COLUMNS, _TICKET_LABELS)))
+    joined = joined.select_from(page.outerjoin(tickets, tickets.c.transaction_id == page.c.id))
+    if order_desc:
+        joined = joined.order_by(*(page.c[name].desc() for name in order_desc))
+    return db.execute(joined).all()
+
+
+def group_transactions(rows: list) -> List[Dict[str, Any]]:
+    """Une entrée par transaction (ordre des lignes conservé), tickets regroupés"""
+    # Accès par position (les tickets sont en fin de ligne): l'accès par nom
+    # aux colonnes d'une Row domine le temps de conversion sur des milliers de lignes
+    width, ticket_width = len(TRANSACTION_FIELDS), len(TICKET_FIELDS)
+    transactions: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        transaction = transactions.get(row[_ID])
+        if transaction is None:
+            transaction = transactions[row[_ID]] = dict(zip(TRANSACTION_FIELDS, row[:width]))
+            transaction["amount"] = float(transaction["amount"])
+            transaction["is_anomaly"] = bool(transaction["is_anomaly"])
+            transaction["tickets"] = []
+        ticket = row[-ticket_width:]
+        if ticket[_TICKET_ID] is not None:
+            transaction["tickets"].append(dict(zip(TICKET_FIELDS, ticket)))
+    return list(transactions.values())
+
+
+def fetch_transactions(db: Session, statement: Select) -> List[Dict[str, Any]]:
+    return group_transactions(fetch_rows(db, statement))
+
+
+def transaction_to_dict(transaction: Transaction) -> Dict[str, Any]:
+    """Même format pour une transaction ORM déjà chargée (tickets compris)"""
+    return {
+        "description": transaction.description,
+        "amount": float(transaction.amount),
+        "type": getattr(transaction.type, "value", transaction.type),
+        "category": transaction.category,
+        "date": transaction.date,
+        "id": transaction.id,
+        "user_id": transaction.user_id,
+        "created_at": transaction.created_at,
+        "updated_at": transaction.updated_at,
+        "is_anomaly": bool(transaction.is_anomaly),
+        "anomaly_score": transaction.anomaly_score,
+        "tickets": [
+            {
+                "type": ticket.type,
+                "file_path": ticket.file_path,
+                "id": ticket.id,
+                "user_id": ticket.user_id,
+                "transaction_id": ticket.transaction_id,
+                "data": ticket.data,
+                "size": ticket.size,
+                "created_at": ticket.created_at,
+            }
+            for ticket in transaction.tickets
+        ],
+    }
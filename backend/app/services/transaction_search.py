@@ -0,0 +1,128 @@
+# app/services/transaction_search.py
+"""
+Recherche dans les descriptions des transactions et pagination par curseur
+(keyset) de la liste des transactions.
+
+La recherche utilise l'index créé par app.db.search selon la base
+(trigrammes PostgreSQL, FTS5 SQLite, LIKE à défaut) et classe les
+résultats par pertinence. Le curseur encode la clé de tri de la dernière
+ligne renvoyée (pertinence ou date, puis id): chaque page est une lecture
+d'index, sans OFFSET, quelle que soit sa profondeur.
+"""
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import Float, Integer, and_, false, func, literal, or_, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from app.db.search import FTS5, FTS_TABLE, TRIGRAM, search_backend
+from app.models.transaction import Transaction
+from app.services.transaction_rows import fetch_rows, group_transactions
+import base64
+import json
+import os
+import re
+import unicodedata
+
+# Taille de page par défaut d'une recherche
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
+_LIGATURES = str.maketrans({"œ": "oe", "æ": "ae", "ß": "ss"})
+
+
+def normalize(term: str) -> str:
+    """Minuscules, sans accents ni ligatures, espaces réduits"""
+    decomposed = unicodedata.normalize("NFKD", term.lower().translate(_LIGATURES))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.split())
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def fts_query(term: str) -> str:
+    """Requête FTS5: tous les mots, chacun comme préfixe ("amaz"* "prim"*)"""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", term))
+
+
+def apply_search(query: Select, db: Session, search: str) -> Tuple[Select, Any]:
+    """
+    Restreint la requête aux transactions dont la description correspond à
+    `search`; retourne la requête et l'expression de pertinence (plus
+    grande = plus pertinente).
+    """
+    term = normalize(search)
+    backend = search_backend(db.get_bind())
+
+    if backend == TRIGRAM:
+        # Même expression que l'index ix_transactions_description_trgm
+        document = func.f_unaccent(func.lower(Transaction.description))
+        query = query.where(or_(
+            # Mots proches (fautes de frappe, préfixes): seuil pg_trgm.word_similarity_threshold
+            document.op("%>")(term),
+            document.like(_like_pattern(term), escape="\\")
+        ))
+        return query, func.word_similarity(term, document)
+
+    if backend == FTS5:
+        match = fts_query(term)
+        if not match:
+            return query.where(false()), literal(0.0)
+        matches = text(
+            f"SELECT rowid AS id, -bm25({FTS_TABLE}) AS rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+        ).bindparams(match=match).columns(id=Integer, rank=Float).subquery("search")
+        return query.join(matches, matches.c.id == Transaction.id), matches.c.rank
+
+    # Sans index: sous-chaîne, casse ignorée, pertinence uniforme
+    query = query.where(Transaction.description.ilike(_like_pattern(search.strip()), escape="\\"))
+    return query, literal(0.0)
+
+
+def encode_cursor(key: Any, transaction_id: int) -> str:
+    if isinstance(key, date):
+        key = key.isoformat()
+    raw = json.dumps([key, transaction_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, parse_key: Callable[[Any], Any]) -> Tuple[Any, int]:
+    """Lève ValueError si le curseur est invalide"""
+    try:
+        key, transaction_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return parse_key(key), int(transaction_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Curseur invalide: {e}")
+
+
+def keyset_page(db: Session, query: Select, key: Any, parse_key: Callable[[Any], Any],
+                cursor: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Page de `limit` transactions (avec leurs tickets) triées par (key, id)
+    décroissants, après `cursor`. Retourne les transactions et le curseur
+    de la page suivante (None pour la dernière page).
+    """
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, parse_key)
+        query = query.where(or_(key < last_key, and_(key == last_key, Transaction.id < last_id)))
+
+    # Une transaction de plus: indique s'il reste une page
+    query = query.add_columns(key.label("sort_key")).order_by(key.desc(), Transaction.id.desc()).limit(limit + 1)
+    rows = fetch_rows(db, query, ("sort_key", "id"))
+    transactions = group_transactions(rows)
+    next_cursor = None
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        last_id = transactions[-1]["id"]
+        last_key = next(row.sort_key for row in rows if row.id == last_id)
+        next_cursor = encode_cursor(last_key, last_id)
+    return transactions, next_cursor
+
+
+def parse_rank(value: Any) -> float:
+    return float(value)
+
+
+def parse_date(value: Any) -> date:
+    return date.fromisoformat(value)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la liste des transactions (GET /transactions) sur un gros
+historique.
+
+Compare, pour un utilisateur de --rows transactions (dont une sur
+--ticket-every avec un ticket):
+  - orm: objets ORM avec tickets chargés par jointure, validation par
+    TransactionResponse (from_attributes) puis json.dumps, comme le
+    response_model de FastAPI
+  - core: lignes SQL brutes (app.services.transaction_rows) encodées par
+    orjson (app.core.responses), le chemin actuel de l'endpoint
+
+et affiche la durée médiane (lecture + sérialisation) et le débit en
+transactions par seconde.
+
+Usage:
+    python benchmarks/bench_list_serialization.py --rows 10000 --repeat 10
+    python benchmarks/bench_list_serialization.py --database-url postgresql://...
+
+Sans --database-url, une base SQLite temporaire est utilisée.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.responses import dumps
+from app.models.transaction import Transaction
+from app.models.user import Ticket
+from app.schemas.transaction_schema import TransactionResponse
+from app.services.transaction_rows import fetch_transactions, transaction_select
+from datagen import seed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Débit de la liste des transactions (ORM + Pydantic vs Core + orjson)")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--rows", type=int, default=10000, help="Transactions de l'utilisateur")
+    parser.add_argument("--ticket-every", type=int, default=10, help="Un ticket toutes les N transactions")
+    parser.add_argument("--repeat", type=int, default=10)
+    return parser.parse_args()
+
+
+def add_tickets(engine, user_id, every):
+    with engine.begin() as connection:
+        ids = connection.execute(
+            select(Transaction.id).where(Transaction.user_id == user_id).order_by(Transaction.id)
+        ).scalars().all()
+        connection.execute(insert(Ticket), [
+            {"user_id": user_id, "transaction_id": transaction_id, "type": "image/jpeg",
+             "file_path": f"receipts/bench/{transaction_id}.jpg", "size": 120000,
+             "data": json.dumps({"raw_text": ["TOTAL 12.30"], "processed": True})}
+            for transaction_id in ids[::every]
+        ])
+
+
+def orm_list(engine, user_id):
+    adapter = TypeAdapter(list[TransactionResponse])
+    with Session(engine) as db:
+        transactions = db.query(Transaction).options(joinedload(Transaction.tickets)).filter(
+            Transaction.user_id == user_id
+        ).all()
+        content = adapter.dump_python(adapter.validate_python(transactions, from_attributes=True), mode="json")
+        return json.dumps(content).encode()
+
+
+def core_list(engine, user_id):
+    with Session(engine) as db:
+        return dumps(fetch_transactions(db, transaction_select(user_id)))
+
+
+def measure(function, engine, user_id, repeat):
+    function(engine, user_id)  # Préchauffage
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = function(engine, user_id)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations), len(body)
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-list-"), "bench.db")
+        database_url = f"sqlite:///{path}"
+    engine = create_engine(database_url)
+
+    print(f"Base: {engine.dialect.name}, {args.rows} transactions, un ticket toutes les {args.ticket_every}")
+    user_id = seed(engine, 1, args.rows, log=lambda message: None)[0]
+    add_tickets(engine, user_id, args.ticket_every)
+
+    results = {}
+    for name, function in (("orm", orm_list), ("core", core_list)):
+        duration, size = measure(function, engine, user_id, args.repeat)
+        results[name] = duration
+        print(f"  {name:5s} {duration * 1000:8.1f} ms  {args.rows / duration:10.0f} transactions/s  {size / 1e6:.1f} Mo")
+    print(f"  Gain: x{results['orm'] / results['core']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark de débit des connexions sous charge dashboard.
+
+Lance en parallèle des clients qui se connectent en boucle (/auth/login) et
+des clients qui lisent le dashboard (/api/dashboard/summary), puis affiche
+les connexions/s et les latences p50/p99 de chaque flux.
+
+Le serveur doit tourner (uvicorn app.main:app).
+
+Usage:
+    python benchmarks/bench_login.py --base-url http://127.0.0.1:8000 \\
+        --login-clients 20 --dashboard-clients 20 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import time
+import httpx
+
+API_PREFIX = "/api/v1"
+BENCH_EMAIL = "bench-login@example.com"
+BENCH_PASSWORD = "bench-password-123"
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def get_token(client):
+    credentials = {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}
+    response = await client.post(f"{API_PREFIX}/auth/register", json=credentials)
+    if response.status_code != 200:
+        response = await client.post(f"{API_PREFIX}/auth/login", json=credentials)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def login_worker(client, deadline, latencies, errors):
+    credentials = {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.post(f"{API_PREFIX}/auth/login", json=credentials)
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(response.status_code)
+
+
+async def dashboard_worker(client, token, deadline, latencies, errors):
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get(f"{API_PREFIX}/api/dashboard/summary", headers=headers)
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(response.status_code)
+
+
+def summarize(latencies, errors, duration):
+    return {
+        "requests": len(latencies),
+        "per_second": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        "errors": len(errors),
+    }
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.login_clients + args.dashboard_clients + 1)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        token = await get_token(client)
+
+        login_latencies, login_errors = [], []
+        dashboard_latencies, dashboard_errors = [], []
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(
+            *[login_worker(client, deadline, login_latencies, login_errors)
+              for _ in range(args.login_clients)],
+            *[dashboard_worker(client, token, deadline, dashboard_latencies, dashboard_errors)
+              for _ in range(args.dashboard_clients)],
+        )
+
+    print(json.dumps({
+        "login": summarize(login_latencies, login_errors, args.duration),
+        "dashboard": summarize(dashboard_latencies, dashboard_errors, args.duration),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--login-clients", type=int, default=20)
+    parser.add_argument("--dashboard-clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark du prétraitement d'image avant OCR.
+
+Compare, sur un jeu de tickets, la latence OCR et la précision de
+l'extraction des articles avec et sans prétraitement.
+
+Chaque image du dossier de fixtures (ticket.jpg, ticket.png, ...) doit être
+accompagnée d'un fichier ticket.json contenant les articles attendus :
+    [{"label": "PAIN", "amount": 1.20}, ...]
+
+Par défaut, les photos de benchmarks/fixtures/receipt_photos (générées par
+generate.py) sont utilisées. Le coût du prétraitement seul (durée, pixels
+envoyés à l'OCR) est toujours mesuré; la comparaison OCR demande les
+modèles easyocr (téléchargés au premier chargement du reader).
+
+Usage:
+    python benchmarks/bench_ocr_preprocessing.py [chemin/vers/fixtures] [--output resultats.json]
+"""
+import sys
+import os
+import io
+import json
+import time
+import argparse
+import difflib
+import statistics
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+from app.services.image_preprocessing import preprocess_receipt
+from app.services.ocr_service import read_receipt, get_reader
+from app.services.receipt_parser import parse_receipt
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "receipt_photos")
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def load_fixtures(directory):
+    fixtures = []
+    for name in sorted(os.listdir(directory)):
+        base, ext = os.path.splitext(name)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+        expected_path = os.path.join(directory, base + ".json")
+        if not os.path.exists(expected_path):
+            print(f"⚠️  {name}: pas de {base}.json, ignoré")
+            continue
+        with open(os.path.join(directory, name), "rb") as f:
+            image_bytes = f.read()
+        with open(expected_path, encoding="utf-8") as f:
+            expected = json.load(f)
+        fixtures.append((name, image_bytes, expected))
+    return fixtures
+
+
+def score_items(found, expected):
+    """Rappel : part des articles attendus retrouvés (même montant, libellé proche)"""
+    if not expected:
+        return 1.0
+    remaining = list(found)
+    hits = 0
+    for item in expected:
+        for candidate in remaining:
+            same_amount = abs(float(candidate["amount"]) - float(item["amount"])) < 0.01
+            ratio = difflib.SequenceMatcher(
+                None, candidate["label"].lower(), item["label"].lower()
+            ).ratio()
+            if same_amount and ratio >= 0.6:
+                hits += 1
+                remaining.remove(candidate)
+                break
+    return hits / len(expected)
+
+
+def run(fixtures, preprocess):
+    latencies, scores = [], []
+    for name, image_bytes, expected in fixtures:
+        start = time.perf_counter()
+        results = read_receipt(image_bytes, preprocess=preprocess)
+        latencies.append(time.perf_counter() - start)
+        scores.append(score_items(parse_receipt(results), expected))
+    return {
+        "mean_latency_s": round(statistics.mean(latencies), 3),
+        "max_latency_s": round(max(latencies), 3),
+        "mean_recall": round(statistics.mean(scores), 3),
+    }
+
+
+def run_preprocessing(fixtures):
+    """Coût du prétraitement et réduction de l'image envoyée à l'OCR"""
+    durations, reductions = [], []
+    for name, image_bytes, expected in fixtures:
+        image = Image.open(io.BytesIO(image_bytes))
+        start = time.perf_counter()
+        processed = preprocess_receipt(image)
+        durations.append(time.perf_counter() - start)
+        reductions.append((image.width * image.height) / (processed.width * processed.height))
+    return {
+        "mean_latency_s": round(statistics.mean(durations), 3),
+        "max_latency_s": round(max(durations), 3),
+        "mean_pixel_reduction": round(statistics.mean(reductions), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence et précision de l'OCR avec et sans prétraitement")
+    parser.add_argument("fixtures", nargs="?", default=DEFAULT_FIXTURES)
+    parser.add_argument("--output", default=None, help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print("❌ Aucun ticket trouvé")
+        sys.exit(1)
+
+    results = {"tickets": len(fixtures), "preprocessing": run_preprocessing(fixtures)}
+    try:
+        # Charger le modèle OCR avant de mesurer
+        get_reader()
+    except Exception as e:
+        results["ocr"] = {"error": f"Modèles easyocr indisponibles: {e}"}
+    else:
+        results["without_preprocessing"] = run(fixtures, preprocess=False)
+        results["with_preprocessing"] = run(fixtures, preprocess=True)
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
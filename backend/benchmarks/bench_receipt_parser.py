@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'extraction des articles d'un ticket.
+
+Compare l'ancienne regex sur le texte brut (extract_items) et l'analyse par
+lignes à partir des boîtes OCR (parse_receipt) :
+  - précision sur les tickets de fixtures/receipts (résultats easyocr enregistrés)
+  - temps d'analyse sur des tickets synthétiques de plus en plus longs
+
+Usage:
+    python benchmarks/bench_receipt_parser.py [dossier_fixtures]
+"""
+import sys
+import os
+import json
+import time
+import statistics
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ocr_service import extract_items, results_to_text
+from app.services.receipt_parser import parse_receipt
+from bench_ocr_preprocessing import score_items
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "receipts")
+
+
+def legacy_parse(results):
+    return extract_items(results_to_text(results))
+
+
+PARSERS = {"regex": legacy_parse, "layout": parse_receipt}
+
+
+def load_fixtures(directory):
+    fixtures = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                fixture = json.load(f)
+            fixtures.append((name, fixture["ocr"], fixture["items"]))
+    return fixtures
+
+
+def synthetic_receipt(lines):
+    """Ticket de `lines` articles: libellé à gauche, prix aligné à droite"""
+    results = []
+    for i in range(lines):
+        y = i * 30
+        results.append(([[20, y], [300, y], [300, y + 22], [20, y + 22]], f"ARTICLE NUMERO {i}", 0.9))
+        results.append(([[480, y + 1], [560, y + 1], [560, y + 23], [480, y + 23]], f"{i % 50 + 1},99", 0.9))
+    return results
+
+
+def time_parser(parser, results, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser(results)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_FIXTURES
+    fixtures = load_fixtures(directory)
+
+    report = {"accuracy": {}, "speed_ms": {}}
+    for parser_name, parser in PARSERS.items():
+        recalls = [score_items(parser(ocr), expected) for _, ocr, expected in fixtures]
+        report["accuracy"][parser_name] = {
+            "mean_recall": round(statistics.mean(recalls), 3) if recalls else None,
+            "per_ticket": {name: round(recall, 3) for (name, _, _), recall in zip(fixtures, recalls)},
+        }
+
+    for lines in (50, 500, 5000):
+        results = synthetic_receipt(lines)
+        report["speed_ms"][lines] = {
+            parser_name: round(time_parser(parser, results) * 1000, 2)
+            for parser_name, parser in PARSERS.items()
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la détection des opérations récurrentes.
+
+Génère un historique synthétique (loyer, salaire, abonnements, courses et
+achats aléatoires) pour un nombre croissant d'utilisateurs et mesure le temps
+de detect_recurring ainsi que la précision / le rappel des séries trouvées.
+
+Usage:
+    python benchmarks/bench_recurring.py [nombre_max_de_transactions]
+"""
+import sys
+import os
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.recurring import add_months, detect_recurring, normalize_description
+
+TODAY = date(2026, 6, 15)
+MONTHS = 24
+
+SERIES = [
+    # (description, montant, type, catégorie, période, jour)
+    ("LOYER APPARTEMENT", 850.0, "expense", "Factures", "monthly", 1),
+    ("VIREMENT SALAIRE ACME", 2400.0, "income", "Salaire", "monthly", 28),
+    ("NETFLIX.COM {}", 13.49, "expense", "Divertissement", "monthly", 12),
+    ("ASSURANCE HABITATION", 180.0, "expense", "Factures", "quarterly", 5),
+    ("CLUB SPORT {}", 9.0, "expense", "Santé", "weekly", None),
+]
+NOISE = [("CARREFOUR MARKET", "Nourriture"), ("SNCF", "Transport"), ("FNAC", "Achats"),
+         ("PHARMACIE", "Santé"), ("RESTAURANT", "Divertissement")]
+
+
+def generate(users, rng):
+    """Historique aléatoire + ensemble attendu {(user_id, pattern)}"""
+    columns = {"user_id": [], "day": [], "description": [], "amount": [], "is_expense": [], "category": []}
+    expected = set()
+    start = add_months(TODAY, -MONTHS)
+
+    def add(user_id, day, description, amount, transaction_type, category):
+        columns["user_id"].append(user_id)
+        columns["day"].append(day.toordinal())
+        columns["description"].append(description)
+        columns["amount"].append(amount)
+        columns["is_expense"].append(transaction_type == "expense")
+        columns["category"].append(category)
+
+    for user_id in range(1, users + 1):
+        for description, amount, transaction_type, category, period, anchor in SERIES:
+            if rng.random() < 0.3:
+                continue
+            expected.add((user_id, normalize_description(description.format(""))))
+            if period == "weekly":
+                dates = [start + timedelta(days=7 * i) for i in range(MONTHS * 52 // 12)]
+            else:
+                step = 3 if period == "quarterly" else 1
+                dates = [add_months(start, i, anchor) for i in range(0, MONTHS, step)]
+            for day in dates:
+                if day > TODAY:
+                    break
+                jitter = timedelta(days=int(rng.integers(-1, 2)))
+                add(user_id, day + jitter, description.format(day.strftime("%d/%m")),
+                    round(amount * (1 + rng.normal(0, 0.01)), 2), transaction_type, category)
+        for _ in range(int(rng.integers(60, 120))):
+            description, category = NOISE[int(rng.integers(len(NOISE)))]
+            day = start + timedelta(days=int(rng.integers(0, (TODAY - start).days)))
+            add(user_id, day, description, round(float(rng.uniform(3, 150)), 2), "expense", category)
+
+    history = {
+        "user_id": np.array(columns["user_id"], dtype=np.int64),
+        "day": np.array(columns["day"], dtype=np.int64),
+        "description": np.array(columns["description"], dtype=object),
+        "amount": np.array(columns["amount"], dtype=np.float64),
+        "is_expense": np.array(columns["is_expense"], dtype=bool),
+        "category": np.array(columns["category"], dtype=object),
+    }
+    return history, expected
+
+
+def main():
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(42)
+
+    print(f"{'utilisateurs':>12} {'transactions':>12} {'temps (s)':>10} {'précision':>10} {'rappel':>8}")
+    users = 100
+    while True:
+        history, expected = generate(users, rng)
+        rows = len(history["amount"])
+        if rows > max_rows:
+            break
+        started = time.perf_counter()
+        detected = detect_recurring(history, TODAY)
+        elapsed = time.perf_counter() - started
+
+        found = {(series["user_id"], series["pattern"]) for series in detected}
+        precision = len(found & expected) / len(found) if found else 0.0
+        recall = len(found & expected) / len(expected) if expected else 0.0
+        print(f"{users:>12} {rows:>12} {elapsed:>10.2f} {precision:>10.1%} {recall:>8.1%}")
+        users *= 4
+
+
+if __name__ == "__main__":
+    main()
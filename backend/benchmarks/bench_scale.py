@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Benchmark des endpoints à différents volumes de données.
+
+Pour chaque volume (nombre total de transactions), la base est vidée puis
+remplie par datagen.py (graine fixe), et chaque endpoint est appelé en
+processus (TestClient) pour un utilisateur type. Le rapport JSON contient,
+par volume et par endpoint, les latences (p50/p95/max) et le nombre de
+requêtes SQL par appel, afin de comparer deux exécutions (--compare).
+
+Usage:
+    python benchmarks/bench_scale.py --database-url postgresql://... \\
+        --scales 10000,1000000,10000000 --output scale_report.json
+    python benchmarks/bench_scale.py --compare scale_report.json --output new_report.json
+
+Sans --database-url, une base SQLite temporaire est utilisée.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API = "/api/v1/api"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark des endpoints par volume de données")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--scales", default="10000,1000000,10000000",
+                        help="Nombres totaux de transactions, séparés par des virgules")
+    parser.add_argument("--transactions-per-user", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20, help="Appels mesurés par endpoint")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--ocr", action="store_true", help="Inclure /process_ticket (modèles easyocr requis)")
+    parser.add_argument("--output", default="scale_report.json")
+    parser.add_argument("--compare", default=None, help="Rapport précédent à comparer")
+    return parser.parse_args()
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def receipt_image(index):
+    """Ticket PNG synthétique, différent à chaque appel (pas de cache OCR)"""
+    from PIL import Image, ImageDraw
+    image = Image.new("L", (600, 400), 255)
+    draw = ImageDraw.Draw(image)
+    lines = ["SUPERMARCHE BENCH", f"Pain {1 + index % 7}.20", "Lait 1.15", f"Fromage {3 + index % 5}.90", "TOTAL 9.99"]
+    for i, line in enumerate(lines):
+        draw.text((40, 40 + 60 * i), line, fill=0)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def bulk_payload(index):
+    return [
+        {"description": f"Courses bench {index}-{i}", "amount": 12.5 + i, "type": "expense",
+         "date": date.today().isoformat()}
+        for i in range(50)
+    ]
+
+
+# nom -> (méthode, chemin appelé, route déclarée, fabrique du corps)
+ENDPOINTS = {
+    "transactions_list": ("GET", f"{API}/transactions", f"{API}/transactions", None),
+    "transactions_bulk": ("POST", f"{API}/transactions/bulk", f"{API}/transactions/bulk", bulk_payload),
+    "dashboard_summary": ("GET", f"{API}/dashboard/summary", f"{API}/dashboard/summary", None),
+    "budgets_status": ("GET", f"{API}/budgets/status", f"{API}/budgets/status", None),
+    "categories_analysis": ("GET", f"{API}/categories/analysis", f"{API}/categories/analysis", None),
+    "dashboard_bootstrap": ("GET", f"{API}/dashboard/bootstrap", f"{API}/dashboard/bootstrap", None),
+    "dashboard_forecast": ("GET", f"{API}/dashboard/forecast", f"{API}/dashboard/forecast", None),
+    "ocr": ("POST", "/api/v1/process_ticket", "/api/v1/process_ticket", receipt_image),
+}
+
+
+def measure(client, headers, name, requests):
+    from app.core.metrics import db_queries_per_request
+
+    method, path, route, body = ENDPOINTS[name]
+
+    def call(index):
+        if name == "ocr":
+            files = {"file": (f"bench-{index}.png", body(index), "image/png")}
+            return client.post(path, files=files, headers=headers)
+        if body is not None:
+            return client.request(method, path, json=body(index), headers=headers)
+        return client.request(method, path, headers=headers)
+
+    call(-1)  # Préchauffage (caches, import paresseux)
+    count_before, queries_before = db_queries_per_request.snapshot(route)
+    latencies, errors = [], 0
+    for index in range(requests):
+        started = time.perf_counter()
+        response = call(index)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            errors += 1
+    count_after, queries_after = db_queries_per_request.snapshot(route)
+    calls = count_after - count_before
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "queries_per_request": round((queries_after - queries_before) / calls, 1) if calls else None,
+    }
+
+
+def environment(engine):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "database": engine.dialect.name,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": commit,
+    }
+
+
+def compare(previous, current):
+    """Affiche l'évolution p50 et requêtes SQL par rapport au rapport précédent"""
+    before = {
+        (scale["rows"], name): result
+        for scale in previous["results"] for name, result in scale["endpoints"].items()
+    }
+    print(f"\n{'volume':>10} {'endpoint':<22} {'p50 avant':>10} {'p50 après':>10} {'écart':>8} {'SQL avant':>10} {'SQL après':>10}")
+    for scale in current["results"]:
+        for name, result in scale["endpoints"].items():
+            old = before.get((scale["rows"], name))
+            if not old:
+                continue
+            change = (result["p50_ms"] - old["p50_ms"]) / old["p50_ms"] if old["p50_ms"] else 0
+            print(f"{scale['rows']:>10} {name:<22} {old['p50_ms']:>10} {result['p50_ms']:>10} {change:>+8.0%} "
+                  f"{str(old['queries_per_request']):>10} {str(result['queries_per_request']):>10}")
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.gettempdir(), 'gbp_bench_scale.db')}"
+    # La configuration est lue à l'import de l'application
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("MODEL_PATH", os.path.join(BACKEND_DIR, "app", "ml_models", "pipeline.pkl"))
+    os.environ.setdefault("SLOW_REQUEST_SECONDS", "3600")
+    sys.path.insert(0, BACKEND_DIR)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.db.base import Base
+    from app.db.session import engine
+    from app.core.auth import create_access_token
+    from datagen import seed
+
+    endpoints = [name for name in ENDPOINTS if args.ocr or name != "ocr"]
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment(engine),
+        "parameters": {
+            "transactions_per_user": args.transactions_per_user,
+            "requests": args.requests,
+            "seed": args.seed,
+        },
+        "results": [],
+    }
+
+    client = TestClient(app)
+    for rows in (int(scale) for scale in args.scales.split(",")):
+        users = max(1, rows // args.transactions_per_user)
+        print(f"\n== {rows} transactions ({users} utilisateurs)")
+        Base.metadata.drop_all(bind=engine)
+        started = time.perf_counter()
+        user_ids = seed(engine, users, args.transactions_per_user, seed=args.seed)
+        seed_seconds = time.perf_counter() - started
+
+        token = create_access_token(data={"sub": f"user{user_ids[0]}@bench.local"})
+        headers = {"Authorization": f"Bearer {token}"}
+        results = {}
+        for name in endpoints:
+            results[name] = measure(client, headers, name, args.requests)
+            result = results[name]
+            print(f"  {name:<22} p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+                  f"SQL/req {result['queries_per_request']}  erreurs {result['errors']}")
+
+        report["results"].append({
+            "rows": rows,
+            "users": users,
+            "seed_seconds": round(seed_seconds, 1),
+            "endpoints": results,
+        })
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nRapport écrit dans {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
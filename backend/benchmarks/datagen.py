@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Générateur de données synthétiques reproductibles (graine fixe).
+
+Crée N utilisateurs avec un historique de transactions réaliste:
+  - dépenses dont les catégories et descriptions suivent la distribution du
+    jeu d'entraînement du modèle (ml_project/data/data.csv par défaut)
+  - montants log-normaux autour d'un montant typique par catégorie
+  - un salaire par mois et quelques budgets par utilisateur
+
+L'insertion se fait par lots (COPY sur PostgreSQL, executemany sinon).
+
+Usage:
+    python benchmarks/datagen.py --database-url sqlite:///bench.db \\
+        --users 1000 --transactions-per-user 1000 [--seed 42]
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, func, insert, select, text
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import Base
+from app.models.user import User, Budget
+from app.models.transaction import Transaction
+
+DEFAULT_DATASET = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "ml_project", "data", "data.csv"
+)
+# Montant typique d'une dépense par catégorie (les autres: 30)
+TYPICAL_AMOUNTS = {
+    "Nourriture": 35, "Transport": 20, "Factures": 80, "Santé": 30,
+    "Divertissement": 25, "Achats": 50, "Éducation": 60, "Divers": 20,
+}
+# Mot de passe de tous les utilisateurs générés
+PASSWORD = "bench-password-123"
+# Utilisateurs générés et insérés par lot
+USERS_PER_CHUNK = 500
+
+
+def load_distribution(path=DEFAULT_DATASET):
+    """(descriptions, codes de catégorie, noms de catégories, poids des catégories)"""
+    dataset = pd.read_csv(path).dropna(subset=["description", "categories"])
+    categories, codes = np.unique(dataset["categories"].to_numpy(dtype=object), return_inverse=True)
+    order = np.argsort(codes, kind="stable")
+    weights = np.bincount(codes) / len(codes)
+    return dataset["description"].to_numpy(dtype=object)[order], codes[order], categories, weights
+
+
+class DataGenerator:
+    """Historique synthétique déterministe pour une graine donnée"""
+
+    def __init__(self, seed=42, months=12, today=None, dataset=DEFAULT_DATASET):
+        self.rng = np.random.default_rng(seed)
+        self.months = months
+        self.today = today or date.today()
+        self.descriptions, codes, self.categories, self.weights = load_distribution(dataset)
+        counts = np.bincount(codes, minlength=len(self.categories))
+        self._starts = np.cumsum(counts) - counts
+        self._counts = counts
+        self._typical = np.array([TYPICAL_AMOUNTS.get(c, 30) for c in self.categories], dtype=np.float64)
+
+    def transactions(self, user_ids, per_user):
+        """Colonnes des transactions de user_ids (per_user transactions chacun)"""
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        first_day = (self.today - timedelta(days=30 * self.months)).toordinal()
+        last_day = self.today.toordinal()
+
+        # Un salaire par mois, le reste en dépenses
+        incomes = min(self.months, per_user)
+        expenses = per_user - incomes
+
+        n = len(user_ids) * expenses
+        category = self.rng.choice(len(self.categories), size=n, p=self.weights)
+        description = self.descriptions[self._starts[category] + (self.rng.random(n) * self._counts[category]).astype(np.int64)]
+        amount = np.round(self._typical[category] * self.rng.lognormal(0, 0.6, n), 2).clip(0.5)
+        day = self.rng.integers(first_day, last_day + 1, n)
+
+        salary = np.round(self.rng.normal(2500, 600, len(user_ids)).clip(1200), 2)
+        # Salaire le 28 des derniers mois écoulés
+        income_day, month = [], self.today.replace(day=1)
+        while len(income_day) < incomes:
+            if month.replace(day=28) <= self.today:
+                income_day.append(month.replace(day=28).toordinal())
+            month = (month - timedelta(days=1)).replace(day=1)
+
+        return {
+            "user_id": np.concatenate([np.repeat(user_ids, expenses), np.repeat(user_ids, incomes)]),
+            "description": np.concatenate([description, np.full(len(user_ids) * incomes, "Virement salaire", dtype=object)]),
+            "amount": np.concatenate([amount, np.repeat(salary, incomes)]),
+            "type": np.concatenate([np.full(n, "expense", dtype=object), np.full(len(user_ids) * incomes, "income", dtype=object)]),
+            "category": np.concatenate([self.categories[category], np.full(len(user_ids) * incomes, "Salaire", dtype=object)]),
+            "date": np.concatenate([day, np.tile(np.array(income_day, dtype=np.int64), len(user_ids))]),
+        }
+
+    def budgets(self, user_ids, per_user=3):
+        rows = []
+        for user_id in user_ids:
+            for code in self.rng.choice(len(self.categories), size=min(per_user, len(self.categories)), replace=False):
+                rows.append({
+                    "user_id": int(user_id),
+                    "category": str(self.categories[code]),
+                    "monthly_limit": round(float(self._typical[code] * 8 * self.rng.uniform(0.8, 1.5)), 2),
+                    "notification_threshold": 80,
+                })
+        return rows
+
+
+def _rows(columns):
+    """Lignes (dict) à partir des colonnes NumPy, dates converties une fois par jour distinct"""
+    unique_days, day_index = np.unique(columns["date"], return_inverse=True)
+    dates = [date.fromordinal(int(day)) for day in unique_days]
+    keys = [key for key in columns if key != "date"]
+    for values, index in zip(zip(*(columns[key].tolist() for key in keys)), day_index.tolist()):
+        row = dict(zip(keys, values))
+        row["date"] = dates[index]
+        yield row
+
+
+def insert_transactions(connection, columns, batch_size=20000):
+    """COPY sur PostgreSQL (le plus rapide), executemany par lots sinon"""
+    if connection.dialect.name == "postgresql":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in _rows(columns):
+            writer.writerow([row["user_id"], row["description"], f"{row['amount']:.2f}",
+                             row["type"], row["category"], row["date"].isoformat()])
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        cursor.copy_expert(
+            "COPY transactions (user_id, description, amount, type, category, date) FROM STDIN WITH CSV",
+            buffer
+        )
+        return
+
+    batch = []
+    for row in _rows(columns):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            connection.execute(insert(Transaction), batch)
+            batch = []
+    if batch:
+        connection.execute(insert(Transaction), batch)
+
+
+def seed(engine, users, transactions_per_user, seed=42, months=12, dataset=DEFAULT_DATASET, log=print):
+    """
+    Ajoute `users` utilisateurs (user<id>@bench.local) et leur historique.
+
+    Returns:
+        Identifiants des utilisateurs créés
+    """
+    from app.core.auth import get_password_hash
+
+    Base.metadata.create_all(bind=engine)
+    generator = DataGenerator(seed=seed, months=months, dataset=dataset)
+    # Un seul calcul de hash: le coût du hachage n'a rien à voir avec le volume
+    hashed_password = get_password_hash(PASSWORD)
+    started = time.perf_counter()
+
+    with engine.begin() as connection:
+        first_id = (connection.execute(select(func.max(User.id))).scalar() or 0) + 1
+    user_ids = list(range(first_id, first_id + users))
+
+    for start in range(0, users, USERS_PER_CHUNK):
+        chunk = user_ids[start:start + USERS_PER_CHUNK]
+        with engine.begin() as connection:
+            connection.execute(insert(User), [
+                {"id": user_id, "email": f"user{user_id}@bench.local", "hashed_password": hashed_password}
+                for user_id in chunk
+            ])
+            connection.execute(insert(Budget), generator.budgets(chunk))
+            insert_transactions(connection, generator.transactions(chunk, transactions_per_user))
+        done = min(start + USERS_PER_CHUNK, users)
+        log(f"  {done}/{users} utilisateurs ({done * transactions_per_user} transactions, "
+            f"{time.perf_counter() - started:.0f}s)")
+
+    if engine.dialect.name == "postgresql":
+        # Identifiants explicites: recaler la séquence
+        with engine.begin() as connection:
+            connection.execute(text("SELECT setval(pg_get_serial_sequence('users', 'id'), (SELECT max(id) FROM users))"))
+    return user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère des utilisateurs et transactions synthétiques")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--transactions-per-user", type=int, default=1000)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dataset", default=DEFAULT_DATASET, help="CSV description,categories")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url ou DATABASE_URL requis")
+    engine = create_engine(args.database_url)
+    seed(engine, args.users, args.transactions_per_user, args.seed, args.months, args.dataset)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Génère les photos de tickets de benchmarks/bench_ocr_preprocessing.py.
+
+Chaque ticket est imprimé sur un fond sombre (table), puis photographié
+dans des conditions différentes: grande résolution, légère rotation,
+faible contraste, ombre, bruit de capteur. Les articles attendus sont
+écrits à côté de chaque image (nom.json). Graine fixe: les fichiers
+générés sont identiques d'une exécution à l'autre.
+
+Usage:
+    python benchmarks/fixtures/receipt_photos/generate.py
+"""
+import json
+import os
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+RECEIPTS = {
+    "boulangerie": ("BOULANGERIE DU MARCHE", [
+        ("BAGUETTE TRADITION", 1.30), ("CROISSANT BEURRE", 1.20),
+        ("PAIN AU CHOCOLAT", 1.40), ("TARTE AUX POMMES", 3.90),
+    ]),
+    "supermarche": ("CARREFOUR MARKET", [
+        ("LAIT DEMI ECREME", 1.15), ("YAOURT NATURE X8", 2.49), ("PATES FUSILLI", 0.99),
+        ("TOMATES GRAPPE", 2.85), ("EMMENTAL RAPE", 2.10), ("EAU MINERALE 6X1.5L", 3.12),
+    ]),
+    "pharmacie": ("PHARMACIE CENTRALE", [
+        ("DOLIPRANE 1000MG", 2.18), ("SERUM PHYSIOLOGIQUE", 3.50), ("CREME HYDRATANTE", 8.90),
+    ]),
+    "station": ("STATION TOTAL ENERGIES", [
+        ("GAZOLE 38.52L", 67.41), ("LAVAGE PRESTIGE", 12.00),
+    ]),
+    "restaurant": ("BRASSERIE DE LA GARE", [
+        ("PLAT DU JOUR", 14.50), ("CAFE GOURMAND", 7.80), ("EAU PETILLANTE 50CL", 4.20),
+        ("VERRE DE VIN ROUGE", 5.50),
+    ]),
+}
+
+# Conditions de prise de vue: (largeur de la photo, rotation en degrés, contraste, ombre, bruit)
+CONDITIONS = {
+    "boulangerie": (1200, 0.0, 1.0, False, 0),
+    "supermarche": (1600, 2.5, 1.0, False, 3),
+    "pharmacie": (1400, -1.5, 0.55, False, 0),
+    "station": (1400, 1.0, 0.9, True, 4),
+    "restaurant": (1600, -3.0, 0.7, True, 5),
+}
+
+
+def draw_receipt(title, items):
+    font = ImageFont.load_default(size=34)
+    width = 620
+    lines = [title, "12 RUE DE LA REPUBLIQUE", ""]
+    lines += [(label, f"{amount:.2f}") for label, amount in items]
+    lines += ["", ("TOTAL", f"{sum(amount for _, amount in items):.2f}"), "CB SANS CONTACT", "MERCI DE VOTRE VISITE"]
+    height = 80 + 52 * len(lines)
+
+    paper = Image.new("L", (width, height), 246)
+    draw = ImageDraw.Draw(paper)
+    y = 40
+    for line in lines:
+        if isinstance(line, tuple):
+            label, amount = line
+            draw.text((30, y), label, fill=20, font=font)
+            draw.text((width - 30 - draw.textlength(amount, font=font), y), amount, fill=20, font=font)
+        elif line:
+            draw.text(((width - draw.textlength(line, font=font)) / 2, y), line, fill=20, font=font)
+        y += 52
+    return paper
+
+
+def photograph(paper, photo_width, angle, contrast, shadow, noise, rng):
+    photo_height = int(photo_width * 4 / 3)
+    scale = photo_width * 0.6 / paper.width
+    paper = paper.resize((int(paper.width * scale), int(paper.height * scale)), Image.BICUBIC)
+    paper = paper.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=70)
+
+    photo = Image.new("L", (photo_width, photo_height), 70)
+    photo.paste(paper, ((photo_width - paper.width) // 2, (photo_height - paper.height) // 2))
+    pixels = np.asarray(photo, dtype=np.float32)
+    # Contraste réduit autour du gris moyen (éclairage faible)
+    pixels = 128 + (pixels - 128) * contrast
+    if shadow:
+        # Ombre de la main ou du téléphone: assombrissement progressif
+        pixels *= np.linspace(0.6, 1.0, photo_width, dtype=np.float32)[None, :]
+    if noise:
+        pixels += rng.normal(0, noise, pixels.shape).astype(np.float32)
+    photo = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    return photo.filter(ImageFilter.GaussianBlur(0.6)).convert("RGB")
+
+
+def main():
+    rng = np.random.default_rng(42)
+    for name, (title, items) in RECEIPTS.items():
+        photo = photograph(draw_receipt(title, items), *CONDITIONS[name], rng)
+        photo.save(os.path.join(HERE, f"{name}.jpg"), quality=75)
+        with open(os.path.join(HERE, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump([{"label": label, "amount": amount} for label, amount in items], f, indent=1)
+        print(f"{name}.jpg")
+
+
+if __name__ == "__main__":
+    main()
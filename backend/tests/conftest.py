@@ -0,0 +1,126 @@
+"""
+Harnais de tests de l'API: application en processus, base SQLite en mémoire
+isolée par test, compteur de requêtes SQL et données générées par
+benchmarks/datagen.py.
+"""
+import os
+import sys
+from contextlib import contextmanager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Configuration lue à l'import de l'application: jamais la base du .env
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("MODEL_PATH", os.path.join(BACKEND_DIR, "app", "ml_models", "pipeline.pkl"))
+os.environ.setdefault("SLOW_REQUEST_SECONDS", "3600")
+# Pas de relecture périodique des révocations: nombre de requêtes stable
+os.environ.setdefault("REVOCATION_REFRESH_SECONDS", "3600")
+os.environ.setdefault("RECEIPTS_DIR", os.path.join(BACKEND_DIR, ".pytest_cache", "receipts"))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.db.base import Base
+from app.db.search import install_search
+from app.db.session import get_db
+from app.core.auth import create_access_token
+from app.core.metrics import install_query_hooks
+from app.services.category_rules import rule_cache
+from app.services.forecast import forecast_cache
+from app.services.idempotency import idempotency_store
+from datagen import seed
+
+API = "/api/v1/api"
+
+
+@pytest.fixture
+def db_engine():
+    """Base SQLite en mémoire propre à chaque test"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    install_search(engine)
+    install_query_hooks(engine)
+    forecast_cache.clear()
+    rule_cache.clear()
+    idempotency_store.clear()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(db_engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db_engine):
+    # Mêmes options que get_db
+    TestingSession = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=db_engine)
+
+    def override_get_db():
+        db = TestingSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_queries(db_engine):
+    """
+    Compte les requêtes SQL exécutées dans un bloc:
+
+        with count_queries() as queries:
+            client.get(...)
+        assert queries.count <= 3
+    """
+    @contextmanager
+    def counter():
+        queries = QueryCounter()
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            queries.statements.append(statement)
+
+        event.listen(db_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield queries
+        finally:
+            event.remove(db_engine, "before_cursor_execute", before_cursor_execute)
+
+    return counter
+
+
+@pytest.fixture
+def make_user(db_engine):
+    """Crée un utilisateur avec `transactions` transactions générées; retourne ses en-têtes d'authentification"""
+    def factory(transactions=100, months=12):
+        user_id = seed(db_engine, 1, transactions, seed=transactions, months=months, log=lambda message: None)[0]
+        token = create_access_token(data={"sub": f"user{user_id}@bench.local"})
+        return {"Authorization": f"Bearer {token}"}
+    return factory
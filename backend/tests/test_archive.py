@@ -0,0 +1,28 @@
+from datetime import date
+
+import pytest
+
+from app.db.partitioning import month_start
+from app.models.transaction import Transaction
+from app.services import archive
+from conftest import API
+
+pytest.importorskip("pyarrow")
+
+
+def test_archived_months_stay_in_timeseries(client, db_engine, db_session, make_user, monkeypatch, tmp_path):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path))
+    headers = make_user(600, months=12)
+    params = {"start": month_start(date.today(), -11).strftime("%Y-%m")}
+
+    before = client.get(f"{API}/dashboard/timeseries", params=params, headers=headers).json()
+    archived = archive.archive_older_than(db_engine, horizon_months=3)
+
+    boundary = month_start(date.today(), -3)
+    assert sum(archived.values()) > 0
+    assert db_session.query(Transaction).filter(Transaction.date < boundary).count() == 0
+    assert len(archive.archived_months()) == len(archived)
+
+    after = client.get(f"{API}/dashboard/timeseries", params=params, headers=headers).json()
+    assert len(after) == 12
+    assert after == before
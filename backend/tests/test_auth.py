@@ -0,0 +1,24 @@
+import pytest
+from passlib.context import CryptContext
+
+from app.core.auth import PASSWORD_HASH_ROUNDS, pwd_context
+from app.models.user import User
+
+LOGIN = "/api/v1/auth/login"
+
+
+@pytest.mark.parametrize("rounds", [PASSWORD_HASH_ROUNDS // 2, PASSWORD_HASH_ROUNDS * 2])
+def test_login_rehashes_when_cost_changed(client, db_session, rounds):
+    # Hash calculé avec une ancienne configuration (coût plus faible ou plus élevé)
+    old_hash = CryptContext(schemes=["pbkdf2_sha256"], pbkdf2_sha256__default_rounds=rounds).hash("secret-123")
+    db_session.add(User(email="rehash@example.com", hashed_password=old_hash))
+    db_session.commit()
+
+    response = client.post(LOGIN, json={"email": "rehash@example.com", "password": "secret-123"})
+
+    assert response.status_code == 200
+    db_session.expire_all()
+    new_hash = db_session.query(User).one().hashed_password
+    assert new_hash != old_hash
+    assert pwd_context.verify("secret-123", new_hash)
+    assert not pwd_context.needs_update(new_hash)
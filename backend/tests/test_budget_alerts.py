@@ -0,0 +1,85 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.user import SpendingCounter
+from app.services.budget_alerts import _create_counter, month_start
+from conftest import API
+
+
+def add_expense(client, headers, amount):
+    response = client.post(f"{API}/transactions", headers=headers, json={
+        "description": "Courses", "amount": amount, "type": "expense", "category": "Courses",
+        "date": date.today().isoformat()
+    })
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def alert_levels(client, headers):
+    return sorted(n["level"] for n in client.get(f"{API}/notifications", headers=headers).json())
+
+
+def status(client, headers):
+    return {b["category"]: b for b in client.get(f"{API}/budgets/status", headers=headers).json()}["Courses"]
+
+
+def test_alerts_when_crossing_threshold_then_limit(client, make_user):
+    headers = make_user(0)
+    client.post(f"{API}/budgets", headers=headers, json={
+        "category": "Courses", "monthly_limit": 100, "notification_threshold": 80
+    })
+
+    add_expense(client, headers, 50)
+    assert alert_levels(client, headers) == []
+
+    # 50 -> 85: seuil de notification (80) franchi
+    add_expense(client, headers, 35)
+    assert alert_levels(client, headers) == ["near_limit"]
+    assert status(client, headers)["is_near_limit"]
+
+    # 85 -> 90: déjà au-delà du seuil, pas de nouvelle alerte
+    add_expense(client, headers, 5)
+    assert alert_levels(client, headers) == ["near_limit"]
+
+    # 90 -> 120: limite franchie
+    add_expense(client, headers, 30)
+    assert alert_levels(client, headers) == ["near_limit", "over_budget"]
+    assert status(client, headers)["is_over_budget"]
+
+
+def test_delete_brings_spending_back_under_limit(client, make_user):
+    headers = make_user(0)
+    client.post(f"{API}/budgets", headers=headers, json={
+        "category": "Courses", "monthly_limit": 100, "notification_threshold": 80
+    })
+    add_expense(client, headers, 60)
+    last = add_expense(client, headers, 60)
+    assert alert_levels(client, headers) == ["over_budget"]
+
+    assert client.delete(f"{API}/transactions/{last}", headers=headers).status_code == 200
+    current = status(client, headers)
+    assert current["current_spending"] == 60
+    assert not current["is_over_budget"]
+
+    # Le compteur est revenu à 60: un nouveau dépassement est signalé
+    add_expense(client, headers, 50)
+    assert alert_levels(client, headers) == ["over_budget", "over_budget"]
+
+
+def test_concurrent_counter_creation_adds_delta(db_engine, make_user):
+    """Le compteur créé par une autre écriture entre la lecture et l'insertion n'est pas écrasé"""
+    make_user(0)
+    month = month_start(date.today())
+    Session = sessionmaker(bind=db_engine)
+
+    with Session() as other:
+        other.add(SpendingCounter(user_id=1, category="Courses", month=month, total=Decimal("40")))
+        other.commit()
+
+    with Session() as db:
+        total = _create_counter(db, 1, "Courses", month, Decimal("25"))
+        db.commit()
+        assert Decimal(str(total)) == Decimal("65")
+        assert db.query(SpendingCounter).count() == 1
@@ -0,0 +1,94 @@
+from datetime import date
+
+from sqlalchemy import func
+
+from app.models.transaction import Transaction
+from app.models.user import Ticket, TicketItem
+from conftest import API
+
+
+def add_transactions(client, headers, *descriptions, category="Divers"):
+    response = client.post(f"{API}/transactions/bulk", headers=headers, json=[
+        {"description": description, "amount": 10, "type": "expense", "category": category,
+         "date": date.today().isoformat()}
+        for description in descriptions
+    ])
+    assert response.status_code == 200
+
+
+def test_recategorize_by_pattern_updates_budget_status(client, db_session, make_user, count_queries):
+    headers = make_user(0)
+    client.post(f"{API}/budgets", headers=headers, json={
+        "category": "Transport", "monthly_limit": 100, "notification_threshold": 80
+    })
+    add_transactions(client, headers, "Uber 100% course", "UBER trip", "Boulangerie")
+
+    with count_queries() as queries:
+        response = client.post(f"{API}/transactions/recategorize", headers=headers, json={
+            "description": "uber", "new_category": "Transport"
+        })
+
+    assert response.json() == {"affected_count": 2}
+    assert dict(db_session.query(Transaction.description, Transaction.category).all()) == {
+        "Uber 100% course": "Transport", "UBER trip": "Transport", "Boulangerie": "Divers"
+    }
+    status = {b["category"]: b for b in client.get(f"{API}/budgets/status", headers=headers).json()}
+    assert status["Transport"]["current_spending"] == 20
+    # Un SELECT et un UPDATE quel que soit le nombre de lignes, plus les compteurs
+    assert queries.count <= 10
+
+
+def test_pattern_wildcards_are_literal(client, make_user):
+    headers = make_user(0)
+    add_transactions(client, headers, "Uber 100% course", "Uber 1000 course")
+
+    response = client.post(f"{API}/transactions/recategorize", headers=headers, json={
+        "description": "100%", "new_category": "Transport"
+    })
+    assert response.json() == {"affected_count": 1}
+
+
+def test_reclassify_all_uses_batched_model_calls(client, db_session, make_user, count_queries, monkeypatch):
+    from app.services import bulk_edit
+    headers = make_user(300)
+    calls = []
+
+    def fake_classify(db, user_id, descriptions):
+        calls.append(len(descriptions))
+        return ["Reclassée"] * len(descriptions)
+
+    monkeypatch.setattr(bulk_edit, "classify_descriptions", fake_classify)
+    monkeypatch.setattr(bulk_edit, "RECLASSIFY_BATCH_SIZE", 100)
+    response = client.post(f"{API}/transactions/reclassify", headers=headers)
+
+    assert response.json() == {"affected_count": 300}
+    assert len(calls) == 3
+    assert db_session.query(func.count()).filter(Transaction.category != "Reclassée").scalar() == 0
+
+
+def test_bulk_delete_requires_criteria(client, db_session, make_user):
+    headers = make_user(0)
+    add_transactions(client, headers, "Cinéma", "Théâtre", category="Divertissement")
+    add_transactions(client, headers, "Loyer", category="Logement")
+
+    assert client.post(f"{API}/transactions/bulk-delete", headers=headers, json={}).status_code == 400
+    response = client.post(f"{API}/transactions/bulk-delete", headers=headers, json={"category": "Divertissement"})
+
+    assert response.json() == {"affected_count": 2}
+    assert [t.description for t in db_session.query(Transaction).all()] == ["Loyer"]
+
+
+def test_bulk_delete_removes_tickets_and_their_items(client, db_session, make_user):
+    headers = make_user(0)
+    response = client.post(f"{API}/transactions/bulk", headers=headers, json=[{
+        "description": "Courses", "amount": 30, "type": "expense", "category": "Nourriture",
+        "date": date.today().isoformat(), "tickets": [{"type": "image/png", "file_path": "receipts/courses.png"}]
+    }])
+    ticket_id = response.json()[0]["tickets"][0]["id"]
+    db_session.add(TicketItem(ticket_id=ticket_id, position=0, label="Pain", amount=1.2))
+    db_session.commit()
+
+    client.post(f"{API}/transactions/bulk-delete", headers=headers, json={"category": "Nourriture"})
+
+    assert db_session.query(Ticket).count() == 0
+    assert db_session.query(TicketItem).count() == 0
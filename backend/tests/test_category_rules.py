@@ -0,0 +1,115 @@
+import threading
+import time
+from datetime import date
+
+from app.core.metrics import classifications_total
+from app.models.transaction import CategoryRule
+from app.services.category_rules import RuleMatcher
+from conftest import API
+
+
+def expense(description):
+    return {"description": description, "amount": 25, "type": "expense", "date": date.today().isoformat()}
+
+
+def test_rules_take_precedence_over_model(client, db_session, make_user):
+    headers = make_user(0)
+    db_session.add(CategoryRule(user_id=None, pattern="uber", category="Transport"))
+    db_session.commit()
+    response = client.post(f"{API}/category-rules", headers=headers, json={
+        "pattern": "uber eats", "category": "Nourriture", "priority": 10
+    })
+    assert response.status_code == 200
+    rules_before, model_before = classifications_total._values[("rule",)], classifications_total._values[("model",)]
+
+    created = client.post(f"{API}/transactions/bulk", headers=headers, json=[
+        expense("UBER EATS commande 42"), expense("Uber trajet aéroport"), expense("Courses Monoprix")
+    ]).json()
+
+    assert [t["category"] for t in created][:2] == ["Nourriture", "Transport"]
+    assert classifications_total._values[("rule",)] - rules_before == 2
+    assert classifications_total._values[("model",)] - model_before == 1
+
+
+def test_rule_changes_rebuild_the_matcher(client, make_user):
+    headers = make_user(0)
+    url = f"{API}/category-rules/test"
+    assert client.post(url, headers=headers, json={"description": "Billet SNCF"}).json()["category"] is None
+
+    rule = client.post(f"{API}/category-rules", headers=headers, json={
+        "pattern": r"\bsncf\b|ouigo", "is_regex": True, "category": "Transport"
+    }).json()
+    assert client.post(url, headers=headers, json={"description": "Billet SNCF"}).json()["category"] == "Transport"
+
+    client.delete(f"{API}/category-rules/{rule['id']}", headers=headers)
+    assert client.post(url, headers=headers, json={"description": "Billet SNCF"}).json()["category"] is None
+
+
+def test_invalid_regex_is_rejected(client, make_user):
+    headers = make_user(0)
+    response = client.post(f"{API}/category-rules", headers=headers, json={
+        "pattern": "sncf(", "is_regex": True, "category": "Transport"
+    })
+    assert response.status_code == 422
+
+
+def test_group_references_are_rejected(client, make_user):
+    headers = make_user(0)
+    for pattern in (r"(\w)\1", r"(?P<lettre>\w)(?P=lettre)", r"(a)(?(1)b|c)"):
+        response = client.post(f"{API}/category-rules", headers=headers, json={
+            "pattern": pattern, "is_regex": True, "category": "Transport"
+        })
+        assert response.status_code == 422, pattern
+    # Un antislash échappé suivi d'un chiffre n'est pas une référence
+    response = client.post(f"{API}/category-rules", headers=headers, json={
+        "pattern": r"ref\\1", "is_regex": True, "category": "Transport"
+    })
+    assert response.status_code == 200
+
+
+def test_invalid_stored_rule_does_not_disable_the_others(client, db_session, make_user):
+    headers = make_user(0)
+    # Enregistrée sans validation: la référence désignerait le groupe d'une autre règle
+    db_session.add(CategoryRule(user_id=1, pattern=r"(\w)\2", is_regex=True, category="Doublons", priority=10))
+    db_session.add(CategoryRule(user_id=1, pattern="sncf", category="Transport"))
+    db_session.commit()
+
+    response = client.post(f"{API}/category-rules/test", headers=headers, json={"description": "Billet SNCF"})
+    assert response.json()["category"] == "Transport"
+
+
+def test_catastrophic_backtracking_is_bounded(client, make_user):
+    headers = make_user(0)
+    client.post(f"{API}/category-rules", headers=headers, json={
+        "pattern": "(a|aa)+$", "is_regex": True, "category": "Lent", "priority": 10
+    })
+    client.post(f"{API}/category-rules", headers=headers, json={"pattern": "sncf", "category": "Transport"})
+
+    url = f"{API}/category-rules/test"
+    started = time.perf_counter()
+    response = client.post(url, headers=headers, json={"description": "a" * 40 + "! SNCF"})
+    assert time.perf_counter() - started < 1
+    # La règle trop lente est écartée, les suivantes s'appliquent
+    assert response.json()["category"] == "Transport"
+    assert client.post(url, headers=headers, json={"description": "aaaa"}).json()["category"] is None
+
+
+def test_slow_rule_discarded_while_other_threads_match():
+    matcher = RuleMatcher([("(a|aa)+$", True, "Lent"), ("sncf", False, "Transport")])
+    results, errors = [], []
+
+    def classify():
+        try:
+            results.append(matcher.match("a" * 40 + "! SNCF"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=classify) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert errors == []
+    assert results == ["Transport"] * 8
+    assert len(matcher) == 1
@@ -0,0 +1,55 @@
+from datetime import date
+
+from sqlalchemy import func
+
+from app.models.transaction import Transaction
+from conftest import API
+
+
+def test_summary_matches_transactions(client, db_session, make_user):
+    headers = make_user(300, months=1)
+    month = date.today().strftime("%Y-%m")
+    start = date.today().replace(day=1)
+
+    summary = client.get(f"{API}/dashboard/summary", headers=headers).json()
+
+    totals = dict(db_session.query(Transaction.type, func.sum(Transaction.amount)).filter(
+        Transaction.date >= start
+    ).group_by(Transaction.type).all())
+    assert summary["month"] == month
+    assert summary["total_expenses"] == round(float(totals.get("expense", 0)), 2)
+    assert summary["total_income"] == round(float(totals.get("income", 0)), 2)
+
+
+def test_bulk_creation_updates_budget_status(client, make_user):
+    headers = make_user(0)
+    client.post(f"{API}/budgets", headers=headers, json={
+        "category": "Vacances", "monthly_limit": 100, "notification_threshold": 80
+    })
+
+    response = client.post(f"{API}/transactions/bulk", headers=headers, json=[
+        {"description": "Navigo", "amount": 90, "type": "expense", "category": "Vacances",
+         "date": date.today().isoformat()}
+    ])
+    assert response.status_code == 200
+
+    status = {b["category"]: b for b in client.get(f"{API}/budgets/status", headers=headers).json()}
+    assert status["Vacances"]["current_spending"] == 90
+    assert status["Vacances"]["is_near_limit"]
+    assert [n["level"] for n in client.get(f"{API}/notifications", headers=headers).json()] == ["near_limit"]
+
+
+def test_bootstrap_returns_first_page_with_cursor(client, make_user):
+    headers = make_user(250)
+
+    response = client.get(f"{API}/dashboard/bootstrap", headers=headers, params={"transactions_limit": 100})
+    assert response.status_code == 200
+    first_page = response.json()["transactions"]
+    assert len(first_page) == 100
+
+    # La suite se lit avec le curseur, comme une page de GET /transactions
+    remaining = client.get(f"{API}/transactions", headers=headers, params={
+        "cursor": response.headers["X-Next-Cursor"]
+    }).json()
+    everything = client.get(f"{API}/transactions", headers=headers, params={"limit": 1000}).json()
+    assert [t["id"] for t in first_page + remaining] == [t["id"] for t in everything]
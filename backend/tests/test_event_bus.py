@@ -0,0 +1,25 @@
+import json
+
+from app.services import event_bus as bus
+from app.services.event_bus import NOTIFY_PAYLOAD_BYTES, PostgresBroker, split_payload
+
+
+def test_large_event_is_split_under_notify_limit_and_reassembled(monkeypatch):
+    delivered = []
+    monkeypatch.setattr(bus.event_bus, "deliver", lambda *event: delivered.append(event))
+    broker = PostgresBroker("postgresql://localhost/gbp", "gbp_events")
+
+    data = {"transactions": [{"id": i, "description": f"Café n°{i}", "amount": 2.5} for i in range(1000)]}
+    parts = split_payload(json.dumps({"user_id": 1, "type": "transaction_created", "data": data}))
+    assert len(parts) > 1
+    assert all(len(part.encode()) <= NOTIFY_PAYLOAD_BYTES for part in parts)
+
+    # Ordre d'arrivée quelconque, événement d'un autre commit intercalé
+    small = split_payload(json.dumps({"user_id": 2, "type": "budget_deleted", "data": {"id": 3}}))
+    assert len(small) == 1
+    for part in parts[:-1]:
+        broker._dispatch(part)
+    broker._dispatch(small[0])
+    broker._dispatch(parts[-1])
+
+    assert delivered == [(2, "budget_deleted", {"id": 3}), (1, "transaction_created", data)]
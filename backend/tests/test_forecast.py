@@ -0,0 +1,49 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.transaction import Transaction
+from app.services.forecast import FORECAST_HISTORY_DAYS, compute_forecast
+from conftest import API
+
+# 10 mars: 21 jours restants dans le mois
+TODAY = date(2026, 3, 10)
+REMAINING_DAYS = 21
+
+
+def add_daily_expenses(db_session, days, amount=10):
+    """Une dépense de `amount` par jour sur les `days` derniers jours (aujourd'hui compris)"""
+    db_session.add_all(
+        Transaction(user_id=1, description="Boulangerie", amount=amount, type="expense",
+                    category="Alimentation", date=TODAY - timedelta(days=offset))
+        for offset in range(days)
+    )
+    db_session.commit()
+
+
+@pytest.mark.parametrize("history_days", [5, 30, FORECAST_HISTORY_DAYS, FORECAST_HISTORY_DAYS + 60])
+def test_daily_spending_is_projected_to_month_end(db_session, make_user, history_days):
+    # 5 jours: rythme du mois; 30 jours: historique plus court que la fenêtre;
+    # fenêtre complète et au-delà: moyenne par jour de la semaine sur la fenêtre
+    make_user(0)
+    add_daily_expenses(db_session, history_days)
+
+    forecast = compute_forecast(db_session, 1, TODAY)
+
+    spent = 10 * min(history_days, TODAY.day)
+    assert forecast["categories"]["Alimentation"] == pytest.approx(spent + 10 * REMAINING_DAYS)
+    assert forecast["projected_balance"] == pytest.approx(-(spent + 10 * REMAINING_DAYS))
+
+
+def test_forecast_cache_is_invalidated_after_write(client, make_user):
+    headers = make_user(0)
+    assert client.get(f"{API}/dashboard/forecast", headers=headers).json()["categories"] == {}
+
+    response = client.post(f"{API}/transactions", headers=headers, json={
+        "description": "Boulangerie", "amount": 12, "type": "expense", "category": "Alimentation",
+        "date": date.today().isoformat()
+    })
+    assert response.status_code == 200
+
+    forecast = client.get(f"{API}/dashboard/forecast", headers=headers).json()
+    assert forecast["categories"]["Alimentation"] >= 12
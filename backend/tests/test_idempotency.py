@@ -0,0 +1,93 @@
+import threading
+from datetime import date
+
+import pytest
+
+from app.models.transaction import Transaction
+from app.models.user import IdempotencyKey
+from app.services import idempotency
+from app.services.idempotency import idempotency_store, request_fingerprint
+from conftest import API
+
+
+def expense(description="Courses Carrefour", amount=42.5):
+    return {"description": description, "amount": amount, "type": "expense",
+            "category": "Nourriture", "date": date.today().isoformat()}
+
+
+def test_retry_replays_the_first_response(client, make_user, count_queries):
+    headers = {**make_user(0), "Idempotency-Key": "a1b2"}
+    first = client.post(f"{API}/transactions", headers=headers, json=expense())
+    with count_queries() as queries:
+        retry = client.post(f"{API}/transactions", headers=headers, json=expense())
+
+    assert retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    # Réponse en mémoire: seule l'authentification interroge la base
+    assert not any("transactions" in statement for statement in queries.statements)
+
+    # Autre worker (cache vide): réponse relue dans la table
+    idempotency_store.clear()
+    bulk_headers = {**headers, "Idempotency-Key": "c3d4"}
+    created = client.post(f"{API}/transactions/bulk", headers=bulk_headers, json=[expense(), expense("Loyer", 800)])
+    idempotency_store.clear()
+    replayed = client.post(f"{API}/transactions/bulk", headers=bulk_headers, json=[expense(), expense("Loyer", 800)])
+    assert replayed.json() == created.json()
+    assert len(client.get(f"{API}/transactions", headers=headers).json()) == 3
+
+
+def test_key_reused_with_another_body_is_rejected(client, make_user):
+    headers = {**make_user(0), "Idempotency-Key": "same-key"}
+    client.post(f"{API}/transactions", headers=headers, json=expense())
+    assert client.post(f"{API}/transactions", headers=headers, json=expense(amount=10)).status_code == 422
+
+
+def test_failed_request_releases_its_key(client, db_session, make_user):
+    headers = {**make_user(0), "Idempotency-Key": "k-404"}
+    payload = {**expense(), "tickets": [{"ticket_id": 999}]}
+    assert client.post(f"{API}/transactions", headers=headers, json=payload).status_code == 404
+    assert db_session.query(IdempotencyKey).count() == 0
+
+
+def test_concurrent_duplicates_run_once(db_session, make_user):
+    make_user(0)
+    started, release = threading.Event(), threading.Event()
+    calls, responses = [], []
+
+    def run():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return b'{"id": 1}'
+
+    fingerprint = request_fingerprint("test", b"{}")
+    leader = threading.Thread(target=lambda: responses.append(
+        idempotency_store.execute(db_session, 1, "concurrent", fingerprint, run)))
+    leader.start()
+    started.wait(5)
+    # Même clé pendant l'exécution: attend la réponse sans exécuter ni lire la base
+    follower = threading.Thread(target=lambda: responses.append(
+        idempotency_store.execute(None, 1, "concurrent", fingerprint, run)))
+    follower.start()
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(calls) == 1
+    assert [response.body for response in responses] == [b'{"id": 1}', b'{"id": 1}']
+
+
+def test_write_is_rolled_back_when_its_response_cannot_be_stored(client, db_session, make_user, monkeypatch):
+    headers = {**make_user(0), "Idempotency-Key": "atomic"}
+
+    def failing_update(table):
+        raise RuntimeError("base indisponible")
+
+    # La réponse est écrite dans la même transaction que la création
+    monkeypatch.setattr(idempotency, "update", failing_update)
+    with pytest.raises(RuntimeError):
+        client.post(f"{API}/transactions", headers=headers, json=expense())
+
+    assert db_session.query(Transaction).count() == 0
+    assert db_session.query(IdempotencyKey).count() == 0
@@ -0,0 +1,71 @@
+"""
+Budgets de performance par endpoint: nombre maximal de requêtes SQL et
+latence, mesurés pour un petit et un gros historique. Le nombre de requêtes
+ne doit pas dépendre du volume de données (pas de requête par ligne).
+"""
+import time
+from datetime import date
+
+import pytest
+
+from conftest import API
+
+SMALL_HISTORY = 20
+LARGE_HISTORY = 2000
+
+
+def bulk_payload():
+    return [
+        {"description": f"Courses test {i}", "amount": 10 + i, "type": "expense",
+         "category": "Nourriture", "date": date.today().isoformat()}
+        for i in range(20)
+    ]
+
+
+# (méthode, chemin, corps, requêtes SQL max, latence max en ms)
+# Chaque requête authentifiée compte 1 requête pour charger l'utilisateur
+ENDPOINT_BUDGETS = {
+    "transactions_list": ("GET", f"{API}/transactions", None, 2, 1500),
+    # SQLite: un INSERT par ligne (pas de sentinelle insertmanyvalues), groupés sur PostgreSQL
+    "transactions_bulk": ("POST", f"{API}/transactions/bulk", bulk_payload, 26, 1000),
+    "dashboard_summary": ("GET", f"{API}/dashboard/summary", None, 2, 250),
+    "budgets_status": ("GET", f"{API}/budgets/status", None, 4, 250),
+    "categories_analysis": ("GET", f"{API}/categories/analysis", None, 2, 250),
+    "dashboard_bootstrap": ("GET", f"{API}/dashboard/bootstrap", None, 5, 500),
+    "dashboard_forecast": ("GET", f"{API}/dashboard/forecast", None, 2, 250),
+    "dashboard_anomalies": ("GET", f"{API}/dashboard/anomalies", None, 2, 250),
+    "notifications": ("GET", f"{API}/notifications", None, 2, 250),
+    "recurring": ("GET", f"{API}/recurring", None, 2, 250),
+}
+
+
+def call(client, headers, method, path, body):
+    return client.request(method, path, headers=headers, json=body() if body else None)
+
+
+@pytest.mark.parametrize("name", list(ENDPOINT_BUDGETS))
+def test_endpoint_query_budget(name, client, make_user, count_queries):
+    method, path, body, max_queries, max_latency_ms = ENDPOINT_BUDGETS[name]
+
+    measures = {}
+    for size in (SMALL_HISTORY, LARGE_HISTORY):
+        headers = make_user(size)
+        # Préchauffage (cache des révocations, imports paresseux)
+        client.get(f"{API}/notifications", headers=headers)
+
+        with count_queries() as queries:
+            started = time.perf_counter()
+            response = call(client, headers, method, path, body)
+            latency_ms = (time.perf_counter() - started) * 1000
+
+        assert response.status_code == 200, response.text
+        measures[size] = (queries.count, latency_ms)
+
+    small_queries, _ = measures[SMALL_HISTORY]
+    large_queries, large_latency_ms = measures[LARGE_HISTORY]
+    assert large_queries <= small_queries, (
+        f"{name}: {small_queries} requêtes SQL pour {SMALL_HISTORY} transactions, "
+        f"{large_queries} pour {LARGE_HISTORY}"
+    )
+    assert large_queries <= max_queries, f"{name}: {large_queries} requêtes SQL (budget {max_queries})"
+    assert large_latency_ms <= max_latency_ms, f"{name}: {large_latency_ms:.0f} ms (budget {max_latency_ms} ms)"
@@ -0,0 +1,53 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.routing import session_router
+from conftest import API
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """Second SQLite en mémoire jouant le rôle du réplica (jamais répliqué)"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(session_router, "replica_factory", sessionmaker(bind=engine))
+    monkeypatch.setattr(session_router, "_writes", {})
+    monkeypatch.setattr(session_router, "_replica_down_until", 0.0)
+    yield engine
+    engine.dispose()
+
+
+def create_transaction(client, headers):
+    return client.post(f"{API}/transactions/bulk", headers=headers, json=[
+        {"description": "Boulangerie", "amount": 4.2, "type": "expense", "category": "Nourriture",
+         "date": date.today().isoformat()}
+    ])
+
+
+def test_reads_own_writes_then_replica(client, make_user, replica, monkeypatch):
+    headers = make_user(0)
+    # Le réplica ne connaît pas l'utilisateur: toute lecture routée y renvoie une liste vide
+    assert client.get(f"{API}/transactions", headers=headers).json() == []
+
+    assert create_transaction(client, headers).status_code == 200
+    assert len(client.get(f"{API}/transactions", headers=headers).json()) == 1
+
+    monkeypatch.setattr(session_router, "window", 0)
+    assert client.get(f"{API}/transactions", headers=headers).json() == []
+
+
+def test_unreachable_replica_falls_back_to_primary(client, make_user, monkeypatch, tmp_path):
+    broken = create_engine(f"sqlite:///{tmp_path}/absent/replica.db")
+    monkeypatch.setattr(session_router, "replica_factory", sessionmaker(bind=broken))
+    monkeypatch.setattr(session_router, "_replica_down_until", 0.0)
+    headers = make_user(50, months=1)
+
+    response = client.get(f"{API}/transactions", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 50
+    assert session_router.replica_session(0) is None
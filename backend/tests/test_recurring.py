@@ -0,0 +1,108 @@
+from datetime import date
+
+from app.models.transaction import RecurringTransaction, Transaction
+from app.services.recurring import add_months, detect_for_users, materialize_due
+from conftest import API
+
+TODAY = date(2026, 6, 20)
+
+
+def add_transaction(db_session, description, amount, day, category="Abonnements"):
+    db_session.add(Transaction(user_id=1, description=description, amount=amount, type="expense",
+                               category=category, date=day))
+
+
+def add_series(db_session, next_date, amount=15.99):
+    series = RecurringTransaction(
+        user_id=1, pattern="netflix com", description="NETFLIX.COM", amount=amount, type="expense",
+        category="Abonnements", period="monthly", anchor_day=next_date.day, occurrences=6,
+        last_date=add_months(next_date, -1), next_date=next_date, active=True
+    )
+    db_session.add(series)
+    db_session.commit()
+    return series
+
+
+def netflix_transactions(db_session):
+    return db_session.query(Transaction.date, Transaction.amount).filter(
+        Transaction.description.like("NETFLIX%")
+    ).order_by(Transaction.date, Transaction.amount).all()
+
+
+def test_monthly_series_is_detected(db_session, make_user):
+    make_user(0)
+    for months in range(1, 7):
+        add_transaction(db_session, f"NETFLIX.COM {months:02d}/0{months}", 15.99, add_months(date(2026, 6, 12), -months))
+    # Bruit: montants et dates irréguliers
+    for day, amount in ((3, 42.1), (9, 7.5), (27, 88.0)):
+        add_transaction(db_session, "Carrefour", amount, date(2026, 5, day), "Alimentation")
+    db_session.commit()
+
+    assert detect_for_users(db_session, 1, 1, TODAY) == 1
+    db_session.commit()
+
+    series = db_session.query(RecurringTransaction).one()
+    assert (series.pattern, series.period, series.anchor_day) == ("netflix com", "monthly", 12)
+    assert series.occurrences == 6
+    assert series.last_date == date(2026, 5, 12)
+    # Échéance du 12 juin déjà passée: la série commence à la suivante
+    assert series.next_date == date(2026, 7, 12)
+
+
+def test_due_occurrences_are_materialized_once(db_session, make_user):
+    make_user(0)
+    series = add_series(db_session, date(2026, 4, 15))
+
+    # Rattrapage: 15 avril, 15 mai et 15 juin
+    assert materialize_due(db_session, TODAY) == 1
+    db_session.commit()
+    assert [day for day, _ in netflix_transactions(db_session)] == [
+        date(2026, 4, 15), date(2026, 5, 15), date(2026, 6, 15)
+    ]
+    db_session.refresh(series)
+    assert (series.last_date, series.next_date, series.occurrences) == (date(2026, 6, 15), date(2026, 7, 15), 9)
+
+    assert materialize_due(db_session, TODAY) == 0
+
+
+def test_existing_occurrence_is_not_duplicated(db_session, make_user):
+    make_user(0)
+    series = add_series(db_session, date(2026, 5, 15))
+    # Prélèvement de mai déjà importé (deux jours plus tard, montant arrondi)
+    add_transaction(db_session, "Netflix.com 17/05", 16.00, date(2026, 5, 17))
+    # Même description mais montant trop différent: ne compte pas pour juin
+    add_transaction(db_session, "NETFLIX.COM 15/06", 50.00, date(2026, 6, 15))
+    db_session.commit()
+
+    assert materialize_due(db_session, TODAY) == 1
+    db_session.commit()
+
+    assert [(day, float(amount)) for day, amount in netflix_transactions(db_session)] == [
+        (date(2026, 5, 17), 16.00), (date(2026, 6, 15), 15.99), (date(2026, 6, 15), 50.00)
+    ]
+    db_session.refresh(series)
+    assert (series.last_date, series.next_date, series.occurrences) == (date(2026, 6, 15), date(2026, 7, 15), 8)
+
+
+def test_user_corrections_survive_redetection(client, db_session, make_user):
+    headers = make_user(0)
+    for months in range(1, 7):
+        add_transaction(db_session, "NETFLIX.COM", 15.99, add_months(date.today(), -months))
+    db_session.commit()
+    detect_for_users(db_session, 1, 1)
+    db_session.commit()
+    series = db_session.query(RecurringTransaction).one()
+
+    response = client.patch(f"{API}/recurring/{series.id}", headers=headers, json={
+        "amount": 17.99, "category": "Loisirs"
+    })
+    assert response.status_code == 200
+
+    add_transaction(db_session, "NETFLIX.COM", 15.99, date.today())
+    db_session.commit()
+    detect_for_users(db_session, 1, 1)
+    db_session.commit()
+
+    db_session.refresh(series)
+    assert (float(series.amount), series.category) == (17.99, "Loisirs")
+    assert series.occurrences == 7
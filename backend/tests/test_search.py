@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+
+from conftest import API
+
+
+def expense(description, days_ago=0):
+    day = date.today() - timedelta(days=days_ago)
+    return {"description": description, "amount": 10, "type": "expense", "category": "Autres", "date": day.isoformat()}
+
+
+def test_search_is_prefix_and_accent_insensitive(client, make_user):
+    headers = make_user(0)
+    client.post(f"{API}/transactions/bulk", headers=headers, json=[
+        expense("AMAZON Marketplace"), expense("Amazon Prime abonnement"),
+        expense("Café de la Gare"), expense("Boulangerie")
+    ])
+
+    def search(term):
+        response = client.get(f"{API}/transactions", headers=headers, params={"search": term})
+        assert response.status_code == 200
+        return sorted(t["description"] for t in response.json())
+
+    assert search("amaz") == ["AMAZON Marketplace", "Amazon Prime abonnement"]
+    assert search("amazon prime") == ["Amazon Prime abonnement"]
+    assert search("cafe") == ["Café de la Gare"]
+    assert search("%") == []
+
+
+def test_search_results_follow_the_cursor(client, make_user):
+    headers = make_user(0)
+    client.post(f"{API}/transactions/bulk", headers=headers, json=[
+        expense(f"Carrefour courses {i}", days_ago=i) for i in range(7)
+    ] + [expense("Loyer")])
+
+    seen, cursor = [], None
+    while True:
+        params = {"search": "carrefour", "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(f"{API}/transactions", headers=headers, params=params)
+        seen += [t["id"] for t in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 7
+
+
+def test_limit_pages_from_most_recent(client, make_user):
+    headers = make_user(30)
+    first = client.get(f"{API}/transactions", headers=headers, params={"limit": 20})
+    second = client.get(f"{API}/transactions", headers=headers,
+                        params={"limit": 20, "cursor": first.headers["X-Next-Cursor"]})
+    assert "X-Next-Cursor" not in second.headers
+    pages = first.json() + second.json()
+    assert len({t["id"] for t in pages}) == 30
+    assert [t["date"] for t in pages] == sorted((t["date"] for t in pages), reverse=True)
+
+    assert client.get(f"{API}/transactions", headers=headers, params={"cursor": "invalide"}).status_code == 400
@@ -0,0 +1,171 @@
+from datetime import date
+from io import BytesIO
+
+from PIL import Image
+from pydantic import TypeAdapter
+
+from app.models.transaction import Transaction
+from app.models.user import Ticket, TicketItem, User
+from app.schemas.transaction_schema import TransactionResponse
+from app.services import receipt_cache
+from conftest import API
+
+
+def transaction_payload(**extra):
+    return {"description": "Pharmacie", "amount": 12.3, "type": "expense", "category": "Santé",
+            "date": date.today().isoformat(), **extra}
+
+
+def add_ticket(db_session):
+    user = db_session.query(User).one()
+    ticket = Ticket(user_id=user.id, type="image/png", file_path="receipts/ticket.png", size=10)
+    db_session.add(ticket)
+    db_session.commit()
+    return ticket.id
+
+
+def test_unknown_ticket_leaves_nothing_written(client, db_session, make_user):
+    headers = make_user(0)
+    ticket_id = add_ticket(db_session)
+
+    response = client.post(f"{API}/transactions", headers=headers, json=transaction_payload(
+        tickets=[{"ticket_id": ticket_id}, {"ticket_id": ticket_id + 1}]
+    ))
+
+    assert response.status_code == 404
+    assert db_session.query(Transaction).count() == 0
+    assert db_session.get(Ticket, ticket_id).transaction_id is None
+
+
+def test_create_attaches_tickets_in_one_commit(client, db_session, make_user, count_queries):
+    headers = make_user(0)
+    ticket_id = add_ticket(db_session)
+    client.get(f"{API}/notifications", headers=headers)
+
+    with count_queries() as queries:
+        response = client.post(f"{API}/transactions", headers=headers, json=transaction_payload(tickets=[
+            {"ticket_id": ticket_id},
+            {"type": "application/pdf", "file_path": "receipts/facture.pdf", "size": 20}
+        ]))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert sorted(t["transaction_id"] for t in body["tickets"]) == [body["id"], body["id"]]
+    # utilisateur, tickets (IN), INSERT transaction, UPDATE + INSERT tickets,
+    # compteurs de dépenses (4): aucune relecture après le commit
+    assert queries.count <= 9
+
+
+def test_fast_list_matches_the_response_model(client, db_session, make_user, count_queries):
+    headers = make_user(50)
+    created = client.post(f"{API}/transactions/bulk", headers=headers, json=[
+        transaction_payload(tickets=[{"ticket_id": add_ticket(db_session)},
+                                     {"type": "application/pdf", "file_path": "receipts/facture.pdf"}]),
+        transaction_payload(description="Boulangerie")
+    ])
+    adapter = TypeAdapter(list[TransactionResponse])
+    expected = adapter.dump_python(adapter.validate_python(
+        db_session.query(Transaction).order_by(Transaction.id).all(), from_attributes=True
+    ), mode="json")
+
+    with count_queries() as queries:
+        listed = client.get(f"{API}/transactions", headers=headers).json()
+
+    assert sorted(listed, key=lambda t: t["id"]) == expected
+    assert created.json() == expected[-2:]
+    # utilisateur, transactions et tickets joints
+    assert queries.count == 2
+
+
+def test_materialize_ticket_items_is_idempotent(client, db_session, make_user, count_queries):
+    headers = make_user(0)
+    ticket_id = add_ticket(db_session)
+    db_session.add_all([
+        TicketItem(ticket_id=ticket_id, position=i, label=label, amount=amount)
+        for i, (label, amount) in enumerate([("Pain", 1.2), ("Lait", 0.95), ("Fromage", 4.5)])
+    ])
+    db_session.commit()
+    client.get(f"{API}/notifications", headers=headers)
+    url = f"{API}/tickets/{ticket_id}/materialize"
+
+    with count_queries() as queries:
+        first = client.post(url, headers=headers).json()
+    retry = client.post(url, headers=headers).json()
+
+    assert first["created_count"] == 3
+    assert [t["description"] for t in first["transactions"]] == ["Pain", "Lait", "Fromage"]
+    assert retry["created_count"] == 0
+    assert retry["transactions"] == first["transactions"]
+    assert db_session.query(Transaction).count() == 3
+    assert db_session.query(TicketItem).filter(TicketItem.processed.is_(False)).count() == 0
+    # Nombre de requêtes indépendant du nombre d'items (hors INSERT ligne à ligne de SQLite)
+    assert queries.count <= 10 + 3
+
+
+def test_materialize_rejects_foreign_items(client, db_session, make_user):
+    headers = make_user(0)
+    ticket_id = add_ticket(db_session)
+
+    response = client.post(f"{API}/tickets/{ticket_id}/materialize", headers=headers, json={"item_ids": [999]})
+    assert response.status_code == 404
+
+
+def test_delete_removes_ticket_items_without_database_cascade(client, db_session, make_user, monkeypatch):
+    from app.db.routing import session_router
+    headers = make_user(0)
+    ticket_id = add_ticket(db_session)
+    db_session.add_all([TicketItem(ticket_id=ticket_id, position=i, label="Article", amount=1) for i in range(2)])
+    db_session.commit()
+    transaction_id = client.post(f"{API}/transactions", headers=headers,
+                                 json=transaction_payload(tickets=[{"ticket_id": ticket_id}])).json()["id"]
+
+    # Réplica configuré: l'écriture doit renvoyer les lectures suivantes sur le primaire
+    monkeypatch.setattr(session_router, "_writes", {})
+    item_ids = [item.id for item in db_session.query(TicketItem)]
+    client.post(f"{API}/tickets/{ticket_id}/items/processed", headers=headers, json={"item_ids": item_ids})
+    assert session_router.recently_wrote(db_session.query(User).one().id)
+
+    # SQLite sans PRAGMA foreign_keys: aucune cascade faite par la base
+    assert client.delete(f"{API}/transactions/{transaction_id}", headers=headers).status_code == 200
+    assert db_session.query(Ticket).count() == 0
+    assert db_session.query(TicketItem).count() == 0
+
+
+def test_reprocess_ticket_without_hash_checks_the_uploader(client, db_session, make_user, monkeypatch):
+    monkeypatch.setattr(receipt_cache, "read_receipt", lambda image, **options: [
+        ([[0, 0], [1, 0], [1, 1], [0, 1]], "PAIN 2.50", 0.9)
+    ])
+    image = BytesIO()
+    Image.new("RGB", (40, 20), "white").save(image, format="PNG")
+    owner = make_user(0)
+    uploaded = client.post("/api/v1/process_ticket", headers=owner,
+                           files={"file": ("ticket.png", image.getvalue(), "image/png")}).json()
+    stored = db_session.get(Ticket, uploaded["ticket_id"])
+
+    # Un client ne peut pas désigner directement un fichier du stockage
+    response = client.post(f"{API}/transactions", headers=owner, json=transaction_payload(
+        tickets=[{"type": "image/png", "file_path": stored.file_path}]
+    ))
+    assert response.status_code == 422
+
+    def legacy_ticket(user_id):
+        """Ticket sans empreinte (antérieur au stockage adressé par contenu)"""
+        transaction = Transaction(user_id=user_id, description="Boulangerie", amount=2.5, type="expense",
+                                  category="Alimentation", date=date.today())
+        transaction.tickets = [Ticket(user_id=user_id, type="image/png", file_path=stored.file_path)]
+        db_session.add(transaction)
+        db_session.commit()
+        return transaction.id, transaction.tickets[0].id
+
+    transaction_id, ticket_id = legacy_ticket(stored.user_id)
+    response = client.post(f"{API}/transactions/{transaction_id}/process_ticket/{ticket_id}", headers=owner)
+    assert response.status_code == 200
+    db_session.expire_all()
+    assert db_session.get(Ticket, ticket_id).content_hash == stored.content_hash
+
+    # Le même fichier rattaché au ticket d'un autre utilisateur n'est pas lu
+    other = make_user(0)
+    other_id = db_session.query(User.id).filter(User.id != stored.user_id).scalar()
+    transaction_id, ticket_id = legacy_ticket(other_id)
+    response = client.post(f"{API}/transactions/{transaction_id}/process_ticket/{ticket_id}", headers=other)
+    assert response.status_code == 403
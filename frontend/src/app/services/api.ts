@@ -14,6 +14,7 @@ import {
   DashboardSummary,
   CategoryAnalysis,
   CategoriesResponse,
+  DashboardBootstrap,
   TransactionType,
   OCRPredictionResponse
 } from '../types/api';
@@ -176,6 +177,16 @@ class ApiService {
     return this.handleResponse<DashboardSummary>(response);
   }
 
+  // Résumé, budgets, analyse, catégories et transactions en un seul appel
+  async getDashboardBootstrap(month?: string): Promise<DashboardBootstrap> {
+    const params = month ? `?month=${month}` : '';
+    const response = await fetch(`${this.baseUrl}/api/v1/api/dashboard/bootstrap${params}`, {
+      method: 'GET',
+      headers: this.getAuthHeaders(),
+    });
+    return this.handleResponse<DashboardBootstrap>(response);
+  }
+
   async getBudgetsStatus(): Promise<BudgetStatus[]> {
     const response = await fetch(`${this.baseUrl}/api/v1/api/budgets/status`, {
       method: 'GET',
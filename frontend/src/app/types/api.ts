@@ -102,6 +102,8 @@ export interface BudgetStatus {
   notification_threshold: number;
   is_over_budget: boolean;
   is_near_limit: boolean;
+  projected_spending?: number | null;
+  is_projected_over_budget?: boolean;
 }
 
 // ============= Dashboard Types =============
@@ -125,6 +127,15 @@ export interface CategoriesResponse {
   income: string[];
 }
 
+// Données du premier affichage (GET /dashboard/bootstrap)
+export interface DashboardBootstrap {
+  summary: DashboardSummary;
+  budgets_status: BudgetStatus[];
+  categories_analysis: CategoryAnalysis[];
+  categories: CategoriesResponse;
+  transactions: TransactionResponse[];
+}
+
 // ============= OCR Types =============
 
 // Format d'un item extrait par l'OCR (correspond au format backend)